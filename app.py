@@ -2,16 +2,39 @@ import os
 import pandas as pd
 import numpy as np
 import json
+import copy
+import gc
 import hashlib
+import hmac
 import re
 import time
 import pickle
 import traceback
-from flask import Flask, request, jsonify, send_from_directory
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from flask import Flask, Response, g, request, jsonify, send_from_directory
 from flask_cors import CORS
 from sklearn.naive_bayes import MultinomialNB
-from collections import defaultdict
-import requests
+from scipy import sparse
+from inference import NaiveBayesEngine, rank_classes
+from metrics import Metrics
+from model_artifact import MANIFEST_NAME, load_artifact, save_artifact
+from model_registry import ModelRegistry, evaluate_holdout, load_holdout
+from model_routing import ForestModel, ModelRouter
+from profiling import ProfilingMiddleware, SamplingProfiler
+from training_data import file_sha256, load_training_data
+import symptom_predictor
+from audit import AuditLog
+from caching import LRUCache
+from rate_limiter import RateLimiter, build_backend as build_rate_limit_backend
+from storage import PatientLogStore
+from translation_pool import TranslationExecutor
+from translation_store import load_bundle as load_translation_bundle, catalogue_hash
+from http_client import build_default_client
+from symptom_matcher import SymptomMatcher
+from symptom_resolver import SymptomResolver, load_symptom_alias_map, normalize_symptom
+from symptom_suggest import SymptomAutocomplete
 
 app = Flask(__name__,
             static_folder=os.path.join('frontend', 'static'),
@@ -20,83 +43,182 @@ CORS(app)
 
 # Rate limiting configuration
 RATE_LIMIT = 100  # requests per minute
-rate_limit_store = defaultdict(list)
+RATE_LIMIT_WINDOW = 60  # seconds
+# 'sqlite' shares counters between gunicorn workers; 'memory' keeps them per process
+RATE_LIMIT_BACKEND = os.environ.get('RATE_LIMIT_BACKEND', 'sqlite').strip().lower()
+RATE_LIMIT_DB = os.environ.get('RATE_LIMIT_DB', 'rate_limits.sqlite3')
+rate_limiter = RateLimiter(RATE_LIMIT, RATE_LIMIT_WINDOW, build_rate_limit_backend(RATE_LIMIT_BACKEND, RATE_LIMIT_DB))
+
+# Batch prediction limits
+MAX_BATCH_SIZE = 500
+DEFAULT_TOP_K = 3
+MAX_TOP_K = 10
+
+# Patient-independent prediction results keyed by canonical symptom set
+PREDICTION_CACHE_SIZE = int(os.environ.get('PREDICTION_CACHE_SIZE', 1024))
+prediction_cache = LRUCache(PREDICTION_CACHE_SIZE)
+
+# Audit logging: requests only touch the in-memory ring; a writer thread owns the files
+AUDIT_DIR = os.environ.get('AUDIT_DIR', 'audit_logs')
+AUDIT_BUFFER_SIZE = int(os.environ.get('AUDIT_BUFFER_SIZE', 10000))
+AUDIT_FLUSH_INTERVAL = float(os.environ.get('AUDIT_FLUSH_INTERVAL', 1.0))
+AUDIT_MAX_BYTES = int(os.environ.get('AUDIT_MAX_BYTES', 10 * 1024 * 1024))
+AUDIT_ROTATE_SECONDS = int(os.environ.get('AUDIT_ROTATE_SECONDS', 86400))
+AUDIT_MAX_FILES = int(os.environ.get('AUDIT_MAX_FILES', 50))
+AUDIT_QUERY_MAX_LIMIT = 1000
+audit_log = AuditLog(AUDIT_DIR, capacity=AUDIT_BUFFER_SIZE, flush_interval=AUDIT_FLUSH_INTERVAL,
+                     max_bytes=AUDIT_MAX_BYTES, rotate_seconds=AUDIT_ROTATE_SECONDS, max_files=AUDIT_MAX_FILES)
+
+# Request/stage metrics; each worker snapshots to METRICS_DIR so /metrics covers all of them
+METRICS_DIR = os.environ.get('METRICS_DIR', 'metrics')
+METRICS_FLUSH_INTERVAL = float(os.environ.get('METRICS_FLUSH_INTERVAL', 5.0))
+metrics = Metrics(METRICS_DIR, flush_interval=METRICS_FLUSH_INTERVAL)
+metrics.describe('http_requests_total', 'HTTP requests by route, method and status code')
+metrics.describe('http_request_duration_seconds', 'Time spent handling a request, by route')
+metrics.describe('stage_duration_seconds', 'Time spent in each step of a route')
+metrics.add_ratio('prediction_cache_hit_ratio', 'prediction_cache_hits_total',
+                  ['prediction_cache_hits_total', 'prediction_cache_misses_total'])
 
-# Audit logging
-audit_log = []
 symptom_alias_map = {}
+symptom_matcher = None
+symptom_resolver = None
+symptom_autocomplete = None
+SUGGEST_DEFAULT_LIMIT = 8
+SUGGEST_MAX_LIMIT = 25
+# Shared by all workers so they rank a prefix, and so ETag it, identically
+SUGGEST_POPULARITY_PATH = os.environ.get('SUGGEST_POPULARITY_PATH', os.path.join(METRICS_DIR, 'symptom_popularity.json'))
+SUGGEST_POPULARITY_FLUSH = float(os.environ.get('SUGGEST_POPULARITY_FLUSH', 30))
 output_translation_cache = {}
+static_translations = {}  # {lang: {source: translation}} from the offline bundle
 SUPPORTED_OUTPUT_LANGS = {
     'hi': 'Hindi',
     'mr': 'Marathi'
 }
 
-
-def normalize_symptom(value):
-    """Normalize symptom text to the dataset format."""
-    if value is None:
-        return ""
-    return str(value).strip().lower().replace(" ", "_")
-
-
-def load_symptom_alias_map():
-    """Load alias->canonical symptom mappings from symptoms_list.csv."""
-    alias_map = {}
+# Shared keep-alive sessions, retry budgets and latency metrics per upstream
+outbound = build_default_client()
+
+# Hedged symptom extraction: race Groq against the rule-based extractor
+HEDGED_EXTRACTION = os.environ.get('HEDGED_EXTRACTION', '0').strip().lower() in {'1', 'true', 'yes'}
+EXTRACTION_SLO_MS = float(os.environ.get('EXTRACTION_SLO_MS', 1500))
+HEDGE_WORKERS = int(os.environ.get('HEDGE_WORKERS', 4))
+hedge_pool = ThreadPoolExecutor(max_workers=HEDGE_WORKERS, thread_name_prefix='hedge')
+# Groq calls running or queued at once; past this, requests use the rule-based answer directly
+hedge_slots = threading.BoundedSemaphore(HEDGE_WORKERS + int(os.environ.get('HEDGE_QUEUE', HEDGE_WORKERS)))
+
+# Translation fan-out: whole-payload time budget (seconds) and pool size
+TRANSLATION_DEADLINE = float(os.environ.get('TRANSLATION_DEADLINE', 6.0))
+translation_executor = TranslationExecutor(max_workers=int(os.environ.get('TRANSLATION_WORKERS', 8)))
+
+# Versioned models: hot reload is validated on a holdout set before the swap
+# (a stratified split of Training.csv when the holdout CSV is absent)
+MODEL_REGISTRY_DIR = os.environ.get(
+    'MODEL_REGISTRY_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'model_artifacts', 'registry')
+)
+MODEL_HOLDOUT_PATH = os.environ.get(
+    'MODEL_HOLDOUT_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'Testing.csv')
+)
+MODEL_MIN_ACCURACY = float(os.environ.get('MODEL_MIN_ACCURACY', 0.8))
+MODEL_MAX_REGRESSION = float(os.environ.get('MODEL_MAX_REGRESSION', 0.02))
+# Every worker polls CURRENT.json, so a reload or activation served by one worker reaches all
+# of them within this many seconds; 0 disables polling (single-process deployments only)
+MODEL_WATCH_INTERVAL = float(os.environ.get('MODEL_WATCH_INTERVAL', 5))
+MODEL_RELOAD_WAIT = float(os.environ.get('MODEL_RELOAD_WAIT', 10))
+ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN', '')
+model_registry = ModelRegistry(MODEL_REGISTRY_DIR)
+model_reload_lock = threading.Lock()
+model_reload_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='model-reload')
+model_reload_status = {}
+model_watcher_pid = None
+
+# Challenger models: serve CANARY_PERCENT of traffic and/or mirror requests off the request path
+CANARY_MODEL = os.environ.get('CANARY_MODEL', '').strip()
+CANARY_PERCENT = float(os.environ.get('CANARY_PERCENT', 0))
+SHADOW_MODEL = os.environ.get('SHADOW_MODEL', '').strip()
+SHADOW_PERCENT = float(os.environ.get('SHADOW_PERCENT', 100))
+# Saved by `train_models.py forest --output ...`; without it the forest is trained at startup
+FOREST_ARTIFACT_PATH = os.environ.get(
+    'FOREST_ARTIFACT_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'model_artifacts', 'random_forest')
+)
+FOREST_N_JOBS = int(os.environ.get('FOREST_N_JOBS', 1))  # -1 trains on every core
+
+# Sampled stack profiling: PROFILE_SAMPLE_RATE of requests (0 disables), or on demand with
+# "X-Profile: 1" plus the admin token; collapsed stacks per route land in PROFILE_DIR
+PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', 0))
+PROFILE_DIR = os.environ.get('PROFILE_DIR', 'profiles')
+PROFILE_INTERVAL_MS = float(os.environ.get('PROFILE_INTERVAL_MS', 1.0))
+profiler = SamplingProfiler(PROFILE_DIR, interval_ms=PROFILE_INTERVAL_MS)
+app.wsgi_app = ProfilingMiddleware(app.wsgi_app, app.url_map, profiler,
+                                   sample_rate=PROFILE_SAMPLE_RATE, admin_token=ADMIN_TOKEN)
+
+
+def load_symptom_catalog(known_symptoms):
+    """Display name, category and aliases per symptom, for the autocomplete index."""
+    catalog = {s: {'symptom': s, 'display': '', 'category': '', 'aliases': []} for s in known_symptoms}
     data_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'symptoms_list.csv')
-    if not os.path.exists(data_path):
-        return alias_map
-
-    try:
-        df = pd.read_csv(data_path)
-        if 'Symptom' not in df.columns:
-            return alias_map
+    if os.path.exists(data_path):
+        try:
+            df = pd.read_csv(data_path).fillna('')
+            for _, row in df.iterrows():
+                canonical = normalize_symptom(row.get('Symptom', ''))
+                if canonical not in catalog:
+                    continue
+                entry = catalog[canonical]
+                entry['display'] = str(row.get('Display', '')).strip()
+                entry['category'] = str(row.get('Category', '')).strip()
+                entry['aliases'] = [a.strip() for a in str(row.get('Aliases', '')).split(',') if a.strip()]
+        except Exception as e:
+            print(f"Symptom catalog load warning: {e}")
 
-        for _, row in df.iterrows():
-            canonical = normalize_symptom(row.get('Symptom', ''))
-            if not canonical:
-                continue
-            alias_map[canonical] = canonical
-
-            aliases = str(row.get('Aliases', '')).strip()
-            if aliases:
-                for alias in aliases.split(','):
-                    key = normalize_symptom(alias)
-                    if key:
-                        alias_map[key] = canonical
-    except Exception as e:
-        print(f"Alias map load warning: {e}")
+    return list(catalog.values())
 
-    return alias_map
 
+def canonicalize_symptom(symptom, fuzzy=False):
+    """Canonical symptom name; fuzzy=True also corrects close typos.
 
-def canonicalize_symptom(symptom):
+    Only explicit, structured symptom input should be fuzzy-corrected: words
+    from free text or LLM output must not silently become symptoms.
+    """
     key = normalize_symptom(symptom)
     if key in symptom_alias_map:
         return symptom_alias_map[key]
+    # Typo tolerance ("vomitting" -> "vomiting") via the trigram/edit-distance index
+    if fuzzy and symptom_resolver is not None and key:
+        resolved = symptom_resolver.resolve(key)
+        if resolved:
+            return resolved
     return key
 
 def check_rate_limit(ip):
     """Check if request exceeds rate limit"""
-    current_time = time.time()
-    # Clean old requests
-    rate_limit_store[ip] = [t for t in rate_limit_store[ip] if current_time - t < 60]
-    
-    if len(rate_limit_store[ip]) >= RATE_LIMIT:
-        return False
-    
-    rate_limit_store[ip].append(current_time)
-    return True
+    return rate_limiter.allow(ip)
 
 def log_audit(event_type, details):
-    """Log API events for security"""
-    audit_log.append({
-        'timestamp': time.time(),
-        'event_type': event_type,
-        'details': details
-    })
-    # Keep memory growth bounded in long-running deployments.
-    if len(audit_log) > 5000:
-        del audit_log[:1000]
+    """Log API events for security (never blocks on disk I/O)"""
+    try:
+        audit_log.record(event_type, details)
+    except Exception as e:
+        print(f"Audit log warning: {e}")
+
+
+def parse_ranking_params(data):
+    """Read top_k / coverage ranking options from a request body."""
+    try:
+        top_k = int(data.get('top_k', DEFAULT_TOP_K))
+    except (TypeError, ValueError):
+        raise ValueError('top_k must be an integer')
+    top_k = max(1, min(top_k, MAX_TOP_K))
+
+    coverage = data.get('coverage')
+    if coverage is not None:
+        try:
+            coverage = float(coverage)
+        except (TypeError, ValueError):
+            raise ValueError('coverage must be a number')
+        if coverage <= 0 or coverage > 1:
+            raise ValueError('coverage should be between 0 and 1')
+
+    return top_k, coverage
 
 
 def resolve_output_language(language_code):
@@ -105,7 +227,7 @@ def resolve_output_language(language_code):
     return base if base in SUPPORTED_OUTPUT_LANGS else 'en'
 
 
-def translate_texts_with_groq(texts, target_lang):
+def translate_texts_with_groq(texts, target_lang, timeout=20, deadline=None):
     """Translate a list of strings using Groq, returning None on failure."""
     api_key = os.environ.get('GROQ_API_KEY', '').strip()
     if not api_key:
@@ -113,7 +235,8 @@ def translate_texts_with_groq(texts, target_lang):
 
     try:
         lang_name = SUPPORTED_OUTPUT_LANGS.get(target_lang, target_lang)
-        response = requests.post(
+        response = outbound.post(
+            'groq',
             'https://api.groq.com/openai/v1/chat/completions',
             headers={
                 'Authorization': f'Bearer {api_key}',
@@ -138,7 +261,8 @@ def translate_texts_with_groq(texts, target_lang):
                 ],
                 'temperature': 0.1
             },
-            timeout=20
+            timeout=timeout,
+            deadline=deadline
         )
         if response.status_code != 200:
             return None
@@ -162,7 +286,8 @@ def translate_texts_with_groq(texts, target_lang):
 def translate_text_with_google(text, target_lang):
     """Fallback text translation using Google Translate's public endpoint."""
     try:
-        response = requests.get(
+        response = outbound.get(
+            'google_translate',
             'https://translate.googleapis.com/translate_a/single',
             params={
                 'client': 'gtx',
@@ -183,11 +308,24 @@ def translate_text_with_google(text, target_lang):
         return text
 
 
+def _translate_and_cache(text, target_lang):
+    """Google fallback for one string; caches even if the caller stopped waiting."""
+    translated = translate_text_with_google(text, target_lang) or text
+    output_translation_cache[(target_lang, text)] = translated
+    return translated
+
+
 def translate_text_list(texts, target_lang):
-    """Translate strings with cache + Groq batch + Google fallback."""
+    """Translate strings with cache + Groq batch + concurrent Google fallback.
+
+    The whole call is bounded by TRANSLATION_DEADLINE; strings that are not
+    translated in time are returned untranslated.
+    """
     if target_lang == 'en':
         return list(texts)
 
+    deadline = time.monotonic() + TRANSLATION_DEADLINE
+
     results = [None] * len(texts)
     unresolved_positions = []
     unresolved_values = []
@@ -198,6 +336,11 @@ def translate_text_list(texts, target_lang):
             results[idx] = text
             continue
 
+        static_text = static_translations.get(target_lang, {}).get(raw)
+        if static_text is not None:
+            results[idx] = static_text
+            continue
+
         cache_key = (target_lang, raw)
         if cache_key in output_translation_cache:
             results[idx] = output_translation_cache[cache_key]
@@ -206,14 +349,20 @@ def translate_text_list(texts, target_lang):
             unresolved_values.append(raw)
 
     if unresolved_values:
-        translated_batch = translate_texts_with_groq(unresolved_values, target_lang)
-        if translated_batch is None:
-            translated_batch = [translate_text_with_google(value, target_lang) for value in unresolved_values]
+        translated_batch = translate_texts_with_groq(unresolved_values, target_lang, deadline=deadline)
+        if translated_batch is not None:
+            for original, translated in zip(unresolved_values, translated_batch):
+                output_translation_cache[(target_lang, original)] = translated or original
+        else:
+            # Identical (lang, text) calls from concurrent requests share one future
+            futures = [
+                translation_executor.submit((target_lang, value), _translate_and_cache, value, target_lang)
+                for value in unresolved_values
+            ]
+            translated_batch = translation_executor.gather(futures, deadline)
 
         for pos, original, translated in zip(unresolved_positions, unresolved_values, translated_batch):
-            final_text = translated or original
-            output_translation_cache[(target_lang, original)] = final_text
-            results[pos] = final_text
+            results[pos] = translated or original
 
     if len(output_translation_cache) > 10000:
         for key in list(output_translation_cache.keys())[:2000]:
@@ -286,97 +435,159 @@ def translate_prediction_payload(payload, language_code):
     return payload
 
 # NLP - Groq API integration with fallback
+def extract_symptoms_with_groq(text, timeout=10, deadline=None):
+    """Ask Groq for symptoms; returns a canonical list, or None if unavailable."""
+    groq_api_key = os.environ.get('GROQ_API_KEY', '')
+    if not groq_api_key:
+        return None
+
+    try:
+        response = outbound.post(
+            'groq',
+            'https://api.groq.com/openai/v1/chat/completions',
+            headers={
+                'Authorization': f'Bearer {groq_api_key}',
+                'Content-Type': 'application/json'
+            },
+            json={
+                'model': 'llama3-8b-8192',
+                'messages': [
+                    {
+                        'role': 'system',
+                        'content': 'You are a medical symptom extractor. Extract symptoms from the user text and return them as a JSON array of symptom strings. Only include valid medical symptoms. Return in format: {"symptoms": ["symptom1", "symptom2"]}'
+                    },
+                    {
+                        'role': 'user',
+                        'content': text
+                    }
+                ],
+                'temperature': 0.1
+            },
+            timeout=timeout,
+            deadline=deadline
+        )
+        
+        if response.status_code == 200:
+            result = response.json()
+            content = result['choices'][0]['message']['content']
+            # Parse JSON from response
+            match = re.search(r'\{.*\}', content)
+            if match:
+                data = json.loads(match.group())
+                return [canonicalize_symptom(s) for s in data.get('symptoms', []) if str(s).strip()]
+    except Exception as e:
+        print(f"Groq API error: {e}")
+    return None
+
+
 def extract_symptoms_from_text(text):
     """
     LLM-Powered Symptom Extraction using Groq API
-    Falls back to rule-based extraction if API fails
+    Falls back to rule-based extraction if API fails or its circuit is open.
+    In hedged mode the rule-based answer is computed alongside the Groq call
+    and used if Groq has no usable answer within EXTRACTION_SLO_MS, or
+    straight away when too many Groq calls are already pending.
     """
-    # Try Groq API first
+    if not os.environ.get('GROQ_API_KEY', ''):
+        return fallback_symptom_extraction(text)
+
+    if not HEDGED_EXTRACTION:
+        extracted = extract_symptoms_with_groq(text)
+        if extracted is not None:
+            return extracted
+        # Fallback: Rule-based symptom extraction
+        return fallback_symptom_extraction(text)
+
+    if not hedge_slots.acquire(blocking=False):
+        # Groq is already backed up; queueing more calls only adds load
+        metrics.inc('hedge_rejected_total')
+        return fallback_symptom_extraction(text)
+    deadline = time.monotonic() + EXTRACTION_SLO_MS / 1000.0
+    # The Groq call gets the same deadline, so it stops once its answer could no longer be used
+    future = hedge_pool.submit(extract_symptoms_with_groq, text, deadline=deadline)
+    future.add_done_callback(lambda f: hedge_slots.release())
+    local = fallback_symptom_extraction(text)
+    # Never wait past the SLO, even when the rule-based answer is empty
     try:
-        groq_api_key = os.environ.get('GROQ_API_KEY', '')
-        if groq_api_key:
-            response = requests.post(
-                'https://api.groq.com/openai/v1/chat/completions',
-                headers={
-                    'Authorization': f'Bearer {groq_api_key}',
-                    'Content-Type': 'application/json'
-                },
-                json={
-                    'model': 'llama3-8b-8192',
-                    'messages': [
-                        {
-                            'role': 'system',
-                            'content': 'You are a medical symptom extractor. Extract symptoms from the user text and return them as a JSON array of symptom strings. Only include valid medical symptoms. Return in format: {"symptoms": ["symptom1", "symptom2"]}'
-                        },
-                        {
-                            'role': 'user',
-                            'content': text
-                        }
-                    ],
-                    'temperature': 0.1
-                },
-                timeout=10
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                content = result['choices'][0]['message']['content']
-                # Parse JSON from response
-                match = re.search(r'\{.*\}', content)
-                if match:
-                    data = json.loads(match.group())
-                    return [canonicalize_symptom(s) for s in data.get('symptoms', []) if str(s).strip()]
-    except Exception as e:
-        print(f"Groq API error: {e}")
-    
-    # Fallback: Rule-based symptom extraction
-    return fallback_symptom_extraction(text)
+        extracted = future.result(timeout=max(0.0, deadline - time.monotonic()))
+    except FutureTimeoutError:
+        future.cancel()
+        extracted = None
+    except Exception:
+        extracted = None
+    return extracted or local
+
+# Hand-written colloquial phrases, compiled together with the symptoms_list.csv aliases
+FALLBACK_SYMPTOM_PATTERNS = {
+    'fever': ['fever', 'high temperature', 'febrile'],
+    'headache': ['headache', 'head pain', 'head ache'],
+    'cough': ['cough', 'coughing'],
+    'fatigue': ['fatigue', 'tired', 'tiredness', 'exhausted', 'weakness'],
+    'nausea': ['nausea', 'nauseous', 'feel sick'],
+    'vomiting': ['vomiting', 'vomit', 'throwing up'],
+    'diarrhea': ['diarrhea', 'loose stool', 'watery stool'],
+    'abdominal_pain': ['stomach pain', 'abdominal pain', 'belly pain', 'stomach ache'],
+    'chest_pain': ['chest pain', 'chest tightness'],
+    'shortness_of_breath': ['shortness of breath', 'breathlessness', 'difficulty breathing', 'breathing difficulty'],
+    'dizziness': ['dizziness', 'dizzy', 'lightheaded', 'light headed'],
+    'rash': ['rash', 'skin rash', 'skin eruption'],
+    'itching': ['itching', 'itchy', 'pruritus'],
+    'joint_pain': ['joint pain', 'arthralgia', 'joint ache'],
+    'muscle_pain': ['muscle pain', 'myalgia', 'muscle ache'],
+    'sore_throat': ['sore throat', 'throat pain', 'pharyngitis'],
+    'runny_nose': ['runny nose', 'rhinorrhea', 'nasal discharge'],
+    'congestion': ['congestion', 'stuffy nose', 'blocked nose'],
+    'loss_of_appetite': ['loss of appetite', 'no appetite', 'decreased appetite'],
+    'weight_loss': ['weight loss', 'losing weight'],
+    'insomnia': ['insomnia', 'cannot sleep', 'trouble sleeping', 'sleepless'],
+    'anxiety': ['anxiety', 'anxious', 'nervousness', 'nervous'],
+    'depression': ['depression', 'depressed', 'sad', 'low mood'],
+    'back_pain': ['back pain', 'backache'],
+    'constipation': ['constipation', 'constipated'],
+    'blurred_vision': ['blurred vision', 'blurry vision', 'vision blur'],
+    'increased_thirst': ['increased thirst', 'thirsty', 'excessive thirst'],
+    'frequent_urination': ['frequent urination', 'urinating often', 'polyuria'],
+    'painful_urination': ['painful urination', 'dysuria', 'burning urination'],
+}
+
+
+def build_symptom_matcher(alias_map):
+    """Compile every canonical name, alias and fallback phrase into one matcher."""
+    phrases = {}
+    for symptom, patterns in FALLBACK_SYMPTOM_PATTERNS.items():
+        canonical = alias_map.get(symptom, symptom)
+        for pattern in patterns:
+            phrases[pattern] = canonical
+    phrases.update(alias_map)
+    return SymptomMatcher(phrases)
+
 
 def fallback_symptom_extraction(text):
     """Fallback method when Groq API is unavailable"""
-    text = text.lower()
-    
-    # Common symptom patterns
-    symptom_patterns = {
-        'fever': ['fever', 'high temperature', 'febrile'],
-        'headache': ['headache', 'head pain', 'head ache'],
-        'cough': ['cough', 'coughing'],
-        'fatigue': ['fatigue', 'tired', 'tiredness', 'exhausted', 'weakness'],
-        'nausea': ['nausea', 'nauseous', 'feel sick'],
-        'vomiting': ['vomiting', 'vomit', 'throwing up'],
-        'diarrhea': ['diarrhea', 'loose stool', 'watery stool'],
-        'abdominal_pain': ['stomach pain', 'abdominal pain', 'belly pain', 'stomach ache'],
-        'chest_pain': ['chest pain', 'chest tightness'],
-        'shortness_of_breath': ['shortness of breath', 'breathlessness', 'difficulty breathing', 'breathing difficulty'],
-        'dizziness': ['dizziness', 'dizzy', 'lightheaded', 'light headed'],
-        'rash': ['rash', 'skin rash', 'skin eruption'],
-        'itching': ['itching', 'itchy', 'pruritus'],
-        'joint_pain': ['joint pain', 'arthralgia', 'joint ache'],
-        'muscle_pain': ['muscle pain', 'myalgia', 'muscle ache'],
-        'sore_throat': ['sore throat', 'throat pain', 'pharyngitis'],
-        'runny_nose': ['runny nose', 'rhinorrhea', 'nasal discharge'],
-        'congestion': ['congestion', 'stuffy nose', 'blocked nose'],
-        'loss_of_appetite': ['loss of appetite', 'no appetite', 'decreased appetite'],
-        'weight_loss': ['weight loss', 'losing weight'],
-        'insomnia': ['insomnia', 'cannot sleep', 'trouble sleeping', 'sleepless'],
-        'anxiety': ['anxiety', 'anxious', 'nervousness', 'nervous'],
-        'depression': ['depression', 'depressed', 'sad', 'low mood'],
-        'back_pain': ['back pain', 'backache'],
-        'constipation': ['constipation', 'constipated'],
-        'blurred_vision': ['blurred vision', 'blurry vision', 'vision blur'],
-        'increased_thirst': ['increased thirst', 'thirsty', 'excessive thirst'],
-        'frequent_urination': ['frequent urination', 'urinating often', 'polyuria'],
-        'painful_urination': ['painful urination', 'dysuria', 'burning urination'],
-    }
-    
-    extracted = []
-    for symptom, patterns in symptom_patterns.items():
-        for pattern in patterns:
-            if pattern in text:
-                extracted.append(symptom)
-                break
-    
-    return extracted
+    return symptom_matcher.extract(text)
+
+
+FOLLOWUP_QUESTIONS = {
+    'fever': ['How high is your fever?', 'How long have you had the fever?', 'Does the fever come and go?'],
+    'cough': ['Is your cough dry or productive?', 'Are you coughing up any mucus or blood?', 'How long have you been coughing?'],
+    'headache': ['Where exactly is the pain located?', 'How severe is the headache on a scale of 1-10?', 'Do you have any sensitivity to light or sound?'],
+    'fatigue': ['How long have you been feeling fatigued?', 'Do you have enough sleep?', 'Any difficulty performing daily activities?'],
+    'chest_pain': ['How would you describe the pain? (sharp, dull, pressure)', 'Does the pain spread to other areas?', 'Does the pain worsen with movement or breathing?'],
+    'shortness_of_breath': ['Do you feel breathless at rest or during activity?', 'Do you have any wheezing?', 'Any history of asthma or heart conditions?'],
+    'abdominal_pain': ['Where is the pain located?', 'Does the pain radiate anywhere?', 'Any associated nausea or vomiting?'],
+    'diarrhea': ['How many times per day?', 'Any blood in the stool?', 'Any recent food changes?'],
+    'rash': ['Where did the rash start?', 'Is it spreading?', 'Any itching or pain?'],
+    'joint_pain': ['Which joints are affected?', 'Is the joint swollen or red?', 'Any morning stiffness?'],
+    'dizziness': ['Do you feel dizzy when standing up?', 'Any associated nausea?', 'Any hearing changes?'],
+    'nausea': ['Any vomiting?', 'Any specific triggers?', 'Any abdominal pain?'],
+}
+
+GENERAL_FOLLOWUP_QUESTIONS = [
+    'How long have you been experiencing these symptoms?',
+    'Have you taken any medication for these symptoms?',
+    'Do you have any known allergies?'
+]
+
 
 def generate_followup_questions(symptoms, disease=None):
     """
@@ -385,34 +596,14 @@ def generate_followup_questions(symptoms, disease=None):
     """
     questions = []
     
-    symptom_questions = {
-        'fever': ['How high is your fever?', 'How long have you had the fever?', 'Does the fever come and go?'],
-        'cough': ['Is your cough dry or productive?', 'Are you coughing up any mucus or blood?', 'How long have you been coughing?'],
-        'headache': ['Where exactly is the pain located?', 'How severe is the headache on a scale of 1-10?', 'Do you have any sensitivity to light or sound?'],
-        'fatigue': ['How long have you been feeling fatigued?', 'Do you have enough sleep?', 'Any difficulty performing daily activities?'],
-        'chest_pain': ['How would you describe the pain? (sharp, dull, pressure)', 'Does the pain spread to other areas?', 'Does the pain worsen with movement or breathing?'],
-        'shortness_of_breath': ['Do you feel breathless at rest or during activity?', 'Do you have any wheezing?', 'Any history of asthma or heart conditions?'],
-        'abdominal_pain': ['Where is the pain located?', 'Does the pain radiate anywhere?', 'Any associated nausea or vomiting?'],
-        'diarrhea': ['How many times per day?', 'Any blood in the stool?', 'Any recent food changes?'],
-        'rash': ['Where did the rash start?', 'Is it spreading?', 'Any itching or pain?'],
-        'joint_pain': ['Which joints are affected?', 'Is the joint swollen or red?', 'Any morning stiffness?'],
-        'dizziness': ['Do you feel dizzy when standing up?', 'Any associated nausea?', 'Any hearing changes?'],
-        'nausea': ['Any vomiting?', 'Any specific triggers?', 'Any abdominal pain?'],
-    }
-    
     for symptom in symptoms[:3]:  # Limit to 3 symptoms
         symptom_key = symptom.lower().replace(' ', '_')
-        if symptom_key in symptom_questions:
-            questions.extend(symptom_questions[symptom_key][:1])  # One question per symptom
+        if symptom_key in FOLLOWUP_QUESTIONS:
+            questions.extend(FOLLOWUP_QUESTIONS[symptom_key][:1])  # One question per symptom
     
     # Add general questions if not enough
     if len(questions) < 3:
-        general_questions = [
-            'How long have you been experiencing these symptoms?',
-            'Have you taken any medication for these symptoms?',
-            'Do you have any known allergies?'
-        ]
-        questions.extend(general_questions[:3-len(questions)])
+        questions.extend(GENERAL_FOLLOWUP_QUESTIONS[:3-len(questions)])
     
     return questions[:3]
 
@@ -450,14 +641,24 @@ def get_feature_importance(symptoms, prediction):
     
     return importance_scores
 
+CONFIDENCE_EXPLANATIONS = {
+    'high': "High confidence - The symptoms strongly match this condition based on our training data.",
+    'medium': "Medium confidence - The symptoms partially match this condition. Consider consulting a doctor.",
+    'low': "Low confidence - The symptoms are not strongly indicative of this condition. Please consult a healthcare professional for proper diagnosis."
+}
+
+
 def get_confidence_explanation(confidence):
     """XAI - Confidence Scoring explanation"""
     if confidence >= 0.8:
-        return "High confidence - The symptoms strongly match this condition based on our training data."
+        return CONFIDENCE_EXPLANATIONS['high']
     elif confidence >= 0.5:
-        return "Medium confidence - The symptoms partially match this condition. Consider consulting a doctor."
+        return CONFIDENCE_EXPLANATIONS['medium']
     else:
-        return "Low confidence - The symptoms are not strongly indicative of this condition. Please consult a healthcare professional for proper diagnosis."
+        return CONFIDENCE_EXPLANATIONS['low']
+
+URGENT_WARNING = "URGENT: This may be a medical emergency. Please seek immediate medical attention or call emergency services."
+
 
 def detect_urgent_case(disease, symptoms):
     """Doctor & Specialist - Urgent case detection"""
@@ -481,11 +682,39 @@ def detect_urgent_case(disease, symptoms):
     
     urgent_warning = ""
     if is_urgent:
-        urgent_warning = "URGENT: This may be a medical emergency. Please seek immediate medical attention or call emergency services."
+        urgent_warning = URGENT_WARNING
     
     return is_urgent, urgent_warning
 
 
+TRIAGE_REASONS = {
+    'red_flag': "Red-flag symptoms detected.",
+    'urgent': "Urgent pattern detected by emergency rules.",
+    'high_confidence': "High-confidence pattern match.",
+    'low_confidence': "Low-confidence diagnosis needs clinician review.",
+    'many_symptoms': "Multiple concurrent symptoms reported.",
+    'severe_disease': "Potentially severe disease category identified."
+}
+
+TRIAGE_ACTIONS = {
+    'critical': [
+        "Seek immediate emergency care or call local emergency services.",
+        "Do not self-medicate without professional guidance.",
+        "Share this report with the attending clinician."
+    ],
+    'priority': [
+        "Book a doctor visit within 24 hours.",
+        "Track symptom progression every 4-6 hours.",
+        "Complete recommended specialist tests soon."
+    ],
+    'routine': [
+        "Continue monitoring symptoms daily.",
+        "Follow hydration, rest, and self-care guidance.",
+        "Consult a doctor if symptoms worsen or persist."
+    ]
+}
+
+
 def assess_triage(symptoms, disease, confidence, is_urgent):
     """Compute triage score, level, and reasons for decision support."""
     score = 0
@@ -501,27 +730,27 @@ def assess_triage(symptoms, disease, confidence, is_urgent):
     ]
     if any(flag in symptom_text for flag in red_flag_terms):
         score += 35
-        reasons.append("Red-flag symptoms detected.")
+        reasons.append(TRIAGE_REASONS['red_flag'])
 
     if is_urgent:
         score += 30
-        reasons.append("Urgent pattern detected by emergency rules.")
+        reasons.append(TRIAGE_REASONS['urgent'])
 
     if confidence >= 0.8:
         score += 10
-        reasons.append("High-confidence pattern match.")
+        reasons.append(TRIAGE_REASONS['high_confidence'])
     elif confidence < 0.45:
         score += 12
-        reasons.append("Low-confidence diagnosis needs clinician review.")
+        reasons.append(TRIAGE_REASONS['low_confidence'])
 
     if len(symptoms or []) >= 5:
         score += 10
-        reasons.append("Multiple concurrent symptoms reported.")
+        reasons.append(TRIAGE_REASONS['many_symptoms'])
 
     severe_disease_terms = ['heart attack', 'stroke', 'pneumonia', 'dengue', 'tuberculosis']
     if any(term in disease_text for term in severe_disease_terms):
         score += 18
-        reasons.append("Potentially severe disease category identified.")
+        reasons.append(TRIAGE_REASONS['severe_disease'])
 
     score = int(max(0, min(100, score)))
     if score >= 70:
@@ -531,251 +760,219 @@ def assess_triage(symptoms, disease, confidence, is_urgent):
     else:
         level = 'routine'
 
-    actions = {
-        'critical': [
-            "Seek immediate emergency care or call local emergency services.",
-            "Do not self-medicate without professional guidance.",
-            "Share this report with the attending clinician."
-        ],
-        'priority': [
-            "Book a doctor visit within 24 hours.",
-            "Track symptom progression every 4-6 hours.",
-            "Complete recommended specialist tests soon."
-        ],
-        'routine': [
-            "Continue monitoring symptoms daily.",
-            "Follow hydration, rest, and self-care guidance.",
-            "Consult a doctor if symptoms worsen or persist."
-        ]
-    }
-
     return {
         'score': score,
         'level': level,
         'reasons': reasons[:4],
-        'recommended_actions': actions[level]
+        'recommended_actions': list(TRIAGE_ACTIONS[level])
     }
 
 
+CARE_PLAN_TEXT = {
+    'followup_critical': "Clinical follow-up: Consult a healthcare professional immediately.",
+    'followup_priority': "Clinical follow-up: Consult a healthcare professional within 24 hours.",
+    'followup_routine': "Clinical follow-up: Consult a healthcare professional within 48 hours.",
+    'low_confidence': "Diagnosis confidence is moderate/low; request confirmatory clinical evaluation.",
+    'sleep': "Sleep optimization: target 7-8 hours nightly for recovery support.",
+    'medication_active': "Medication adherence: continue logged medications as prescribed and update changes daily.",
+    'medication_empty': "Medication tracker is empty. Log prescribed medicines to improve care continuity.",
+    'symptom_burden': "Symptom burden is high. Keep a timed symptom diary (morning/evening).",
+    'escalation': "Escalation rule: seek urgent care if breathing worsens, chest pain starts, or consciousness changes."
+}
+
+
 def build_care_plan(patient_id, disease, symptoms, confidence, triage):
     """Generate personalized next-step care plan using patient context."""
     plan = []
-    followup_window = "within 48 hours"
     if triage['level'] == 'critical':
-        followup_window = "immediately"
+        plan.append(CARE_PLAN_TEXT['followup_critical'])
     elif triage['level'] == 'priority':
-        followup_window = "within 24 hours"
-
-    plan.append(f"Clinical follow-up: Consult a healthcare professional {followup_window}.")
+        plan.append(CARE_PLAN_TEXT['followup_priority'])
+    else:
+        plan.append(CARE_PLAN_TEXT['followup_routine'])
 
     if confidence < 0.5:
-        plan.append("Diagnosis confidence is moderate/low; request confirmatory clinical evaluation.")
+        plan.append(CARE_PLAN_TEXT['low_confidence'])
 
-    sleep_logs = sorted(get_sleep_logs(patient_id), key=lambda x: x.get('timestamp', 0), reverse=True)[:7]
-    if sleep_logs:
-        avg_sleep = float(np.mean([entry.get('hours', 0) for entry in sleep_logs]))
+    hashed_id = hash_patient_id(patient_id)
+    sleep_week = sleep_store.summary(hashed_id)['windows']['week']
+    if sleep_week['count']:
+        avg_sleep = sleep_week['means']['hours']
         if avg_sleep < 6:
-            plan.append("Sleep optimization: target 7-8 hours nightly for recovery support.")
+            plan.append(CARE_PLAN_TEXT['sleep'])
 
-    meds = sorted(get_medication_logs(patient_id), key=lambda x: x.get('timestamp', 0), reverse=True)[:10]
-    if meds:
-        plan.append("Medication adherence: continue logged medications as prescribed and update changes daily.")
+    if medication_store.summary(hashed_id)['count']:
+        plan.append(CARE_PLAN_TEXT['medication_active'])
     else:
-        plan.append("Medication tracker is empty. Log prescribed medicines to improve care continuity.")
+        plan.append(CARE_PLAN_TEXT['medication_empty'])
 
     symptom_count = len(symptoms or [])
     if symptom_count >= 4:
-        plan.append("Symptom burden is high. Keep a timed symptom diary (morning/evening).")
+        plan.append(CARE_PLAN_TEXT['symptom_burden'])
 
-    plan.append("Escalation rule: seek urgent care if breathing worsens, chest pain starts, or consciousness changes.")
+    plan.append(CARE_PLAN_TEXT['escalation'])
 
     return plan[:5]
 
+SPECIALIST_MAP = {
+    'cardiovascular': {
+        'diseases': ['heart attack', 'hypertension', 'irregular heartbeat', 'heart failure'],
+        'specialist': 'Cardiologist',
+        'tests': ['ECG', 'Echocardiogram', 'Blood Pressure Monitoring', 'Cholesterol Test'],
+        'preparation': 'Avoid caffeine 24 hours before, bring list of medications'
+    },
+    'respiratory': {
+        'diseases': ['pneumonia', 'bronchial asthma', 'bronchitis', 'tuberculosis', 'cough'],
+        'specialist': 'Pulmonologist',
+        'tests': ['Chest X-Ray', 'Spirometry', 'CT Scan', 'Blood Tests'],
+        'preparation': 'Avoid smoking 24 hours before, bring previous X-rays if available'
+    },
+    'gastrointestinal': {
+        'diseases': ['gastroenteritis', 'peptic ulcer', 'gerd', 'jaundice', 'hepatitis'],
+        'specialist': 'Gastroenterologist',
+        'tests': ['Endoscopy', 'Colonoscopy', 'Liver Function Tests', 'Stool Analysis'],
+        'preparation': 'Fast 8-12 hours before, follow specific diet instructions'
+    },
+    'neurological': {
+        'diseases': ['migraine', 'headache', 'seizures', 'paralysis', 'brain hemorrhage'],
+        'specialist': 'Neurologist',
+        'tests': ['MRI', 'CT Scan', 'EEG', 'Neurological Examination'],
+        'preparation': 'Avoid caffeine, remove metal objects, inform about medications'
+    },
+    'dermatological': {
+        'diseases': ['acne', 'rash', 'psoriasis', 'eczema', 'fungal infection'],
+        'specialist': 'Dermatologist',
+        'tests': ['Skin Biopsy', 'Patch Test', 'Wood Lamp Examination', 'Blood Tests'],
+        'preparation': "Don't apply creams before appointment, bring photos of progression"
+    },
+    'orthopedic': {
+        'diseases': ['arthritis', 'osteoarthritis', 'back pain', 'joint pain', 'fractures'],
+        'specialist': 'Orthopedic Surgeon',
+        'tests': ['X-Ray', 'MRI', 'Joint Fluid Analysis', 'Bone Density Test'],
+        'preparation': 'Wear comfortable clothing, bring previous X-rays'
+    },
+    'endocrinological': {
+        'diseases': ['diabetes', 'hypothyroidism', 'hyperthyroidism', 'thyroid'],
+        'specialist': 'Endocrinologist',
+        'tests': ['Blood Sugar Test', 'Thyroid Function Tests', 'HbA1c', 'Hormone Tests'],
+        'preparation': 'Fast 8-12 hours for blood sugar, bring glucose monitor records'
+    },
+    'infectious': {
+        'diseases': ['dengue', 'malaria', 'typhoid', 'chickenpox', 'aids', 'hepatitis'],
+        'specialist': 'Infectious Disease Specialist',
+        'tests': ['Blood Culture', 'Widal Test', 'HIV Test', 'Malaria Rapid Test'],
+        'preparation': 'Bring travel history, list of vaccinations'
+    },
+    'general': {
+        'diseases': ['common cold', 'flu', 'fever', 'allergy'],
+        'specialist': 'General Physician',
+        'tests': ['General Blood Test', 'Physical Examination'],
+        'preparation': 'List all symptoms and their duration'
+    }
+}
+
+
 def get_specialist_recommendation(disease):
     """Doctor & Specialist - Recommend specialists based on predicted disease"""
-    specialist_map = {
-        'cardiovascular': {
-            'diseases': ['heart attack', 'hypertension', 'irregular heartbeat', 'heart failure'],
-            'specialist': 'Cardiologist',
-            'tests': ['ECG', 'Echocardiogram', 'Blood Pressure Monitoring', 'Cholesterol Test'],
-            'preparation': 'Avoid caffeine 24 hours before, bring list of medications'
-        },
-        'respiratory': {
-            'diseases': ['pneumonia', 'bronchial asthma', 'bronchitis', 'tuberculosis', 'cough'],
-            'specialist': 'Pulmonologist',
-            'tests': ['Chest X-Ray', 'Spirometry', 'CT Scan', 'Blood Tests'],
-            'preparation': 'Avoid smoking 24 hours before, bring previous X-rays if available'
-        },
-        'gastrointestinal': {
-            'diseases': ['gastroenteritis', 'peptic ulcer', 'gerd', 'jaundice', 'hepatitis'],
-            'specialist': 'Gastroenterologist',
-            'tests': ['Endoscopy', 'Colonoscopy', 'Liver Function Tests', 'Stool Analysis'],
-            'preparation': 'Fast 8-12 hours before, follow specific diet instructions'
-        },
-        'neurological': {
-            'diseases': ['migraine', 'headache', 'seizures', 'paralysis', 'brain hemorrhage'],
-            'specialist': 'Neurologist',
-            'tests': ['MRI', 'CT Scan', 'EEG', 'Neurological Examination'],
-            'preparation': 'Avoid caffeine, remove metal objects, inform about medications'
-        },
-        'dermatological': {
-            'diseases': ['acne', 'rash', 'psoriasis', 'eczema', 'fungal infection'],
-            'specialist': 'Dermatologist',
-            'tests': ['Skin Biopsy', 'Patch Test', 'Wood Lamp Examination', 'Blood Tests'],
-            'preparation': "Don't apply creams before appointment, bring photos of progression"
-        },
-        'orthopedic': {
-            'diseases': ['arthritis', 'osteoarthritis', 'back pain', 'joint pain', 'fractures'],
-            'specialist': 'Orthopedic Surgeon',
-            'tests': ['X-Ray', 'MRI', 'Joint Fluid Analysis', 'Bone Density Test'],
-            'preparation': 'Wear comfortable clothing, bring previous X-rays'
-        },
-        'endocrinological': {
-            'diseases': ['diabetes', 'hypothyroidism', 'hyperthyroidism', 'thyroid'],
-            'specialist': 'Endocrinologist',
-            'tests': ['Blood Sugar Test', 'Thyroid Function Tests', 'HbA1c', 'Hormone Tests'],
-            'preparation': 'Fast 8-12 hours for blood sugar, bring glucose monitor records'
-        },
-        'infectious': {
-            'diseases': ['dengue', 'malaria', 'typhoid', 'chickenpox', 'aids', 'hepatitis'],
-            'specialist': 'Infectious Disease Specialist',
-            'tests': ['Blood Culture', 'Widal Test', 'HIV Test', 'Malaria Rapid Test'],
-            'preparation': 'Bring travel history, list of vaccinations'
-        },
-        'general': {
-            'diseases': ['common cold', 'flu', 'fever', 'allergy'],
-            'specialist': 'General Physician',
-            'tests': ['General Blood Test', 'Physical Examination'],
-            'preparation': 'List all symptoms and their duration'
-        }
-    }
-    
     disease_lower = disease.lower() if disease else ''
     
-    for category, info in specialist_map.items():
+    # Copies, since payload translation edits the returned dict in place
+    for category, info in SPECIALIST_MAP.items():
         if any(d in disease_lower for d in info['diseases']):
-            return info
+            return copy.deepcopy(info)
     
     # Default to general physician
-    return specialist_map['general']
+    return copy.deepcopy(SPECIALIST_MAP['general'])
 
 # Anonymized patient tracking (file-based)
 def hash_patient_id(patient_id):
     """Security - Hash patient ID for anonymity"""
     return hashlib.sha256(patient_id.encode()).hexdigest()[:16]
 
+# Append-only per-patient logs (legacy whole-file JSON is imported on first use).
+# Rolling windows feed trends and care plans without rescanning the logs.
+history_store = PatientLogStore(
+    'patient_history.jsonl', legacy_path='patient_history.json',
+    windows={'recent': (10, ('confidence', 'is_urgent'))}
+)
+medication_store = PatientLogStore(
+    'medication_history.jsonl', legacy_path='medication_history.json',
+    windows={'recent': (8, ())}
+)
+sleep_store = PatientLogStore(
+    'sleep_history.jsonl', legacy_path='sleep_history.json',
+    windows={'week': (7, ('hours',)), 'fortnight': (14, ('hours', 'quality'))}
+)
+
+
 def save_patient_history(patient_id, prediction_data):
     """Patient Profiles - Save prediction history"""
-    history_file = 'patient_history.json'
-    hashed_id = hash_patient_id(patient_id)
-    
     try:
-        if os.path.exists(history_file):
-            with open(history_file, 'r', encoding='utf-8') as f:
-                history = json.load(f)
-        else:
-            history = {}
-        
-        if hashed_id not in history:
-            history[hashed_id] = []
-        
-        history[hashed_id].append(prediction_data)
-        
-        with open(history_file, 'w', encoding='utf-8') as f:
-            json.dump(history, f, indent=2)
+        history_store.append(hash_patient_id(patient_id), prediction_data)
     except Exception as e:
         print(f"Error saving history: {e}")
 
 def get_patient_history(patient_id):
     """Patient Profiles - Get prediction history"""
-    history_file = 'patient_history.json'
-    hashed_id = hash_patient_id(patient_id)
-    
     try:
-        if os.path.exists(history_file):
-            with open(history_file, 'r', encoding='utf-8') as f:
-                history = json.load(f)
-            return history.get(hashed_id, [])
+        return history_store.get(hash_patient_id(patient_id))
     except Exception as e:
         print(f"Error reading history: {e}")
     
     return []
 
 
-def _load_json(path):
+def save_medication_log(patient_id, record):
+    """Store patient medication logs."""
     try:
-        if os.path.exists(path):
-            with open(path, 'r', encoding='utf-8') as f:
-                return json.load(f)
+        medication_store.append(hash_patient_id(patient_id), record)
     except Exception as e:
-        print(f"Error loading {path}: {e}")
-    return {}
+        print(f"Error saving medication log: {e}")
 
 
-def _save_json(path, data):
+def get_medication_logs(patient_id):
     try:
-        with open(path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2)
-        return True
+        return medication_store.get(hash_patient_id(patient_id))
     except Exception as e:
-        print(f"Error saving {path}: {e}")
-        return False
-
-
-def save_medication_log(patient_id, record):
-    """Store patient medication logs."""
-    file_path = 'medication_history.json'
-    hashed_id = hash_patient_id(patient_id)
-    data = _load_json(file_path)
-    data.setdefault(hashed_id, []).append(record)
-    _save_json(file_path, data)
-
-
-def get_medication_logs(patient_id):
-    file_path = 'medication_history.json'
-    hashed_id = hash_patient_id(patient_id)
-    data = _load_json(file_path)
-    return data.get(hashed_id, [])
+        print(f"Error reading medication logs: {e}")
+    return []
 
 
 def save_sleep_log(patient_id, record):
     """Store patient sleep tracking logs."""
-    file_path = 'sleep_history.json'
-    hashed_id = hash_patient_id(patient_id)
-    data = _load_json(file_path)
-    data.setdefault(hashed_id, []).append(record)
-    _save_json(file_path, data)
+    try:
+        sleep_store.append(hash_patient_id(patient_id), record)
+    except Exception as e:
+        print(f"Error saving sleep log: {e}")
 
 
 def get_sleep_logs(patient_id):
-    file_path = 'sleep_history.json'
-    hashed_id = hash_patient_id(patient_id)
-    data = _load_json(file_path)
-    return data.get(hashed_id, [])
+    try:
+        return sleep_store.get(hash_patient_id(patient_id))
+    except Exception as e:
+        print(f"Error reading sleep logs: {e}")
+    return []
 
 
 def build_trends_summary(patient_id):
     """Build patient analytics summary for hackathon dashboard."""
-    history = get_patient_history(patient_id)
-    medications = get_medication_logs(patient_id)
-    sleep_logs = get_sleep_logs(patient_id)
-
-    recent_history = sorted(history, key=lambda x: x.get('timestamp', 0), reverse=True)[:10]
-    recent_sleep = sorted(sleep_logs, key=lambda x: x.get('timestamp', 0), reverse=True)[:14]
+    hashed_id = hash_patient_id(patient_id)
+    history_summary = history_store.summary(hashed_id)
+    medication_summary = medication_store.summary(hashed_id)
+    sleep_summary = sleep_store.summary(hashed_id)
 
-    avg_confidence = 0.0
-    if recent_history:
-        avg_confidence = float(np.mean([item.get('confidence', 0.0) for item in recent_history]))
+    history_window = history_summary['windows']['recent']
+    sleep_window = sleep_summary['windows']['fortnight']
+    recent_history = history_window['recent']
+    recent_sleep = sleep_window['recent']
 
-    urgent_count = sum(1 for item in recent_history if item.get('is_urgent', False))
+    avg_confidence = float(history_window['means']['confidence'])
+    urgent_count = int(round(history_window['totals']['is_urgent']))
 
-    avg_sleep_hours = 0.0
-    avg_sleep_quality = 0.0
-    if recent_sleep:
-        avg_sleep_hours = float(np.mean([item.get('hours', 0.0) for item in recent_sleep]))
-        avg_sleep_quality = float(np.mean([item.get('quality', 0.0) for item in recent_sleep]))
+    avg_sleep_hours = float(sleep_window['means']['hours'])
+    avg_sleep_quality = float(sleep_window['means']['quality'])
 
-    latest_medications = sorted(medications, key=lambda x: x.get('timestamp', 0), reverse=True)[:8]
+    latest_medications = medication_summary['windows']['recent']['recent']
 
     # A simple wellness score for demo impact (0-100)
     score = 70.0
@@ -821,9 +1018,9 @@ def build_trends_summary(patient_id):
     return {
         'wellness_score': wellness_score,
         'risk_bucket': risk_bucket,
-        'prediction_count': len(history),
-        'medication_count': len(medications),
-        'sleep_log_count': len(sleep_logs),
+        'prediction_count': history_summary['count'],
+        'medication_count': medication_summary['count'],
+        'sleep_log_count': sleep_summary['count'],
         'avg_confidence': round(avg_confidence, 3),
         'avg_sleep_hours': round(avg_sleep_hours, 2),
         'avg_sleep_quality': round(avg_sleep_quality, 2),
@@ -1039,124 +1236,183 @@ disease_info = {
     }
 }
 
+DEFAULT_DISEASE_INFO = {
+    "description": "No description available",
+    "treatment": "Consult a healthcare professional",
+    "self_care": "Rest and monitor symptoms"
+}
+
 class SymptomPredictor:
-    def __init__(self, data_path, artifact_path, force_retrain=False):
+    name = 'multinomial_nb'
+    _generations = itertools.count(1)
+
+    def __init__(self, data_path, artifact_dir, legacy_artifact_path=None, force_retrain=False,
+                 version=None, allow_training=True):
         """Initialize model from artifact (fast) or fallback to training."""
         self.data_path = data_path
-        self.artifact_path = artifact_path
+        self.artifact_dir = artifact_dir
+        # Old pickled artifacts are only ever read once, to convert them
+        self.legacy_artifact_path = legacy_artifact_path
+        # Registry versions are loaded as published, never retrained in place
+        self.allow_training = allow_training
+        self.version = version
+        self.loaded_at = None
+        self.source_sha256 = None
         self.model = None
         self.all_symptoms = []
         self.symptom_index = {}
         self.symptom_set = set()
+        self.engine = None
+        self.generation = None
+        self.reload(force_retrain=force_retrain)
+
+    def reload(self, force_retrain=False):
+        """(Re)load the artifact, retraining when missing or stale."""
+        if force_retrain or not self._load_artifact():
+            if not self.allow_training:
+                raise RuntimeError(f"Model artifact at {self.artifact_dir} could not be loaded")
+            if force_retrain or not self._import_legacy_artifact():
+                self._train_from_csv()
+            if self._save_artifact():
+                # Serve from the shared memory map like every other worker
+                self._load_artifact()
+
+        # Caches tagged with an older generation drop their entries on next use
+        self.generation = next(self._generations)
+        self.loaded_at = int(time.time())
+
+    def _set_symptoms(self, symptoms):
+        self.all_symptoms = list(symptoms)
+        self.symptom_index = {symptom: idx for idx, symptom in enumerate(self.all_symptoms)}
+        self.symptom_set = set(self.all_symptoms)
 
-        if not force_retrain and self._load_artifact():
-            return
+    def _source_mtime(self):
+        return int(os.path.getmtime(self.data_path)) if os.path.exists(self.data_path) else None
 
-        self._train_from_csv()
-        self._save_artifact()
+    def _is_stale(self, source_mtime, source_sha256=None):
+        current_mtime = self._source_mtime()
+        if not (current_mtime and source_mtime and current_mtime > source_mtime):
+            return False
+        # A newer mtime with identical content (checkout, copy) needs no retraining
+        return not source_sha256 or file_sha256(self.data_path) != source_sha256
 
     def _train_from_csv(self):
-        if not os.path.exists(self.data_path):
-            raise FileNotFoundError(f"Training data not found at: {self.data_path}")
-
-        df = pd.read_csv(self.data_path)
-        df = df.loc[:, ~df.columns.str.contains('^Unnamed')]
-        self.all_symptoms = [col for col in df.columns if col != 'prognosis']
-        X = df[self.all_symptoms]
-        y = df['prognosis']
+        # uint8 symptom matrix, from the hash-keyed sidecar cache when the CSV is unchanged
+        data = load_training_data(self.data_path)
+        self.source_sha256 = data.source_sha256
 
         self.model = MultinomialNB()
-        self.model.fit(X, y)
+        self.model.fit(data.X, data.y)
 
-        self.symptom_index = {symptom: idx for idx, symptom in enumerate(self.all_symptoms)}
-        self.symptom_set = set(self.all_symptoms)
+        self._set_symptoms(data.symptoms)
+        # NumPy log-probability scorer used on the request path
+        self.engine = NaiveBayesEngine.from_model(self.model)
         print(f"Model trained from CSV with {len(self.all_symptoms)} symptoms")
 
     def _load_artifact(self):
-        """Load serialized model artifact if valid and up to date."""
-        if not os.path.exists(self.artifact_path):
+        """Memory-map the NumPy artifact if valid and up to date."""
+        if not os.path.exists(os.path.join(self.artifact_dir, MANIFEST_NAME)):
+            return False
+
+        try:
+            manifest, arrays = load_artifact(self.artifact_dir)
+            if self._is_stale(manifest.get('source_mtime'), manifest.get('source_sha256')):
+                print("Model artifact is stale. Re-training from CSV...")
+                return False
+
+            self.engine = NaiveBayesEngine.from_arrays(
+                manifest['classes'], arrays['feature_log_prob_t'], arrays['class_log_prior']
+            )
+            self._set_symptoms(manifest['symptoms'])
+            print(f"Model loaded from artifact with {len(self.all_symptoms)} symptoms")
+            return True
+        except Exception as e:
+            print(f"Artifact load failed, falling back to training: {str(e)}")
+            return False
+
+    def _import_legacy_artifact(self):
+        """Read a pickled artifact from older releases so it can be converted."""
+        if not self.legacy_artifact_path or not os.path.exists(self.legacy_artifact_path):
             return False
 
         try:
-            with open(self.artifact_path, 'rb') as f:
+            with open(self.legacy_artifact_path, 'rb') as f:
                 payload = pickle.load(f)
 
             model = payload.get('model')
             symptoms = payload.get('all_symptoms')
-            source_mtime = payload.get('source_mtime')
-
             if model is None or not symptoms:
                 return False
-
-            current_mtime = int(os.path.getmtime(self.data_path)) if os.path.exists(self.data_path) else None
-            if current_mtime and source_mtime and current_mtime > source_mtime:
-                print("Model artifact is stale. Re-training from CSV...")
+            if self._is_stale(payload.get('source_mtime')):
+                print("Legacy model artifact is stale. Re-training from CSV...")
                 return False
 
             self.model = model
-            self.all_symptoms = list(symptoms)
-            self.symptom_index = {symptom: idx for idx, symptom in enumerate(self.all_symptoms)}
-            self.symptom_set = set(self.all_symptoms)
-            print(f"Model loaded from artifact with {len(self.all_symptoms)} symptoms")
+            self._set_symptoms(symptoms)
+            self.engine = NaiveBayesEngine.from_model(self.model)
+            print(f"Imported legacy pickle artifact {self.legacy_artifact_path}")
             return True
         except Exception as e:
-            print(f"Artifact load failed, falling back to training: {str(e)}")
+            print(f"Legacy artifact import failed: {str(e)}")
             return False
 
     def _save_artifact(self):
-        """Persist trained model to disk for fast startup."""
+        """Persist the scorer's arrays to disk for fast, shared startup."""
         try:
-            artifact_dir = os.path.dirname(self.artifact_path)
-            if artifact_dir:
-                os.makedirs(artifact_dir, exist_ok=True)
-
-            payload = {
-                'model': self.model,
-                'all_symptoms': self.all_symptoms,
-                'source_path': os.path.abspath(self.data_path),
-                'source_mtime': int(os.path.getmtime(self.data_path)) if os.path.exists(self.data_path) else None,
-                'created_at': int(time.time())
-            }
-
-            with open(self.artifact_path, 'wb') as f:
-                pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
-            print(f"Model artifact saved to {self.artifact_path}")
+            save_artifact(
+                self.artifact_dir,
+                classes=self.engine.classes,
+                symptoms=self.all_symptoms,
+                feature_log_prob_t=self.engine.feature_log_prob_t,
+                class_log_prior=self.engine.class_log_prior,
+                # Counts are only known right after fitting; they enable incremental updates
+                feature_count=getattr(self.model, 'feature_count_', None),
+                class_count=getattr(self.model, 'class_count_', None),
+                metadata={
+                    'source_path': os.path.abspath(self.data_path),
+                    'source_mtime': self._source_mtime(),
+                    'source_sha256': self.source_sha256,
+                    'created_at': int(time.time())
+                }
+            )
+            print(f"Model artifact saved to {self.artifact_dir}")
+            return True
         except Exception as e:
             print(f"Warning: failed to save artifact: {str(e)}")
+            return False
 
     def predict(self, symptoms):
         """Predict disease from symptoms with additional info"""
         try:
-            symptom_vector = np.zeros(len(self.all_symptoms))
+            symptom_indices = []
             valid_symptoms = []
             
             for symptom in symptoms:
                 idx = self.symptom_index.get(symptom)
-                if idx is not None:
-                    symptom_vector[idx] = 1
+                if idx is not None and idx not in symptom_indices:
+                    symptom_indices.append(idx)
                     valid_symptoms.append(symptom)
             
             if not valid_symptoms:
                 return {'error': 'No valid symptoms provided'}
             
-            input_df = pd.DataFrame([symptom_vector], columns=self.all_symptoms)
-            probas = self.model.predict_proba(input_df)[0]
+            probas = self.engine.predict_proba(symptom_indices)
             max_idx = np.argmax(probas)
-            disease = self.model.classes_[max_idx]
+            disease = self.engine.classes[max_idx]
             
             
             disease_key = disease.lower().strip()
             disease_key = disease_key.split('(')[0].strip()  
             
-            info = disease_info.get(disease_key, {})
+            info = disease_info.get(disease_key, DEFAULT_DISEASE_INFO)
             
             return {
                 'disease': disease,
                 'confidence': float(probas[max_idx]),
                 'symptoms_used': valid_symptoms,
-                'description': info.get('description', 'No description available'),
-                'treatment': info.get('treatment', 'Consult a healthcare professional'),
-                'self_care': info.get('self_care', 'Rest and monitor symptoms')
+                'description': info.get('description', DEFAULT_DISEASE_INFO['description']),
+                'treatment': info.get('treatment', DEFAULT_DISEASE_INFO['treatment']),
+                'self_care': info.get('self_care', DEFAULT_DISEASE_INFO['self_care'])
             }
             
         except Exception as e:
@@ -1167,25 +1423,327 @@ def get_data_path():
     return os.path.join(base_dir, 'data', 'Training.csv')
 
 def get_model_artifact_path():
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(base_dir, 'model_artifacts', 'symptom_model')
+
+def get_legacy_model_artifact_path():
     base_dir = os.path.dirname(os.path.abspath(__file__))
     return os.path.join(base_dir, 'model_artifacts', 'symptom_model.pkl')
 
-predictor = SymptomPredictor(get_data_path(), get_model_artifact_path())
+def static_translation_catalogue():
+    """Every fixed English string translate_prediction_payload can emit."""
+    texts = [str(disease) for disease in predictor.engine.classes]
+    for info in list(disease_info.values()) + [DEFAULT_DISEASE_INFO]:
+        texts.extend(info.values())
+    for info in SPECIALIST_MAP.values():
+        texts.append(info['specialist'])
+        texts.append(info['preparation'])
+        texts.extend(info['tests'])
+    for actions in TRIAGE_ACTIONS.values():
+        texts.extend(actions)
+    texts.extend(TRIAGE_ACTIONS.keys())
+    texts.extend(TRIAGE_REASONS.values())
+    for questions in FOLLOWUP_QUESTIONS.values():
+        texts.extend(questions)
+    texts.extend(GENERAL_FOLLOWUP_QUESTIONS)
+    texts.extend(CONFIDENCE_EXPLANATIONS.values())
+    texts.extend(CARE_PLAN_TEXT.values())
+    texts.append(URGENT_WARNING)
+    return sorted(set(texts))
+
+
+def load_initial_predictor():
+    """Boot from the registry's active version, else from the local artifact (version 'local').
+
+    Importing the app never writes to the registry; versions are registered
+    explicitly, e.g. `python train_models.py nb --publish --activate` or
+    `python model_registry.py publish model_artifacts/symptom_model --activate`.
+    """
+    active = model_registry.current_version()
+    if active:
+        try:
+            return SymptomPredictor(get_data_path(), model_registry.path(active), version=active, allow_training=False)
+        except Exception as e:
+            print(f"Registered model {active} unusable, falling back to local artifact: {str(e)}")
+
+    return SymptomPredictor(get_data_path(), get_model_artifact_path(), get_legacy_model_artifact_path(), version='local')
+
+def validate_candidate(candidate, current):
+    """Holdout report for a candidate model; raises ValueError if it must not go live."""
+    if candidate.all_symptoms != current.all_symptoms:
+        # Alias map, matcher and autocomplete are built for the booted vocabulary
+        raise ValueError("Candidate uses a different symptom vocabulary; restart to adopt it")
+
+    probe = candidate.engine.predict_proba(list(range(min(3, len(candidate.all_symptoms)))))
+    if not np.all(np.isfinite(probe)) or abs(float(probe.sum()) - 1.0) > 1e-6:
+        raise ValueError("Candidate produced invalid probabilities")
+
+    # Never skipped: with no holdout set at all, load_holdout raises and the reload is refused
+    holdout, source = load_holdout(MODEL_HOLDOUT_PATH, get_data_path())
+    print(f"Validating model {candidate.version} on {source}")
+    candidate_score = evaluate_holdout(candidate.engine, candidate.all_symptoms, holdout)
+    current_score = evaluate_holdout(current.engine, current.all_symptoms, holdout)
+    report = {
+        'holdout': source,
+        'rows': candidate_score['rows'],
+        'accuracy': candidate_score['accuracy'],
+        'baseline_accuracy': current_score['accuracy']
+    }
+    if candidate_score['accuracy'] < MODEL_MIN_ACCURACY:
+        raise ValueError(f"Holdout accuracy {candidate_score['accuracy']} is below {MODEL_MIN_ACCURACY}")
+    if candidate_score['accuracy'] < current_score['accuracy'] - MODEL_MAX_REGRESSION:
+        raise ValueError(
+            f"Holdout accuracy {candidate_score['accuracy']} regresses from {current_score['accuracy']}"
+        )
+    return report
+
+def reload_model(version=None, activate=False):
+    """Load a registry version beside the live model, validate it, then swap it in.
+
+    Requests that already hold the old predictor finish on it; the swap is a
+    single reference assignment.
+    """
+    global predictor
+    with model_reload_lock:
+        version = version or model_registry.current_version()
+        if not version:
+            raise ValueError("No active model version in the registry")
+        current = predictor
+        if version != current.version:
+            candidate = SymptomPredictor(
+                get_data_path(), model_registry.path(version), version=version, allow_training=False
+            )
+            report = validate_candidate(candidate, current)
+            predictor = candidate
+            print(f"Model swapped from {current.version} to {version}")
+        else:
+            report = {}
+        if activate:
+            # Other workers follow the registry pointer
+            model_registry.activate(version)
+
+        model_reload_status.clear()
+        model_reload_status.update(report)
+        model_reload_status.update({
+            'status': 'swapped' if version != current.version else 'unchanged',
+            'version': version,
+            'previous_version': current.version,
+            'finished_at': int(time.time())
+        })
+        return dict(model_reload_status)
+
+def reload_model_safely(version=None, activate=False):
+    try:
+        return reload_model(version, activate=activate)
+    except Exception as e:
+        print(f"Model reload rejected: {str(e)}")
+        with model_reload_lock:
+            model_reload_status.clear()
+            model_reload_status.update({
+                'status': 'rejected',
+                'version': version,
+                'error': str(e),
+                'finished_at': int(time.time())
+            })
+            return dict(model_reload_status)
+
+def watch_model_registry():
+    """Poll the registry pointer and reload when another process activates a version."""
+    rejected = None
+    while True:
+        time.sleep(MODEL_WATCH_INTERVAL)
+        version = model_registry.current_version()
+        if version and version != predictor.version and version != rejected:
+            result = reload_model_safely(version)
+            # Retry a rejected version only once the pointer moves on
+            rejected = version if result['status'] == 'rejected' else None
+
+@app.before_request
+def start_model_watcher():
+    """Start the registry watcher once per worker process (threads do not survive fork)."""
+    global model_watcher_pid
+    if MODEL_WATCH_INTERVAL <= 0 or model_watcher_pid == os.getpid():
+        return
+    with model_reload_lock:
+        if model_watcher_pid != os.getpid():
+            model_watcher_pid = os.getpid()
+            threading.Thread(target=watch_model_registry, name='model-watcher', daemon=True).start()
+
+@app.before_request
+def start_request_timer():
+    metrics.start_exporter()
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    # Route patterns, not raw paths, so patient ids do not become label values
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    metrics.inc('http_requests_total', {'route': route, 'method': request.method, 'status': response.status_code})
+    started = g.get('request_started')
+    if started is not None:
+        metrics.observe('http_request_duration_seconds', (time.perf_counter() - started) * 1000.0, {'route': route})
+    return response
+
+def stage_timer(route, stage):
+    return metrics.timer('stage_duration_seconds', route=route, stage=stage)
+
+predictor = load_initial_predictor()
+
+
+def load_forest_model():
+    if os.path.exists(os.path.join(FOREST_ARTIFACT_PATH, 'manifest.json')):
+        try:
+            return ForestModel.load(FOREST_ARTIFACT_PATH)
+        except Exception as e:
+            print(f"Saved forest at {FOREST_ARTIFACT_PATH} unusable, retraining: {str(e)}")
+    else:
+        print(f"No saved forest at {FOREST_ARTIFACT_PATH}; training one (see train_models.py forest)")
+    return ForestModel.from_predictor(symptom_predictor.SymptomPredictor(get_data_path(), n_jobs=FOREST_N_JOBS))
+
+
+def build_model_router(primary):
+    """Router with the challenger models named by CANARY_MODEL / SHADOW_MODEL, if any."""
+    challengers = {}
+    if 'random_forest' in (CANARY_MODEL, SHADOW_MODEL):
+        try:
+            forest = load_forest_model()
+            if forest.symptom_set != primary.symptom_set:
+                raise ValueError("symptom vocabulary differs from the primary model")
+            challengers[forest.name] = forest
+        except Exception as e:
+            print(f"Challenger model random_forest unavailable: {str(e)}")
+    for name in (CANARY_MODEL, SHADOW_MODEL):
+        if name and name != 'random_forest':
+            print(f"Unknown challenger model '{name}' ignored")
+
+    return ModelRouter(
+        canary=challengers.get(CANARY_MODEL),
+        canary_percent=CANARY_PERCENT,
+        shadow=challengers.get(SHADOW_MODEL),
+        shadow_percent=SHADOW_PERCENT
+    )
+
+model_router = build_model_router(predictor)
 symptom_alias_map = load_symptom_alias_map()
+symptom_matcher = build_symptom_matcher(symptom_alias_map)
+symptom_resolver = SymptomResolver({**{s: s for s in predictor.all_symptoms}, **symptom_alias_map})
+symptom_autocomplete = SymptomAutocomplete(load_symptom_catalog(predictor.all_symptoms),
+                                          popularity_path=SUGGEST_POPULARITY_PATH,
+                                          flush_interval=SUGGEST_POPULARITY_FLUSH)
+static_translations = load_translation_bundle(expected_hash=catalogue_hash(static_translation_catalogue()))
+
+
+def freeze_shared_state():
+    """Move everything built at import into the GC's permanent generation.
+
+    Called in the gunicorn master after --preload, right before workers fork
+    (see gunicorn.conf.py). Workers' collections then never touch, and so
+    never copy, the pages holding the model, alias map and clinical tables.
+    """
+    gc.collect()
+    gc.freeze()
+    return gc.get_freeze_count()
+
+def assess_symptom_set(model, symptoms, top_k=DEFAULT_TOP_K, coverage=None):
+    """Prediction plus the patient-independent clinical context for a symptom set."""
+    symptom_indices = [model.symptom_index[s] for s in symptoms]
+    started = time.perf_counter()
+    probas = model.engine.predict_proba(symptom_indices)
+    elapsed_ms = (time.perf_counter() - started) * 1000.0
+    metrics.observe('stage_duration_seconds', elapsed_ms, {'route': 'predict', 'stage': 'predict_proba'})
+    ranked = rank_classes(probas, top_k=top_k, coverage=coverage, max_k=MAX_TOP_K)
+    max_idx = ranked[0]
+    disease = model.engine.classes[max_idx]
+    confidence = float(probas[max_idx])
+
+    disease_key = disease.lower().strip()
+    disease_key = disease_key.split('(')[0].strip()
+    info = disease_info.get(disease_key, DEFAULT_DISEASE_INFO)
+
+    alternative_diagnoses = []
+    for idx in ranked[1:]:
+        alternative_diagnoses.append({
+            'disease': model.engine.classes[idx],
+            'confidence': float(probas[idx])
+        })
+
+    is_urgent, urgent_warning = detect_urgent_case(disease, symptoms)
+    with stage_timer('predict', 'triage'):
+        triage = assess_triage(symptoms, disease, confidence, is_urgent)
+
+    return {
+        'disease': disease,
+        'disease_key': disease_key,
+        'model_version': model.version,
+        'confidence': confidence,
+        'alternative_diagnoses': alternative_diagnoses,
+        'differential_mass': round(float(probas[ranked].sum()), 6),
+        'description': info.get('description', DEFAULT_DISEASE_INFO['description']),
+        'treatment': info.get('treatment', DEFAULT_DISEASE_INFO['treatment']),
+        'self_care': info.get('self_care', DEFAULT_DISEASE_INFO['self_care']),
+        # XAI - Feature Importance and Confidence Explanation
+        'feature_importance': get_feature_importance(symptoms, disease),
+        'confidence_explanation': get_confidence_explanation(confidence),
+        # Doctor & Specialist - Urgent Case Detection and Specialist Recommendation
+        'is_urgent': is_urgent,
+        'urgent_warning': urgent_warning,
+        'specialist': get_specialist_recommendation(disease),
+        # Smart Follow-up Questions
+        'followup_questions': generate_followup_questions(symptoms, disease),
+        # Clinical triage
+        'triage': triage
+    }
+
+
+def cacheable(response, max_age=300):
+    """Tag a GET response with an ETag and answer 304 when the client's copy matches."""
+    response.add_etag()
+    response.cache_control.public = True
+    response.cache_control.max_age = max_age
+    return response.make_conditional(request)
 
 @app.route('/api/symptoms', methods=['GET'])
 def list_symptoms():
-    return jsonify({
+    return cacheable(jsonify({
         'symptoms': predictor.all_symptoms,
         'count': len(predictor.all_symptoms)
-    })
+    }))
+
+@app.route('/api/symptoms/suggest', methods=['GET'])
+def suggest_symptoms():
+    """Prefix autocomplete over symptom names, aliases and categories, most used first."""
+    query = str(request.args.get('q', '')).strip()[:64]
+    try:
+        limit = max(1, min(int(request.args.get('limit', SUGGEST_DEFAULT_LIMIT)), SUGGEST_MAX_LIMIT))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'limit must be an integer'}), 400
+
+    suggestions = symptom_autocomplete.suggest(query, limit=limit)
+    # Popularity is re-read from the shared table as workers flush, so keep the client-side lifetime short
+    return cacheable(jsonify({'query': query, 'suggestions': suggestions, 'count': len(suggestions)}), max_age=60)
+
+@app.route('/api/symptoms/resolve', methods=['GET'])
+def resolve_symptom():
+    """Ranked canonical-symptom suggestions (with scores) for a possibly misspelled name."""
+    query = str(request.args.get('q', '')).strip()[:64]
+    if not query:
+        return jsonify({'error': 'Missing q parameter'}), 400
+    try:
+        limit = max(1, min(int(request.args.get('limit', 5)), 20))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'limit must be an integer'}), 400
+
+    suggestions = symptom_resolver.suggest(query, limit=limit)
+    return jsonify({'query': query, 'suggestions': suggestions, 'count': len(suggestions)})
 
 @app.route('/api/predict', methods=['POST'])
 def predict_disease():
     try:
         # Rate limiting check
         client_ip = request.remote_addr or 'unknown'
-        if not check_rate_limit(client_ip):
+        with stage_timer('predict', 'rate_limit'):
+            allowed = check_rate_limit(client_ip)
+        if not allowed:
             log_audit('rate_limit_exceeded', {'ip': client_ip})
             return jsonify({'error': 'Rate limit exceeded. Please try again later.'}), 429
         
@@ -1199,13 +1757,18 @@ def predict_disease():
         patient_id = str(data.get('patient_id', 'anonymous'))[:128]
         language = str(data.get('language', 'en-US'))[:16]
         language_label = str(data.get('language_label', 'English'))[:32]
+        try:
+            top_k, coverage = parse_ranking_params(data)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
         # Process symptoms input - use NLP extraction if it's natural language
         symptoms_input = data['symptoms']
         
         if isinstance(symptoms_input, str) and len(symptoms_input.split()) > 3:
             # Natural language input - use NLP extraction
-            extracted_symptoms = extract_symptoms_from_text(symptoms_input)
+            with stage_timer('predict', 'nlp_extraction'):
+                extracted_symptoms = extract_symptoms_from_text(symptoms_input)
             if extracted_symptoms:
                 symptoms = extracted_symptoms
             else:
@@ -1213,62 +1776,59 @@ def predict_disease():
                 symptoms = [canonicalize_symptom(s) for s in symptoms_input.split(',')]
         else:
             # Already structured input
-            if isinstance(symptoms_input, str):
-                symptoms = [canonicalize_symptom(s) for s in symptoms_input.split(',')]
-            else:
-                symptoms = [canonicalize_symptom(s) for s in symptoms_input]
-        
-        # Build binary input vector in model feature order
-        symptom_vector = np.zeros(len(predictor.all_symptoms))
+            with stage_timer('predict', 'canonicalize'):
+                if isinstance(symptoms_input, str):
+                    symptoms = [canonicalize_symptom(s, fuzzy=True) for s in symptoms_input.split(',')]
+                else:
+                    symptoms = [canonicalize_symptom(s, fuzzy=True) for s in symptoms_input]
         
+        # Pin one model for the whole request, even if a reload swaps it meanwhile
+        model = predictor
         valid_symptoms = []
         for symptom in symptoms:
-            idx = predictor.symptom_index.get(symptom)
-            if idx is not None:
-                symptom_vector[idx] = 1
+            if symptom in model.symptom_set and symptom not in valid_symptoms:
                 valid_symptoms.append(symptom)
         
         if not valid_symptoms:
-            return jsonify({'error': 'No valid symptoms provided', 'available_symptoms': predictor.all_symptoms[:20]}), 400
+            return jsonify({'error': 'No valid symptoms provided', 'available_symptoms': model.all_symptoms[:20]}), 400
         
-        # Get prediction
-        input_df = pd.DataFrame([symptom_vector], columns=predictor.all_symptoms)
-        probas = predictor.model.predict_proba(input_df)[0]
-        max_idx = np.argmax(probas)
-        disease = predictor.model.classes_[max_idx]
-        
-        disease_key = disease.lower().strip()
-        disease_key = disease_key.split('(')[0].strip() 
-        info = disease_info.get(disease_key, {})
-        
-        # Get alternative diagnoses
-        top_indices = np.argsort(-probas)[:3]
-        alternative_diagnoses = []
-        for idx in top_indices[1:]:
-            alternative_diagnoses.append({
-                'disease': predictor.model.classes_[idx],
-                'confidence': float(probas[idx])
-            })
-        
-        # XAI - Feature Importance
-        feature_importance = get_feature_importance(valid_symptoms, disease)
-        
-        # XAI - Confidence Explanation
-        confidence = float(probas[max_idx])
-        confidence_explanation = get_confidence_explanation(confidence)
-        
-        # Doctor & Specialist - Urgent Case Detection
-        is_urgent, urgent_warning = detect_urgent_case(disease, valid_symptoms)
-        
-        # Doctor & Specialist - Specialist Recommendation
-        specialist_info = get_specialist_recommendation(disease)
-        
-        # Smart Follow-up Questions
-        followup_questions = generate_followup_questions(valid_symptoms, disease)
+        # Canary traffic is answered by the challenger; the primary still gets compared
+        served = model_router.choose(model, patient_id)
+        model_router.record_served(served)
+
+        # Patient-independent results are shared across requests with the same symptom set
+        cache_key = (served.generation, tuple(sorted(set(valid_symptoms))), top_k, coverage)
+        prediction_cache.sync(model.generation)
+        assessment = prediction_cache.get(cache_key)
+        if assessment is None:
+            started = time.perf_counter()
+            with stage_timer('predict', 'assessment'):
+                assessment = assess_symptom_set(served, list(cache_key[1]), top_k, coverage)
+            # Only real scoring is timed; cache hits are counted separately
+            model_router.record_latency(served, (time.perf_counter() - started) * 1000.0)
+            prediction_cache.put(cache_key, assessment)
+        else:
+            model_router.record_cache_hit(served)
+        model_router.compare_with_primary(model, served, cache_key[1], assessment['disease'])
+        if served is model:
+            model_router.mirror(cache_key[1], assessment['disease'])
+        # Translation mutates nested payload structures in place
+        assessment = copy.deepcopy(assessment)
+        # The cache key is sorted; per-symptom fields follow the patient's input order
+        assessment['feature_importance'] = {
+            s: assessment['feature_importance'][s] for s in valid_symptoms if s in assessment['feature_importance']
+        }
+        assessment['followup_questions'] = generate_followup_questions(valid_symptoms, assessment['disease'])
+
+        disease = assessment['disease']
+        disease_key = assessment['disease_key']
+        confidence = assessment['confidence']
+        is_urgent = assessment['is_urgent']
+        triage = assessment['triage']
 
-        # Clinical triage + personalized care plan
-        triage = assess_triage(valid_symptoms, disease, confidence, is_urgent)
-        care_plan = build_care_plan(patient_id, disease, valid_symptoms, confidence, triage)
+        # Personalized care plan
+        with stage_timer('predict', 'care_plan'):
+            care_plan = build_care_plan(patient_id, disease, valid_symptoms, confidence, triage)
         
         # Save to patient history (if patient_id provided)
         prediction_record = {
@@ -1278,9 +1838,12 @@ def predict_disease():
             'symptoms': valid_symptoms,
             'is_urgent': is_urgent,
             'language': language,
-            'language_label': language_label
+            'language_label': language_label,
+            'model_version': served.version
         }
-        save_patient_history(patient_id, prediction_record)
+        with stage_timer('predict', 'history_write'):
+            save_patient_history(patient_id, prediction_record)
+        symptom_autocomplete.record(valid_symptoms)
         
         log_audit('prediction_made', {'disease': disease, 'confidence': confidence})
         
@@ -1289,25 +1852,28 @@ def predict_disease():
         response_payload = {
             'disease': disease,
             'confidence': confidence,
-            'confidence_explanation': confidence_explanation,
+            'confidence_explanation': assessment['confidence_explanation'],
             'symptoms_used': valid_symptoms,
-            'alternative_diagnoses': alternative_diagnoses,
-            'description': info.get('description', 'No description available'),
-            'treatment': info.get('treatment', 'Consult a healthcare professional'),
-            'self_care': info.get('self_care', 'Rest and monitor symptoms'),
-            'feature_importance': feature_importance,
+            'alternative_diagnoses': assessment['alternative_diagnoses'],
+            'differential_mass': assessment['differential_mass'],
+            'description': assessment['description'],
+            'treatment': assessment['treatment'],
+            'self_care': assessment['self_care'],
+            'feature_importance': assessment['feature_importance'],
             'is_urgent': is_urgent,
-            'urgent_warning': urgent_warning,
+            'urgent_warning': assessment['urgent_warning'],
             'triage': triage,
             'care_plan': care_plan,
-            'specialist': specialist_info,
-            'followup_questions': followup_questions,
+            'specialist': assessment['specialist'],
+            'followup_questions': assessment['followup_questions'],
+            'model_version': assessment['model_version'],
             'language': language,
             'language_label': language_label,
             'timestamp': int(time.time())
         }
 
-        response_payload = translate_prediction_payload(response_payload, language)
+        with stage_timer('predict', 'translation'):
+            response_payload = translate_prediction_payload(response_payload, language)
         return jsonify(response_payload)
     
     except Exception as e:
@@ -1315,6 +1881,109 @@ def predict_disease():
         traceback.print_exc()
         return jsonify({'error': str(e)}), 500
 
+def build_symptom_matrix(model, symptom_lists):
+    """Build one CSR matrix (rows=patients) in model feature order."""
+    rows = []
+    cols = []
+    valid_lists = []
+    for row_idx, symptoms in enumerate(symptom_lists):
+        valid_symptoms = []
+        seen = set()
+        for symptom in symptoms:
+            idx = model.symptom_index.get(symptom)
+            if idx is not None and idx not in seen:
+                seen.add(idx)
+                rows.append(row_idx)
+                cols.append(idx)
+                valid_symptoms.append(symptom)
+        valid_lists.append(valid_symptoms)
+
+    matrix = sparse.csr_matrix(
+        (np.ones(len(rows), dtype=np.float64), (rows, cols)),
+        shape=(len(symptom_lists), len(model.all_symptoms))
+    )
+    return matrix, valid_lists
+
+
+@app.route('/api/predict/batch', methods=['POST'])
+def predict_batch():
+    """Predict many symptom lists with a single vectorized engine call."""
+    try:
+        client_ip = request.remote_addr or 'unknown'
+        if not check_rate_limit(client_ip):
+            log_audit('rate_limit_exceeded', {'ip': client_ip})
+            return jsonify({'error': 'Rate limit exceeded. Please try again later.'}), 429
+
+        data = request.get_json(silent=True)
+        if not data or not isinstance(data.get('items'), list):
+            return jsonify({'error': 'Missing items list'}), 400
+
+        items = data['items']
+        if not items:
+            return jsonify({'error': 'items must not be empty'}), 400
+        if len(items) > MAX_BATCH_SIZE:
+            return jsonify({'error': f'Batch size exceeds limit of {MAX_BATCH_SIZE}'}), 400
+
+        try:
+            top_k, coverage = parse_ranking_params(data)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        log_audit('batch_prediction_request', {'ip': client_ip, 'size': len(items)})
+
+        # Each item is either a symptom list, a comma-separated string, or {"symptoms": ...}
+        symptom_lists = []
+        for item in items:
+            if isinstance(item, dict):
+                item = item.get('symptoms', [])
+            if isinstance(item, str):
+                item = item.split(',')
+            if not isinstance(item, list):
+                item = []
+            symptom_lists.append([canonicalize_symptom(s, fuzzy=True) for s in item])
+
+        model = predictor
+        with stage_timer('predict_batch', 'matrix_build'):
+            matrix, valid_lists = build_symptom_matrix(model, symptom_lists)
+        with stage_timer('predict_batch', 'predict_proba'):
+            probas = model.engine.predict_proba_matrix(matrix)
+        classes = model.engine.classes
+
+        results = []
+        for row_idx, valid_symptoms in enumerate(valid_lists):
+            if not valid_symptoms:
+                results.append({'index': row_idx, 'error': 'No valid symptoms provided'})
+                continue
+
+            row = probas[row_idx]
+            ranked = rank_classes(row, top_k=top_k, coverage=coverage, max_k=MAX_TOP_K)
+            results.append({
+                'index': row_idx,
+                'disease': classes[ranked[0]],
+                'confidence': float(row[ranked[0]]),
+                'symptoms_used': valid_symptoms,
+                'alternative_diagnoses': [
+                    {'disease': classes[idx], 'confidence': float(row[idx])}
+                    for idx in ranked[1:]
+                ],
+                'differential_mass': round(float(row[ranked].sum()), 6)
+            })
+
+        log_audit('batch_prediction_made', {'size': len(items)})
+        return jsonify({
+            'results': results,
+            'count': len(results),
+            'top_k': top_k,
+            'coverage': coverage,
+            'model_version': model.version
+        })
+
+    except Exception as e:
+        log_audit('prediction_error', {'error': str(e)})
+        traceback.print_exc()
+        return jsonify({'error': str(e)}), 500
+
+
 # API for patient history
 @app.route('/api/history/<patient_id>', methods=['GET'])
 def get_history(patient_id):
@@ -1446,7 +2115,7 @@ def nearby_doctors():
     }
 
     try:
-        resp = requests.get(place_url, params=params, timeout=12)
+        resp = outbound.get('google_places', place_url, params=params, timeout=12)
         payload = resp.json()
     except Exception as e:
         return jsonify({'error': f'Failed to contact Google Places API: {str(e)}'}), 502
@@ -1480,11 +2149,123 @@ def nearby_doctors():
     })
 
 
+def admin_authorized():
+    token = request.headers.get('X-Admin-Token', '')
+    return bool(ADMIN_TOKEN) and hmac.compare_digest(token, ADMIN_TOKEN)
+
+@app.route('/api/admin/model', methods=['GET'])
+def model_status():
+    if not admin_authorized():
+        return jsonify({'error': 'Forbidden'}), 403
+    return jsonify({
+        'version': predictor.version,
+        'loaded_at': predictor.loaded_at,
+        'registry_version': model_registry.current_version(),
+        'available_versions': model_registry.versions(),
+        'last_reload': dict(model_reload_status)
+    })
+
+@app.route('/api/admin/model/reload', methods=['POST'])
+def reload_model_endpoint():
+    """Validate and swap in a registry version (default: the active one), then activate it.
+
+    Only this worker swaps immediately; the others load the newly active
+    version on their next registry poll (MODEL_WATCH_INTERVAL).
+    """
+    if not admin_authorized():
+        return jsonify({'error': 'Forbidden'}), 403
+
+    data = request.get_json(silent=True) or {}
+    version = str(data.get('version') or model_registry.current_version() or '').strip()
+    if version not in model_registry.versions():
+        return jsonify({'error': f"Unknown model version '{version}'", 'available_versions': model_registry.versions()}), 404
+
+    future = model_reload_pool.submit(reload_model_safely, version, True)
+    try:
+        result = future.result(timeout=MODEL_RELOAD_WAIT)
+    except FutureTimeoutError:
+        return jsonify({'status': 'loading', 'version': version}), 202
+    return jsonify(result), 409 if result['status'] == 'rejected' else 200
+
+@app.route('/api/audit', methods=['GET'])
+def query_audit_log():
+    """Newest-first audit events, filtered by since/until (epoch seconds) and event_type.
+
+    source=memory (default) reads this worker's ring buffer; source=files
+    searches the rotated JSONL files written by every worker.
+    """
+    if not admin_authorized():
+        return jsonify({'error': 'Forbidden'}), 403
+
+    try:
+        since = float(request.args['since']) if request.args.get('since') else None
+        until = float(request.args['until']) if request.args.get('until') else None
+        limit = max(1, min(int(request.args.get('limit', 100)), AUDIT_QUERY_MAX_LIMIT))
+    except ValueError:
+        return jsonify({'error': 'since/until must be epoch seconds and limit an integer'}), 400
+    event_type = (request.args.get('event_type') or '').strip() or None
+    source = request.args.get('source', 'memory')
+    if source not in ('memory', 'files'):
+        return jsonify({'error': "source must be 'memory' or 'files'"}), 400
+
+    search = audit_log.search_files if source == 'files' else audit_log.recent
+    events = search(since=since, until=until, event_type=event_type, limit=limit)
+    return jsonify({'count': len(events), 'source': source, 'events': events, 'log': audit_log.stats()})
+
+def collect_component_metrics():
+    """Counters kept by the cache, limiter, router, upstream clients and audit log."""
+    cache = prediction_cache.stats()
+    translation = translation_executor.stats()
+    counters = [
+        ('prediction_cache_hits_total', None, cache['hits']),
+        ('prediction_cache_misses_total', None, cache['misses']),
+        ('prediction_cache_evictions_total', None, cache['evictions']),
+        ('rate_limit_rejected_total', None, rate_limiter.rejected),
+        ('translation_submitted_total', None, translation['submitted']),
+        ('translation_coalesced_total', None, translation['coalesced']),
+        ('translation_deadline_misses_total', None, translation['deadline_misses']),
+        ('model_shadow_dropped_total', None, model_router.shadow_dropped),
+        ('audit_events_written_total', None, audit_log.written),
+        ('audit_events_dropped_total', None, audit_log.dropped)
+    ]
+    gauges = [
+        ('prediction_cache_entries', None, cache['size']),
+        ('translation_inflight', None, translation['inflight'])
+    ]
+    histograms = []
+    for name, upstream in outbound.upstreams.items():
+        counters.append(('upstream_requests_total', {'upstream': name}, upstream.requests))
+        counters.append(('upstream_errors_total', {'upstream': name}, upstream.errors))
+        for status, count in list(upstream.status_codes.items()):
+            counters.append(('upstream_responses_total', {'upstream': name, 'status': status}, count))
+        histograms.append(('upstream_request_duration_seconds', {'upstream': name}, upstream.latency))
+    for name, stats in list(model_router.stats.items()):
+        counters.append(('model_served_total', {'model': name}, stats.served))
+        counters.append(('model_cache_hits_total', {'model': name}, stats.cache_hits))
+        histograms.append(('model_scoring_duration_seconds', {'model': name}, stats.latency))
+    return {'counters': counters, 'gauges': gauges, 'histograms': histograms}
+
+metrics.add_collector(collect_component_metrics)
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/api/health', methods=['GET'])
 def health():
+    model = predictor
     return jsonify({
         'status': 'ok',
-        'symptom_count': len(predictor.all_symptoms),
+        'model_version': model.version,
+        'model_loaded_at': model.loaded_at,
+        'symptom_count': len(model.all_symptoms),
+        'prediction_cache': prediction_cache.stats(),
+        'translation_executor': translation_executor.stats(),
+        'upstreams': outbound.stats(),
+        'model_routing': model_router.snapshot(),
+        'rate_limiter': rate_limiter.stats(),
+        'audit_log': audit_log.stats(),
+        'profiler': profiler.stats(),
         'timestamp': int(time.time())
     })
 
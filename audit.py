@@ -0,0 +1,255 @@
+"""Audit trail: an in-memory ring buffer plus batched JSONL files on disk.
+
+Request threads only append to the ring and to a pending deque (both
+lock-free under the GIL); a per-process background thread drains the deque
+in batches and writes JSONL files named audit-<pid>-<start>-<n>.jsonl, rotated
+by size or age. When a file is closed its time range and event types are
+written to a small <file>.idx.json so queries can skip it. If the writer falls
+behind by more than the deque holds, the oldest pending events are dropped
+and counted in stats()['dropped'].
+"""
+import atexit
+import glob
+import heapq
+import itertools
+import json
+import os
+import threading
+import time
+from collections import deque
+
+
+class AuditLog:
+    def __init__(self, directory, capacity=10000, flush_interval=1.0, max_bytes=10 * 1024 * 1024,
+                 rotate_seconds=86400, max_files=50):
+        self.directory = directory
+        self.capacity = capacity
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.rotate_seconds = rotate_seconds
+        self.max_files = max_files
+
+        self._ring = [None] * capacity
+        self._sequence = itertools.count()  # next() is atomic, so writers never take a lock
+        self._last_seq = -1
+        self._by_type = {}                  # event_type -> deque of sequence numbers in the ring
+        self._pending = deque(maxlen=capacity * 4)
+        self._wakeup = threading.Event()
+        self._writer_pid = None
+        self._writer_guard = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._drop_lock = threading.Lock()
+
+        # Writer-thread state
+        self._file = None
+        self._file_path = None
+        self._file_opened = 0.0
+        self._file_index = None
+        self._files_opened = 0
+        self.written = 0
+        self.write_errors = 0
+        self.dropped = 0
+
+    def record(self, event_type, details):
+        seq = next(self._sequence)
+        event = {
+            'seq': seq,
+            'timestamp': time.time(),
+            'event_type': event_type,
+            'pid': os.getpid(),
+            'details': details
+        }
+        self._ring[seq % self.capacity] = event
+        self._last_seq = max(self._last_seq, seq)
+        seqs = self._by_type.get(event_type)
+        if seqs is None:
+            seqs = self._by_type.setdefault(event_type, deque(maxlen=self.capacity))
+        seqs.append(seq)
+        if len(self._pending) >= self._pending.maxlen:
+            # A full deque discards its oldest entry on append; those never reach disk
+            with self._drop_lock:
+                self.dropped += 1
+        self._pending.append(event)
+        if self._writer_pid != os.getpid():
+            self._start_writer()
+        return event
+
+    def _start_writer(self):
+        # Threads do not survive fork, so each worker starts its own writer
+        with self._writer_guard:
+            if self._writer_pid == os.getpid():
+                return
+            self._writer_pid = os.getpid()
+            self._file = None
+            threading.Thread(target=self._run_writer, name='audit-writer', daemon=True).start()
+            atexit.register(self.flush)
+
+    def recent(self, since=None, until=None, event_type=None, limit=100):
+        """Newest-first events still in this process's ring."""
+        newest = self._last_seq
+        oldest = max(0, newest - self.capacity + 1)
+        if event_type:
+            candidates = reversed(list(self._by_type.get(event_type, ())))
+        else:
+            candidates = range(newest, oldest - 1, -1)
+
+        results = []
+        for seq in candidates:
+            if seq < oldest:
+                break
+            event = self._ring[seq % self.capacity]
+            if event is None or event['seq'] != seq:
+                continue
+            if until is not None and event['timestamp'] > until:
+                continue
+            if since is not None and event['timestamp'] < since:
+                break
+            results.append(event)
+            if len(results) >= limit:
+                break
+        return results
+
+    def search_files(self, since=None, until=None, event_type=None, limit=100):
+        """Newest-first events from the JSONL files of every worker.
+
+        Files are visited newest first and only the `limit` newest matches are
+        kept. Workers write their files side by side, so the walk stops at the
+        first file that ends before the oldest event kept, not at the first hit.
+        """
+        if limit <= 0:
+            return []
+        files = []
+        for path in glob.glob(os.path.join(self.directory, 'audit-*.jsonl')):
+            index = self._read_index(path)
+            if index:
+                if since is not None and index['last_ts'] < since:
+                    continue
+                if until is not None and index['first_ts'] > until:
+                    continue
+                if event_type and event_type not in index['event_types']:
+                    continue
+                newest = index['last_ts']
+            else:
+                # Still being written (or its index was lost): nothing in it is newer than the file
+                try:
+                    newest = os.path.getmtime(path)
+                except OSError:
+                    continue
+            files.append((newest, path))
+        files.sort(reverse=True)
+
+        kept = []  # min-heap of (timestamp, tiebreak, event)
+        tiebreak = itertools.count()
+        for newest, path in files:
+            if len(kept) >= limit and newest < kept[0][0]:
+                break
+            for event in self._scan(path, since, until, event_type):
+                item = (event['timestamp'], next(tiebreak), event)
+                if len(kept) < limit:
+                    heapq.heappush(kept, item)
+                elif item[0] > kept[0][0]:
+                    heapq.heapreplace(kept, item)
+        return [event for _, _, event in sorted(kept, reverse=True)]
+
+    def _scan(self, path, since, until, event_type):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        event = json.loads(line)
+                    except ValueError:
+                        continue  # torn tail of a file still being written
+                    if event_type and event.get('event_type') != event_type:
+                        continue
+                    if since is not None and event['timestamp'] < since:
+                        continue
+                    if until is not None and event['timestamp'] > until:
+                        continue
+                    yield event
+        except OSError:
+            return
+
+    @staticmethod
+    def _read_index(path):
+        try:
+            with open(f"{path}.idx.json", 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def stats(self):
+        return {
+            'buffered': min(self._last_seq + 1, self.capacity),
+            'pending': len(self._pending),
+            'written': self.written,
+            'write_errors': self.write_errors,
+            'dropped': self.dropped,
+            'current_file': os.path.basename(self._file_path) if self._file_path else None
+        }
+
+    def _run_writer(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def flush(self):
+        # The writer thread and the atexit hook can both get here; one batch and rotation at a time
+        with self._flush_lock:
+            batch = []
+            while True:
+                try:
+                    batch.append(self._pending.popleft())
+                except IndexError:
+                    break
+            if not batch:
+                if self._file is not None and time.time() - self._file_opened >= self.rotate_seconds:
+                    self._rotate()
+                return
+
+            try:
+                lines = ''.join(json.dumps(event, default=str, separators=(',', ':')) + '\n' for event in batch)
+                self._ensure_file()
+                self._file.write(lines)
+                self._file.flush()
+                self.written += len(batch)
+                for event in batch:
+                    self._file_index['first_ts'] = min(self._file_index['first_ts'], event['timestamp'])
+                    self._file_index['last_ts'] = max(self._file_index['last_ts'], event['timestamp'])
+                    self._file_index['event_types'][event['event_type']] = \
+                        self._file_index['event_types'].get(event['event_type'], 0) + 1
+                if self._file.tell() >= self.max_bytes or time.time() - self._file_opened >= self.rotate_seconds:
+                    self._rotate()
+            except Exception as e:
+                self.write_errors += 1
+                print(f"Audit write warning: {e}")
+
+    def _ensure_file(self):
+        if self._file is not None:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        self._files_opened += 1
+        name = f"audit-{os.getpid()}-{time.strftime('%Y%m%d-%H%M%S')}-{self._files_opened}.jsonl"
+        self._file_path = os.path.join(self.directory, name)
+        self._file = open(self._file_path, 'a', encoding='utf-8')
+        self._file_opened = time.time()
+        self._file_index = {'first_ts': float('inf'), 'last_ts': 0.0, 'event_types': {}}
+
+    def _rotate(self):
+        path, index = self._file_path, self._file_index
+        self._file.close()
+        self._file = None
+        self._file_path = None
+        if index['event_types']:
+            with open(f"{path}.idx.json", 'w', encoding='utf-8') as f:
+                json.dump(index, f)
+        self._prune()
+
+    def _prune(self):
+        files = sorted(glob.glob(os.path.join(self.directory, 'audit-*.jsonl')), key=os.path.getmtime)
+        for path in files[:max(0, len(files) - self.max_files)]:
+            for stale in (path, f"{path}.idx.json"):
+                try:
+                    os.remove(stale)
+                except OSError:
+                    pass
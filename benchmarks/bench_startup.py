@@ -0,0 +1,116 @@
+"""Startup benchmark for the gunicorn deployment, with and without preload.
+
+Starts gunicorn with gunicorn.conf.py, waits for the first successful
+/api/health response, then reads each worker's memory from /proc. RSS counts
+shared pages in every worker; PSS splits them between the processes sharing
+them, and private memory is what a worker holds by itself.
+
+Usage: python benchmarks/bench_startup.py [--workers 2 4] [--modes preload per-worker]
+Linux only (reads /proc).
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def child_pids(pid):
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            return [int(p) for p in f.read().split()]
+    except OSError:
+        return []
+
+
+def memory_kb(pid):
+    """{'rss_kb', 'pss_kb', 'private_kb'} for a process."""
+    usage = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if parts[0] in ('Rss:', 'Pss:', 'Private_Clean:', 'Private_Dirty:'):
+                usage[parts[0][:-1]] = int(parts[1])
+    return {
+        'rss_kb': usage.get('Rss', 0),
+        'pss_kb': usage.get('Pss', 0),
+        'private_kb': usage.get('Private_Clean', 0) + usage.get('Private_Dirty', 0)
+    }
+
+
+def wait_for_first_request(url, proc, timeout):
+    started = time.perf_counter()
+    while time.perf_counter() - started < timeout:
+        if proc.poll() is not None:
+            raise RuntimeError(f"gunicorn exited with code {proc.returncode}")
+        try:
+            with urllib.request.urlopen(url, timeout=2) as response:
+                if response.status == 200:
+                    return time.perf_counter() - started
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError(f"No response from {url} within {timeout}s")
+
+
+def run(workers, preload, timeout):
+    port = free_port()
+    env = dict(os.environ, PORT=str(port), WEB_CONCURRENCY=str(workers), GUNICORN_PRELOAD='1' if preload else '0')
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '--config', 'gunicorn.conf.py', 'app:app'],
+        cwd=REPO_ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        first_request_s = wait_for_first_request(f"http://127.0.0.1:{port}/api/health", proc, timeout)
+        # Every worker must have booted before memory is comparable
+        deadline = time.perf_counter() + timeout
+        while len(child_pids(proc.pid)) < workers and time.perf_counter() < deadline:
+            time.sleep(0.05)
+        for _ in range(workers * 4):
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/api/health", timeout=5).read()
+        time.sleep(0.5)
+
+        worker_memory = [memory_kb(pid) for pid in child_pids(proc.pid)]
+        return {
+            'mode': 'preload' if preload else 'per-worker',
+            'workers': workers,
+            'time_to_first_request_s': round(first_request_s, 3),
+            'master': memory_kb(proc.pid),
+            'per_worker': worker_memory,
+            'total_pss_kb': memory_kb(proc.pid)['pss_kb'] + sum(m['pss_kb'] for m in worker_memory),
+            'wall_s': round(time.perf_counter() - started, 3)
+        }
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, nargs='*', default=[2, 4])
+    parser.add_argument('--modes', nargs='*', choices=['preload', 'per-worker'], default=['preload', 'per-worker'])
+    parser.add_argument('--timeout', type=float, default=120)
+    args = parser.parse_args()
+
+    results = []
+    for workers in args.workers:
+        for mode in args.modes:
+            results.append(run(workers, mode == 'preload', args.timeout))
+
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,318 @@
+"""Micro-benchmarks and a WSGI load test for the prediction, storage and translation paths.
+
+micro   times single calls of SymptomPredictor.predict, canonicalize_symptom,
+        fallback_symptom_extraction, assess_triage, translate_prediction_payload
+        (against a stub translator) and the patient-log store (append, rolling
+        summary and history reads).
+macro   drives the Flask app through its WSGI callable from a thread pool
+        (a mix of structured, free-text and history requests) at each
+        --concurrency level, against a patient store pre-filled with --patients
+        patients.
+
+Both report p50/p95/p99 latency and throughput as JSON. Save one run with
+--output and pass it to a later run as --compare to list regressions
+(exit status 1 when any metric is worse than --threshold).
+
+Runs in a temporary working directory with its own model registry, so
+nothing in the repo is written to. The rate limit is lifted and no upstream
+translation API is called.
+
+Usage: python benchmarks/bench_suite.py [micro|macro|all] [--concurrency 1 8]
+       [--patients 1000] [--requests 2000] [--output run.json] [--compare base.json]
+"""
+import argparse
+import contextlib
+import copy
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+FREE_TEXT = [
+    "I have had a high fever and headache since yesterday with some vomiting",
+    "my skin is itching a lot and there is a rash spreading on my arms",
+    "constant cough with chest pain and breathlessness when walking upstairs",
+    "stomach pain after eating, nausea and I feel tired all the time"
+]
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return None
+    rank = max(0, min(len(sorted_values) - 1, int(round(q / 100.0 * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+
+def summarize(latencies_s, elapsed_s, unit='us'):
+    scale = 1e6 if unit == 'us' else 1e3
+    values = sorted(latencies_s)
+    return {
+        'count': len(values),
+        f'p50_{unit}': round(percentile(values, 50) * scale, 3),
+        f'p95_{unit}': round(percentile(values, 95) * scale, 3),
+        f'p99_{unit}': round(percentile(values, 99) * scale, 3),
+        f'mean_{unit}': round(sum(values) / len(values) * scale, 3),
+        'throughput_per_s': round(len(values) / elapsed_s, 1) if elapsed_s else None
+    }
+
+
+def measure(fn, iterations, warmup=50):
+    for _ in range(warmup):
+        fn()
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        call_started = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - call_started)
+    return summarize(latencies, time.perf_counter() - started)
+
+
+def stub_translator(latency_ms):
+    def translate_texts(texts, target_lang, timeout=20, deadline=None):
+        if latency_ms:
+            time.sleep(latency_ms / 1000.0)
+        return [f"[{target_lang}] {text}" for text in texts]
+    return translate_texts
+
+
+def seed_patients(dipex, patients, records_per_patient, rng):
+    symptoms = dipex.predictor.all_symptoms
+    for i in range(patients):
+        pid = dipex.hash_patient_id(f"bench-{i}")
+        for _ in range(records_per_patient):
+            dipex.history_store.append(pid, {
+                'timestamp': time.time(),
+                'disease': 'Common Cold',
+                'confidence': round(rng.random(), 3),
+                'symptoms': rng.sample(symptoms, 3),
+                'is_urgent': False
+            })
+
+
+def run_micro(dipex, args, rng):
+    model = dipex.predictor
+    symptoms = model.all_symptoms
+    symptom_sets = [rng.sample(symptoms, rng.randint(2, 5)) for _ in range(200)]
+    raw_names = [s.replace('_', ' ').title() for s in symptoms] + ['vomitting', 'head ache', 'skin rash']
+    assessment = dipex.assess_symptom_set(model, symptom_sets[0])
+    payload = dict(assessment, care_plan=['Rest and drink fluids', 'Follow up in 3 days'])
+
+    def translate():
+        # Cold path: the payload walk plus one stubbed batch call per payload
+        dipex.output_translation_cache.clear()
+        dipex.translate_prediction_payload(copy.deepcopy(payload), 'hi')
+
+    picks = {'i': 0}
+
+    def next_index(n):
+        picks['i'] = (picks['i'] + 1) % n
+        return picks['i']
+
+    cases = {
+        'symptom_predictor_predict': lambda: model.predict(symptom_sets[next_index(len(symptom_sets))]),
+        'canonicalize_symptom': lambda: dipex.canonicalize_symptom(raw_names[next_index(len(raw_names))], fuzzy=True),
+        'fallback_symptom_extraction': lambda: dipex.fallback_symptom_extraction(FREE_TEXT[next_index(len(FREE_TEXT))]),
+        'assess_triage': lambda: dipex.assess_triage(symptom_sets[next_index(len(symptom_sets))],
+                                                     'Pneumonia', 0.62, False),
+        'translate_prediction_payload': translate,
+        'patient_log_append': lambda: dipex.sleep_store.append(
+            dipex.hash_patient_id(f"bench-{next_index(args.patients)}"), {'hours': 7, 'quality': 3, 'notes': 'ok'}),
+        'patient_log_summary': lambda: dipex.history_store.summary(
+            dipex.hash_patient_id(f"bench-{next_index(args.patients)}")),
+        'save_patient_history': lambda: dipex.save_patient_history(
+            f"bench-{next_index(args.patients)}", {'timestamp': time.time(), 'disease': 'Flu', 'confidence': 0.5}),
+        'get_patient_history': lambda: dipex.get_patient_history(f"bench-{next_index(args.patients)}")
+    }
+
+    results = {}
+    for name, fn in cases.items():
+        if args.only and name not in args.only:
+            continue
+        results[name] = measure(fn, args.iterations)
+    return results
+
+
+def build_requests(dipex, count, patients, rng):
+    from werkzeug.test import EnvironBuilder
+
+    symptoms = dipex.predictor.all_symptoms
+    # A bounded set of symptom combinations, so the prediction cache sees realistic repeats
+    combos = [rng.sample(symptoms, rng.randint(2, 5)) for _ in range(300)]
+    plan = []
+    for _ in range(count):
+        patient = f"bench-{rng.randrange(patients)}"
+        roll = rng.random()
+        if roll < 0.6:
+            plan.append(('predict', dict(path='/api/predict', method='POST',
+                                         json={'symptoms': rng.choice(combos), 'patient_id': patient})))
+        elif roll < 0.8:
+            plan.append(('predict_text', dict(path='/api/predict', method='POST',
+                                              json={'symptoms': rng.choice(FREE_TEXT), 'patient_id': patient})))
+        else:
+            plan.append(('history', dict(path=f'/api/history/{patient}', method='GET')))
+    return [(name, EnvironBuilder(**options)) for name, options in plan]
+
+
+def call_wsgi(wsgi_app, environ):
+    status = []
+
+    def start_response(status_line, headers, exc_info=None):
+        status.append(status_line)
+
+    app_iter = wsgi_app(environ, start_response)
+    try:
+        for _ in app_iter:
+            pass
+    finally:
+        if hasattr(app_iter, 'close'):
+            app_iter.close()
+    return int(status[0].split()[0])
+
+
+def run_macro(dipex, args, rng):
+    wsgi_app = dipex.app
+    results = []
+    for concurrency in args.concurrency:
+        plan = build_requests(dipex, args.requests, args.patients, rng)
+        environs = [(name, builder.get_environ()) for name, builder in plan]
+        position = iter(range(len(environs)))
+        lock = threading.Lock()
+        samples = {}
+        statuses = {}
+
+        def worker():
+            while True:
+                with lock:
+                    index = next(position, None)
+                if index is None:
+                    return
+                name, environ = environs[index]
+                started = time.perf_counter()
+                status = call_wsgi(wsgi_app, environ)
+                elapsed = time.perf_counter() - started
+                with lock:
+                    samples.setdefault(name, []).append(elapsed)
+                    statuses[status] = statuses.get(status, 0) + 1
+
+        threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        all_samples = [s for values in samples.values() for s in values]
+        result = {'concurrency': concurrency, 'patients': args.patients, 'elapsed_s': round(elapsed, 3),
+                  'status_codes': {str(k): v for k, v in sorted(statuses.items())}}
+        result.update(summarize(all_samples, elapsed, unit='ms'))
+        result['endpoints'] = {name: summarize(values, elapsed, unit='ms') for name, values in sorted(samples.items())}
+        results.append(result)
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def compare(report, baseline, threshold):
+    """(metric, baseline, current, ratio) for every latency/throughput that got worse."""
+    regressions = []
+
+    def check(label, old, new, higher_is_better=False):
+        if not old or new is None:
+            return
+        ratio = new / old
+        worse = ratio < 1 - threshold if higher_is_better else ratio > 1 + threshold
+        if worse:
+            regressions.append({'metric': label, 'baseline': old, 'current': new, 'ratio': round(ratio, 3)})
+
+    for name, current in report.get('micro', {}).items():
+        old = baseline.get('micro', {}).get(name)
+        if old:
+            for key in ('p50_us', 'p99_us'):
+                check(f"micro.{name}.{key}", old[key], current[key])
+    old_macro = {run['concurrency']: run for run in baseline.get('macro', [])}
+    for run in report.get('macro', []):
+        old = old_macro.get(run['concurrency'])
+        if old:
+            prefix = f"macro.c{run['concurrency']}"
+            check(f"{prefix}.p99_ms", old['p99_ms'], run['p99_ms'])
+            check(f"{prefix}.throughput_per_s", old['throughput_per_s'], run['throughput_per_s'], higher_is_better=True)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('suite', nargs='?', choices=['micro', 'macro', 'all'], default='all')
+    parser.add_argument('--iterations', type=int, default=2000, help='Calls per micro-benchmark')
+    parser.add_argument('--only', nargs='*', help='Run only these micro-benchmarks')
+    parser.add_argument('--concurrency', type=int, nargs='*', default=[1, 4, 16])
+    parser.add_argument('--requests', type=int, default=2000, help='Requests per concurrency level')
+    parser.add_argument('--patients', type=int, default=1000, help='Patients in the pre-filled history store')
+    parser.add_argument('--records-per-patient', type=int, default=5)
+    parser.add_argument('--translate-latency-ms', type=float, default=0.0, help='Delay of the stub translator')
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--output', help='Also write the JSON report here')
+    parser.add_argument('--compare', help='Baseline report to compare against')
+    parser.add_argument('--threshold', type=float, default=0.10, help='Allowed slowdown ratio before flagging')
+    args = parser.parse_args()
+
+    # Both paths are relative to where the command was run, not the scratch directory
+    output_path = os.path.abspath(args.output) if args.output else None
+    compare_path = os.path.abspath(args.compare) if args.compare else None
+    workdir = tempfile.mkdtemp(prefix='dipex-bench-')
+    os.chdir(workdir)
+    os.environ.setdefault('MODEL_REGISTRY_DIR', os.path.join(workdir, 'registry'))
+    # Model training/loading chatter and per-request prints are not part of the report
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        import app as dipex
+
+        dipex.rate_limiter.limit = 10 ** 9
+        dipex.translate_texts_with_groq = stub_translator(args.translate_latency_ms)
+        rng = random.Random(args.seed)
+        seed_patients(dipex, args.patients, args.records_per_patient, rng)
+
+        report = {
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'cpus': os.cpu_count(),
+            'model_version': dipex.predictor.version,
+            'workdir': workdir
+        }
+        if args.suite in ('micro', 'all'):
+            report['micro'] = run_micro(dipex, args, rng)
+        if args.suite in ('macro', 'all'):
+            report['macro'] = run_macro(dipex, args, rng)
+
+    status = 0
+    if compare_path:
+        with open(compare_path, 'r', encoding='utf-8') as f:
+            report['regressions'] = compare(report, json.load(f), args.threshold)
+        status = 1 if report['regressions'] else 0
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if output_path:
+        with open(output_path, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
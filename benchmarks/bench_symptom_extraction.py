@@ -0,0 +1,94 @@
+"""Throughput benchmark for rule-based symptom extraction on long free text.
+
+Compares the compiled matcher used by fallback_symptom_extraction with a
+naive per-phrase substring scan over the same vocabulary.
+
+Usage: python benchmarks/bench_symptom_extraction.py [--sizes 1000 10000 100000]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+FILLER = (
+    "the patient reports that since last week things have been getting worse "
+    "and they were seen at the clinic where the doctor asked about family history"
+).split()
+
+
+def make_text(n_chars, phrases, seed=7):
+    rng = random.Random(seed)
+    words = []
+    length = 0
+    while length < n_chars:
+        if rng.random() < 0.15:
+            word = rng.choice(phrases).replace('_', ' ')
+            if rng.random() < 0.2:
+                word = 'no ' + word
+        else:
+            word = rng.choice(FILLER)
+        words.append(word)
+        length += len(word) + 1
+        if rng.random() < 0.05:
+            words[-1] += '.'
+    return ' '.join(words)[:n_chars]
+
+
+def naive_extract(text, phrases):
+    text = text.lower()
+    found = []
+    for phrase, canonical in phrases.items():
+        if phrase.replace('_', ' ') in text and canonical not in found:
+            found.append(canonical)
+    return found
+
+
+def timed(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='*', default=[1000, 10000, 100000, 1000000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    import app
+
+    phrases = {}
+    for symptom, patterns in app.FALLBACK_SYMPTOM_PATTERNS.items():
+        for pattern in patterns:
+            phrases[pattern] = app.symptom_alias_map.get(symptom, symptom)
+    phrases.update(app.symptom_alias_map)
+    matcher = app.symptom_matcher
+
+    results = []
+    for size in args.sizes:
+        text = make_text(size, list(phrases))
+        matcher_s = timed(lambda: matcher.extract(text), args.repeat)
+        naive_s = timed(lambda: naive_extract(text, phrases), args.repeat)
+        results.append({
+            'chars': len(text),
+            'vocabulary_phrases': len(matcher),
+            'matcher_ms': round(matcher_s * 1000, 3),
+            'matcher_mb_per_s': round(len(text) / matcher_s / 1e6, 2),
+            'naive_scan_ms': round(naive_s * 1000, 3),
+            'symptoms_found': len(matcher.extract(text))
+        })
+
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
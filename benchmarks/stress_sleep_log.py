@@ -0,0 +1,89 @@
+"""Concurrency stress check for the sleep log persistence path.
+
+Forks several worker processes that each POST many entries to /api/sleep for
+the same patient (the worst case for lost updates), then verifies that every
+record made it to disk and that the log has no torn lines.
+
+Usage: python benchmarks/stress_sleep_log.py [--processes 8] [--requests 200]
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+
+def _worker(worker_id, requests_per_worker, patient_id):
+    import app as dipex
+
+    client = dipex.app.test_client()
+    failures = 0
+    for i in range(requests_per_worker):
+        resp = client.post('/api/sleep', json={
+            'patient_id': patient_id,
+            'hours': 7,
+            'quality': 3,
+            'notes': f'{worker_id}:{i}'
+        })
+        if resp.status_code != 200:
+            failures += 1
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--processes', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=200)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='dipex-stress-')
+    os.chdir(workdir)
+    # Import once in the parent so forked workers share the loaded model
+    import app as dipex
+
+    patient_id = 'stress-patient'
+    expected = args.processes * args.requests
+    started = time.perf_counter()
+
+    ctx = multiprocessing.get_context('fork')
+    with ctx.Pool(args.processes) as pool:
+        failures = sum(pool.starmap(
+            _worker,
+            [(w, args.requests, patient_id) for w in range(args.processes)]
+        ))
+    elapsed = time.perf_counter() - started
+
+    logs = dipex.get_sleep_logs(patient_id)
+    notes = {entry.get('notes') for entry in logs}
+    with open(dipex.sleep_store.path, 'rb') as f:
+        torn = sum(1 for line in f if not line.endswith(b'\n'))
+
+    report = {
+        'processes': args.processes,
+        'requests_per_process': args.requests,
+        'expected_records': expected,
+        'stored_records': len(logs),
+        'unique_records': len(notes),
+        'http_failures': failures,
+        'torn_lines': torn,
+        'elapsed_s': round(elapsed, 3),
+        'writes_per_s': round(expected / elapsed, 1) if elapsed else None,
+        'workdir': workdir
+    }
+    print(json.dumps(report, indent=2))
+
+    ok = failures == 0 and torn == 0 and len(logs) == expected and len(notes) == expected
+    if not ok:
+        print('FAIL: records were lost or corrupted', file=sys.stderr)
+        return 1
+    print('OK: no records lost')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
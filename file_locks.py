@@ -0,0 +1,99 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to process-local locking only
+    fcntl = None
+
+LOCK_TIMEOUT = float(os.environ.get('FILE_LOCK_TIMEOUT', 5.0))
+
+
+class LockTimeout(RuntimeError):
+    """Raised when a file lock cannot be acquired within the wait budget."""
+
+
+class FileLock:
+    """Advisory cross-process lock on ``<path>.lock`` with a bounded wait.
+
+    The lock lives in a sidecar file because atomic writes replace the data
+    file's inode. A thread lock serializes callers inside one process, since
+    flock() does not exclude threads sharing a process.
+    """
+
+    def __init__(self, path, timeout=LOCK_TIMEOUT):
+        self.path = path
+        self.lock_path = f"{path}.lock"
+        self.timeout = timeout
+        self._thread_lock = threading.Lock()
+
+    @contextmanager
+    def acquire(self, shared=False):
+        deadline = time.monotonic() + self.timeout
+        if not self._thread_lock.acquire(timeout=self.timeout):
+            raise LockTimeout(f"Timed out waiting for lock on {self.path}")
+        try:
+            if fcntl is None:
+                yield
+                return
+
+            fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                mode = fcntl.LOCK_SH if shared else fcntl.LOCK_EX
+                delay = 0.001
+                while True:
+                    try:
+                        fcntl.flock(fd, mode | fcntl.LOCK_NB)
+                        break
+                    except BlockingIOError:
+                        if time.monotonic() >= deadline:
+                            raise LockTimeout(f"Timed out waiting for lock on {self.path}")
+                        time.sleep(delay)
+                        delay = min(delay * 2, 0.05)
+                yield
+            finally:
+                # Closing the descriptor releases the flock
+                os.close(fd)
+        finally:
+            self._thread_lock.release()
+
+
+class LockManager:
+    """Hands out one FileLock per absolute path so threads share it."""
+
+    def __init__(self, timeout=LOCK_TIMEOUT):
+        self.timeout = timeout
+        self._locks = {}
+        self._guard = threading.Lock()
+
+    def lock(self, path):
+        key = os.path.abspath(path)
+        with self._guard:
+            if key not in self._locks:
+                self._locks[key] = FileLock(key, self.timeout)
+            return self._locks[key]
+
+
+lock_manager = LockManager()
+
+
+def atomic_write_json(path, data):
+    """Write JSON to a temp file in the same directory, then os.replace() it in."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
@@ -5,6 +5,7 @@ const messagesDiv = document.querySelector('.messages');
 const typingIndicator = document.getElementById('typing-indicator');
 
 let availableSymptoms = [];
+let suggestRequestId = 0;
 let lastPrediction = null;
 let patientId = '';
 let sidebarEl = null;
@@ -1358,21 +1359,35 @@ function buildInlineSuggestions() {
     inputContainer.insertBefore(suggestionsEl, inputContainer.querySelector('.statdes'));
 }
 
-function updateSuggestions(text) {
+async function updateSuggestions(text) {
     if (!suggestionsEl) {
         return;
     }
 
     const query = text.trim().toLowerCase();
     if (!query || query.length < 2) {
+        suggestRequestId++;
         suggestionsEl.innerHTML = '';
         suggestionsEl.classList.remove('active');
         return;
     }
 
-    const matches = availableSymptoms
-        .filter((symptom) => normalizeDisplay(symptom).toLowerCase().includes(query))
-        .slice(0, 5);
+    const requestId = ++suggestRequestId;
+    let matches;
+    try {
+        const response = await fetch(`/api/symptoms/suggest?q=${encodeURIComponent(query)}&limit=5`);
+        const data = await response.json();
+        matches = Array.isArray(data.suggestions) ? data.suggestions.map((item) => item.symptom) : [];
+    } catch (error) {
+        matches = availableSymptoms
+            .filter((symptom) => normalizeDisplay(symptom).toLowerCase().includes(query))
+            .slice(0, 5);
+    }
+
+    // A slower response for an earlier keystroke must not overwrite newer suggestions
+    if (requestId !== suggestRequestId) {
+        return;
+    }
 
     if (!matches.length) {
         suggestionsEl.innerHTML = '';
@@ -0,0 +1,34 @@
+"""Gunicorn settings for production (picked up by the Procfile).
+
+By default the app is imported once in the master (preload_app) and the
+objects it builds are frozen out of the garbage collector before workers
+fork, so the model and lookup tables are shared copy-on-write instead of
+being rebuilt in every worker.
+
+    WEB_CONCURRENCY    worker processes (default 2)
+    GUNICORN_PRELOAD   0 to import the app separately in each worker
+    GUNICORN_TIMEOUT   worker timeout in seconds (default 120)
+    METRICS_DIR        where workers snapshot metrics for /metrics (default metrics)
+"""
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1').strip().lower() not in {'0', 'false', 'no'}
+
+
+def on_starting(server):
+    # Worker snapshots from a previous run would otherwise be summed into /metrics
+    from metrics import clear_snapshots
+    clear_snapshots(os.environ.get('METRICS_DIR', 'metrics'))
+
+
+def when_ready(server):
+    # Runs in the master after the preloaded app is imported, before the first fork
+    if not preload_app:
+        return
+    import app
+    frozen = app.freeze_shared_state()
+    server.log.info("Froze %d objects shared with %d workers", frozen, workers)
+
@@ -0,0 +1,342 @@
+import bisect
+import os
+import random
+import threading
+import time
+from collections import deque
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+# A POST may already have been processed; only retry when the server says it was not
+NON_IDEMPOTENT_RETRY_STATUS_CODES = {429, 503}
+IDEMPOTENT_METHODS = {'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'}
+# A retry needs at least this much of the deadline left after its backoff
+MIN_ATTEMPT_SECONDS = 0.05
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 20000)
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram (milliseconds); observe() is O(log buckets)."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS_MS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.total_ms = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, elapsed_ms):
+        slot = bisect.bisect_left(self.buckets, elapsed_ms)
+        with self._lock:
+            self.counts[slot] += 1
+            self.total_ms += elapsed_ms
+            self.count += 1
+
+    def quantile(self, q):
+        """Upper bucket bound containing quantile q (None when empty)."""
+        with self._lock:
+            counts = list(self.counts)
+            total = self.count
+        if not total:
+            return None
+        target = q * total
+        running = 0
+        for bound, count in zip(self.buckets + (float('inf'),), counts):
+            running += count
+            if running >= target:
+                return bound
+        return float('inf')
+
+    def snapshot(self):
+        with self._lock:
+            counts = list(self.counts)
+            total_ms = self.total_ms
+            count = self.count
+        return {
+            'count': count,
+            'sum_ms': round(total_ms, 3),
+            'buckets': {str(bound): c for bound, c in zip(self.buckets + ('+Inf',), counts)}
+        }
+
+
+class RetryBudget:
+    """Caps retries to a fraction of recent traffic so an outage cannot multiply load.
+
+    Every request deposits `ratio` tokens (up to `max_tokens`); each retry
+    withdraws one.
+    """
+
+    def __init__(self, ratio=0.2, max_tokens=10.0):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self.tokens = max_tokens
+        self._lock = threading.Lock()
+
+    def deposit(self):
+        with self._lock:
+            self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def withdraw(self):
+        with self._lock:
+            if self.tokens >= 1.0:
+                self.tokens -= 1.0
+                return True
+            return False
+
+
+def connect_failed(error):
+    """True when a request error happened before anything reached the server."""
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    reason = getattr(error.args[0], 'reason', None) if error.args else None
+    return isinstance(reason, NewConnectionError)
+
+
+class CircuitOpenError(requests.RequestException):
+    """Raised instead of calling an upstream whose circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """Error-rate / slow-call circuit breaker over a rolling window of outcomes.
+
+    closed: calls flow, outcomes are recorded. When at least `min_calls` of
+    the last `window` calls exist and the failure share (errors plus calls
+    slower than `slow_call_ms`) reaches `failure_rate`, the breaker opens.
+    open: calls are rejected for `cooldown` seconds. half_open: one probe is
+    let through; success closes the breaker, failure reopens it.
+    """
+
+    def __init__(self, window=20, min_calls=5, failure_rate=0.5, slow_call_ms=5000, cooldown=30.0):
+        self.window = window
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_ms = slow_call_ms
+        self.cooldown = cooldown
+        self.state = 'closed'
+        self.opened_at = 0.0
+        self.trips = 0
+        self.rejected = 0
+        self._outcomes = deque(maxlen=window)
+        self._failures = 0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == 'open':
+                if time.monotonic() - self.opened_at < self.cooldown:
+                    self.rejected += 1
+                    return False
+                self.state = 'half_open'
+                self._probe_in_flight = False
+            if self.state == 'half_open':
+                if self._probe_in_flight:
+                    self.rejected += 1
+                    return False
+                self._probe_in_flight = True
+            return True
+
+    def record(self, success, elapsed_ms=0.0):
+        failed = (not success) or elapsed_ms > self.slow_call_ms
+        with self._lock:
+            if self.state == 'half_open':
+                self._probe_in_flight = False
+                if failed:
+                    self._open()
+                else:
+                    self.state = 'closed'
+                    self._outcomes.clear()
+                    self._failures = 0
+                return
+
+            if len(self._outcomes) == self._outcomes.maxlen and self._outcomes[0]:
+                self._failures -= 1
+            self._outcomes.append(failed)
+            if failed:
+                self._failures += 1
+
+            if (self.state == 'closed' and len(self._outcomes) >= self.min_calls
+                    and self._failures / len(self._outcomes) >= self.failure_rate):
+                self._open()
+
+    def _open(self):
+        self.state = 'open'
+        self.opened_at = time.monotonic()
+        self.trips += 1
+        self._outcomes.clear()
+        self._failures = 0
+
+    def stats(self):
+        with self._lock:
+            return {'state': self.state, 'trips': self.trips, 'rejected': self.rejected}
+
+
+class Upstream:
+    """One outbound dependency: a keep-alive session plus its retry policy and metrics."""
+
+    def __init__(self, name, pool_size=10, retries=1, backoff=0.2, timeout=10, retry_ratio=0.2, breaker=None):
+        self.name = name
+        self.breaker = breaker or CircuitBreaker()
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.budget = RetryBudget(ratio=retry_ratio)
+        self.latency = LatencyHistogram()
+        self.requests = 0
+        self.errors = 0
+        self.retried = 0
+        self.status_codes = {}
+        self._lock = threading.Lock()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def _count(self, status=None, error=False, retried=False):
+        with self._lock:
+            if status is not None:
+                key = str(status)
+                self.status_codes[key] = self.status_codes.get(key, 0) + 1
+            if error:
+                self.errors += 1
+            if retried:
+                self.retried += 1
+
+    def request(self, method, url, deadline=None, **kwargs):
+        """Send a request, retrying per policy.
+
+        `timeout` bounds each attempt. `deadline` (a time.monotonic() value,
+        by default `timeout` from now) bounds the call as a whole: attempts are
+        cut to the time that is left, and no retry or backoff starts once it
+        has passed. Non-idempotent methods are retried only on connect errors
+        and 429/503, never after a read timeout.
+        """
+        timeout = kwargs.pop('timeout', self.timeout)
+        if deadline is None:
+            deadline = time.monotonic() + timeout
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+        retry_status_codes = RETRY_STATUS_CODES if idempotent else NON_IDEMPOTENT_RETRY_STATUS_CODES
+        with self._lock:
+            self.requests += 1
+        self.budget.deposit()
+
+        attempt = 0
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise requests.Timeout(f"Deadline passed before calling upstream '{self.name}'")
+            if not self.breaker.allow():
+                raise CircuitOpenError(f"Circuit open for upstream '{self.name}'")
+
+            started = time.perf_counter()
+            try:
+                response = self.session.request(method, url, timeout=min(timeout, remaining), **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                elapsed_ms = (time.perf_counter() - started) * 1000.0
+                self.latency.observe(elapsed_ms)
+                self.breaker.record(False, elapsed_ms)
+                self._count(error=True)
+                # Past the connect, the server may already be working on a POST; do not send it twice
+                if not idempotent and not connect_failed(e):
+                    raise
+                delay = self._retry_delay(attempt, deadline)
+                if delay is None:
+                    raise
+            except Exception:
+                # Unexpected failures still count, and must release a half-open probe
+                self.breaker.record(False)
+                self._count(error=True)
+                raise
+            else:
+                elapsed_ms = (time.perf_counter() - started) * 1000.0
+                self.latency.observe(elapsed_ms)
+                self.breaker.record(response.status_code not in RETRY_STATUS_CODES, elapsed_ms)
+                self._count(status=response.status_code, error=response.status_code >= 500)
+                if response.status_code not in retry_status_codes:
+                    return response
+                delay = self._retry_delay(attempt, deadline)
+                if delay is None:
+                    return response
+                response.close()
+
+            self._count(retried=True)
+            time.sleep(delay)
+            attempt += 1
+
+    def _retry_delay(self, attempt, deadline):
+        """Backoff before the next attempt, or None when there should not be one."""
+        if attempt >= self.retries:
+            return None
+        # Exponential backoff with full jitter
+        delay = random.uniform(0, self.backoff * (2 ** attempt))
+        if time.monotonic() + delay + MIN_ATTEMPT_SECONDS >= deadline:
+            return None
+        if not self.budget.withdraw():
+            return None
+        return delay
+
+    def stats(self):
+        with self._lock:
+            counters = {
+                'requests': self.requests,
+                'errors': self.errors,
+                'retries': self.retried,
+                'status_codes': dict(self.status_codes)
+            }
+        counters['retry_tokens'] = round(self.budget.tokens, 2)
+        counters['circuit'] = self.breaker.stats()
+        counters['latency_ms'] = self.latency.snapshot()
+        counters['latency_p50_ms'] = self.latency.quantile(0.5)
+        counters['latency_p99_ms'] = self.latency.quantile(0.99)
+        return counters
+
+
+class OutboundClient:
+    """Registry of named upstreams sharing process-wide connection pools."""
+
+    def __init__(self):
+        self.upstreams = {}
+
+    def register(self, name, **options):
+        self.upstreams[name] = Upstream(name, **options)
+        return self.upstreams[name]
+
+    def request(self, name, method, url, **kwargs):
+        return self.upstreams[name].request(method, url, **kwargs)
+
+    def get(self, name, url, **kwargs):
+        return self.request(name, 'GET', url, **kwargs)
+
+    def post(self, name, url, **kwargs):
+        return self.request(name, 'POST', url, **kwargs)
+
+    def stats(self):
+        return {name: upstream.stats() for name, upstream in self.upstreams.items()}
+
+
+def _breaker(slow_call_ms):
+    return CircuitBreaker(
+        window=int(os.environ.get('BREAKER_WINDOW', 20)),
+        min_calls=int(os.environ.get('BREAKER_MIN_CALLS', 5)),
+        failure_rate=float(os.environ.get('BREAKER_FAILURE_RATE', 0.5)),
+        slow_call_ms=slow_call_ms,
+        cooldown=float(os.environ.get('BREAKER_COOLDOWN', 30))
+    )
+
+
+def build_default_client():
+    """Client with the upstreams app.py talks to, sized from the environment.
+
+    Each timeout is the budget for a whole call, retries and backoff included.
+    """
+    pool_size = int(os.environ.get('OUTBOUND_POOL_SIZE', 10))
+    retries = int(os.environ.get('OUTBOUND_RETRIES', 1))
+    client = OutboundClient()
+    client.register('groq', pool_size=pool_size, retries=retries, timeout=20, breaker=_breaker(5000))
+    client.register('google_translate', pool_size=pool_size, retries=retries, timeout=10, breaker=_breaker(3000))
+    client.register('google_places', pool_size=pool_size, retries=retries, timeout=12, breaker=_breaker(5000))
+    return client
@@ -0,0 +1,95 @@
+import numpy as np
+
+
+class NaiveBayesEngine:
+    """Compact MultinomialNB scorer built from a fitted model's log-probabilities.
+
+    Inputs are binary symptom vectors, so the joint log-likelihood of a request
+    is just the class log-prior plus the sum of the feature log-prob rows for
+    the active symptom indices. No DataFrame or sklearn validation is involved.
+    """
+
+    def __init__(self, classes, feature_log_prob, class_log_prior):
+        self.classes = np.asarray(classes)
+        # (n_features, n_classes) so a request gathers contiguous rows
+        self.feature_log_prob_t = np.ascontiguousarray(np.asarray(feature_log_prob, dtype=np.float64).T)
+        self.class_log_prior = np.ascontiguousarray(class_log_prior, dtype=np.float64)
+        self.n_features = self.feature_log_prob_t.shape[0]
+
+    @classmethod
+    def from_model(cls, model):
+        return cls(model.classes_, model.feature_log_prob_, model.class_log_prior_)
+
+    @classmethod
+    def from_arrays(cls, classes, feature_log_prob_t, class_log_prior):
+        """Wrap already-transposed arrays (e.g. read-only memory maps) without copying."""
+        engine = cls.__new__(cls)
+        engine.classes = np.asarray(classes)
+        engine.feature_log_prob_t = np.asarray(feature_log_prob_t)
+        engine.class_log_prior = np.asarray(class_log_prior)
+        engine.n_features = engine.feature_log_prob_t.shape[0]
+        return engine
+
+    def joint_log_likelihood(self, indices):
+        """Unnormalized class log-scores for one set of symptom indices."""
+        if len(indices) == 0:
+            return self.class_log_prior.copy()
+        return self.feature_log_prob_t[indices].sum(axis=0) + self.class_log_prior
+
+    def predict_proba(self, indices):
+        """Class probabilities for one set of active symptom indices."""
+        jll = self.joint_log_likelihood(np.asarray(indices, dtype=np.intp))
+        return _normalize_log_probs(jll)
+
+    def predict_proba_matrix(self, matrix):
+        """Class probabilities for every row of a (sparse) binary symptom matrix."""
+        jll = np.asarray(matrix @ self.feature_log_prob_t) + self.class_log_prior
+        return _normalize_log_probs(jll)
+
+
+def _normalize_log_probs(jll):
+    """Log-sum-exp normalization, same formulation as sklearn's predict_proba."""
+    jll_max = np.max(jll, axis=-1, keepdims=True)
+    log_norm = jll_max + np.log(np.sum(np.exp(jll - jll_max), axis=-1, keepdims=True))
+    return np.exp(jll - log_norm)
+
+
+def rank_top_k(probas, top_k):
+    """Indices of the top_k classes, highest probability first.
+
+    argpartition selects the candidates in O(n); only those k are sorted.
+    """
+    n = probas.shape[-1]
+    top_k = max(1, min(int(top_k), n))
+    if top_k == n:
+        candidates = np.arange(n)
+    else:
+        candidates = np.argpartition(-probas, top_k - 1)[:top_k]
+    return candidates[np.argsort(-probas[candidates], kind='stable')]
+
+
+def rank_by_coverage(probas, coverage, max_k=None):
+    """Smallest top-ranked set of classes whose cumulative probability reaches coverage.
+
+    The candidate window doubles until the mass is covered, so a confident
+    prediction never pays for sorting the whole class list.
+    """
+    n = probas.shape[-1]
+    limit = n if max_k is None else max(1, min(int(max_k), n))
+    k = min(4, limit)
+    while True:
+        ranked = rank_top_k(probas, k)
+        cumulative = np.cumsum(probas[ranked])
+        hit = int(np.searchsorted(cumulative, coverage))
+        if hit < k:
+            return ranked[:hit + 1]
+        if k >= limit:
+            return ranked
+        k = min(k * 2, limit)
+
+
+def rank_classes(probas, top_k=3, coverage=None, max_k=None):
+    """Rank by cumulative-probability cutoff when coverage is given, else top_k."""
+    if coverage is not None:
+        return rank_by_coverage(probas, coverage, max_k=max_k)
+    return rank_top_k(probas, top_k)
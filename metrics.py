@@ -0,0 +1,250 @@
+"""Request and stage metrics in Prometheus text format, summed across workers.
+
+Each process keeps counters and fixed-bucket histograms in memory (an
+observation is a bisect plus a locked increment). A per-process exporter
+thread writes a JSON snapshot to <directory>/worker-<pid>.json every few
+seconds; /metrics renders this process's live values merged with the
+snapshots of its sibling workers. Snapshots of workers that have exited are
+kept so counters stay monotonic; gunicorn.conf.py clears the directory when
+the master starts.
+"""
+import atexit
+import glob
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from file_locks import atomic_write_json
+from http_client import LatencyHistogram
+
+STAGE_BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 10000)
+
+
+def label_key(labels):
+    return tuple(sorted((str(k), str(v)) for k, v in (labels or {}).items()))
+
+
+def format_labels(key, extra=None):
+    pairs = list(key) + list(extra or [])
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{k}="{escape_label(v)}"' for k, v in pairs) + '}'
+
+
+def escape_label(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def clear_snapshots(directory):
+    for path in glob.glob(os.path.join(directory, 'worker-*.json')):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+class Metrics:
+    def __init__(self, directory=None, flush_interval=5.0, namespace='dipex'):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.namespace = namespace
+        self._counters = {}     # (name, label_key) -> value
+        self._histograms = {}   # (name, label_key) -> LatencyHistogram
+        self._help = {}
+        self._collectors = []
+        self._ratios = []
+        self._lock = threading.Lock()
+        self._exporter_pid = None
+
+    def describe(self, name, help_text):
+        self._help[f"{self.namespace}_{name}"] = help_text
+
+    def inc(self, name, labels=None, value=1):
+        key = (f"{self.namespace}_{name}", label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, elapsed_ms, labels=None, buckets=STAGE_BUCKETS_MS):
+        """Record a duration in ms into histogram `name` (which should end in _seconds)."""
+        key = (f"{self.namespace}_{name}", label_key(labels))
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(key, LatencyHistogram(buckets))
+        histogram.observe(elapsed_ms)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, (time.perf_counter() - started) * 1000.0, labels)
+
+    def add_collector(self, collector):
+        """collector() -> {'counters': [(name, labels, value)], 'gauges': [...],
+        'histograms': [(name, labels, LatencyHistogram)]}, evaluated at snapshot time."""
+        self._collectors.append(collector)
+
+    def add_ratio(self, name, numerator, denominator):
+        """Gauge `name` = sum(numerator) / sum(denominator counters), over all workers."""
+        self._ratios.append((f"{self.namespace}_{name}", f"{self.namespace}_{numerator}",
+                             [f"{self.namespace}_{d}" for d in denominator]))
+
+    def snapshot(self):
+        with self._lock:
+            counters = [[name, dict(key), value] for (name, key), value in self._counters.items()]
+            histograms = list(self._histograms.items())
+        gauges = []
+        histogram_rows = [[name, dict(key), h.buckets, h.snapshot()] for (name, key), h in histograms]
+
+        for collector in self._collectors:
+            try:
+                extra = collector()
+            except Exception as e:
+                print(f"Metrics collector warning: {e}")
+                continue
+            counters += [[f"{self.namespace}_{n}", dict(l or {}), v] for n, l, v in extra.get('counters', ())]
+            gauges += [[f"{self.namespace}_{n}", dict(l or {}), v] for n, l, v in extra.get('gauges', ())]
+            histogram_rows += [[f"{self.namespace}_{n}", dict(l or {}), h.buckets, h.snapshot()]
+                               for n, l, h in extra.get('histograms', ())]
+
+        return {
+            'pid': os.getpid(),
+            'ppid': os.getppid(),
+            'written_at': time.time(),
+            'counters': counters,
+            'gauges': gauges,
+            'histograms': [
+                [name, labels, list(buckets), [row['buckets'][b] for b in row['buckets']], row['sum_ms'], row['count']]
+                for name, labels, buckets, row in histogram_rows
+            ]
+        }
+
+    def start_exporter(self):
+        """Begin writing this worker's snapshots (once per process; threads do not survive fork)."""
+        if not self.directory or self._exporter_pid == os.getpid():
+            return
+        with self._lock:
+            if self._exporter_pid == os.getpid():
+                return
+            if self._exporter_pid is not None:
+                # Forked from a process that already counted; those counts are its own
+                self._counters.clear()
+                self._histograms.clear()
+            self._exporter_pid = os.getpid()
+        threading.Thread(target=self._run_exporter, name='metrics-exporter', daemon=True).start()
+        atexit.register(self.export)
+
+    def _run_exporter(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self.export()
+
+    def export(self):
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            atomic_write_json(os.path.join(self.directory, f"worker-{os.getpid()}.json"), self.snapshot())
+        except Exception as e:
+            print(f"Metrics export warning: {e}")
+
+    def _sibling_snapshots(self):
+        if not self.directory:
+            return []
+        snapshots = []
+        for path in glob.glob(os.path.join(self.directory, 'worker-*.json')):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if snapshot.get('pid') == os.getpid():
+                continue
+            # Live workers, plus exited workers of the same master (their counts still happened)
+            if pid_alive(snapshot['pid']) or snapshot.get('ppid') == os.getppid():
+                snapshots.append(snapshot)
+        return snapshots
+
+    def collect(self):
+        """Counters, gauges and histograms summed over this process and its sibling workers."""
+        snapshots = [self.snapshot()] + self._sibling_snapshots()
+        counters, gauges, histograms = {}, {}, {}
+        for snapshot in snapshots:
+            for name, labels, value in snapshot['counters']:
+                key = (name, label_key(labels))
+                counters[key] = counters.get(key, 0) + value
+            for name, labels, value in snapshot['gauges']:
+                key = (name, label_key(labels))
+                gauges[key] = gauges.get(key, 0) + value
+            for name, labels, buckets, counts, sum_ms, count in snapshot['histograms']:
+                key = (name, label_key(labels))
+                merged = histograms.get(key)
+                if merged is None:
+                    histograms[key] = [list(buckets), list(counts), sum_ms, count]
+                elif merged[0] == list(buckets):
+                    merged[1] = [a + b for a, b in zip(merged[1], counts)]
+                    merged[2] += sum_ms
+                    merged[3] += count
+        return counters, gauges, histograms, len(snapshots)
+
+    def render(self):
+        counters, gauges, histograms, workers = self.collect()
+        lines = []
+
+        def header(name, kind):
+            if name in self._help:
+                lines.append(f"# HELP {name} {self._help[name]}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        for kind, samples in (('counter', counters), ('gauge', gauges)):
+            current = None
+            for name, key in sorted(samples):
+                if name != current:
+                    header(name, kind)
+                    current = name
+                lines.append(f"{name}{format_labels(key)} {format_value(samples[(name, key)])}")
+
+        current = None
+        for name, key in sorted(histograms):
+            buckets, counts, sum_ms, count = histograms[(name, key)]
+            if name != current:
+                header(name, 'histogram')
+                current = name
+            running = 0
+            for bound, bucket_count in zip(list(buckets) + [float('inf')], counts):
+                running += bucket_count
+                # Observations are in milliseconds; exported series are in seconds
+                le = '+Inf' if bound == float('inf') else format(bound / 1000.0, 'g')
+                lines.append(f"{name}_bucket{format_labels(key, [('le', le)])} {running}")
+            lines.append(f"{name}_sum{format_labels(key)} {format_value(round(sum_ms / 1000.0, 6))}")
+            lines.append(f"{name}_count{format_labels(key)} {count}")
+
+        totals = {}
+        for (name, _), value in counters.items():
+            totals[name] = totals.get(name, 0) + value
+        for name, numerator, denominator in self._ratios:
+            total = sum(totals.get(d, 0) for d in denominator)
+            header(name, 'gauge')
+            lines.append(f"{name} {format_value(totals.get(numerator, 0) / total if total else 0.0)}")
+
+        header(f"{self.namespace}_metrics_workers", 'gauge')
+        lines.append(f"{self.namespace}_metrics_workers {workers}")
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,120 @@
+"""On-disk model artifact: raw .npy weights plus a JSON manifest.
+
+Layout of an artifact directory:
+
+    manifest.json              format, classes, symptoms, source info, checksums
+    feature_log_prob_t.npy     (n_features, n_classes) float64, C order
+    class_log_prior.npy        (n_classes,) float64
+    feature_count.npy          optional (n_classes, n_features) training counts
+    class_count.npy            optional (n_classes,) training counts
+
+The optional count arrays let train_models.py update the model incrementally.
+
+Workers open the arrays with np.load(mmap_mode='r'), so every process maps
+the same page-cache copy and startup does no unpickling.
+"""
+import json
+import os
+import tempfile
+
+import numpy as np
+
+from file_locks import atomic_write_json
+from training_data import file_sha256
+
+ARTIFACT_FORMAT_VERSION = 1
+MANIFEST_NAME = 'manifest.json'
+ARRAY_NAMES = ('feature_log_prob_t', 'class_log_prior')
+OPTIONAL_ARRAY_NAMES = ('feature_count', 'class_count')
+
+
+class ArtifactError(ValueError):
+    """The artifact is missing, from another format version, or corrupt."""
+
+
+def _write_array(directory, name, array):
+    path = os.path.join(directory, f"{name}.npy")
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{name}.", suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            np.save(f, np.ascontiguousarray(array, dtype=np.float64), allow_pickle=False)
+            f.flush()
+            os.fsync(f.fileno())
+        # Workers that already mapped the old file keep their inode
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return path
+
+
+def save_artifact(directory, classes, symptoms, feature_log_prob_t, class_log_prior, metadata=None,
+                  feature_count=None, class_count=None):
+    """Write the arrays, then the manifest that vouches for them (last, atomically)."""
+    os.makedirs(directory, exist_ok=True)
+    arrays = {'feature_log_prob_t': feature_log_prob_t, 'class_log_prior': class_log_prior}
+    if feature_count is not None and class_count is not None:
+        arrays.update(feature_count=feature_count, class_count=class_count)
+    manifest_arrays = {}
+    for name in arrays:
+        path = _write_array(directory, name, arrays[name])
+        manifest_arrays[name] = {
+            'file': os.path.basename(path),
+            'dtype': 'float64',
+            'shape': list(np.shape(arrays[name])),
+            'sha256': file_sha256(path)
+        }
+
+    manifest = {
+        'format_version': ARTIFACT_FORMAT_VERSION,
+        'classes': [str(c) for c in classes],
+        'symptoms': list(symptoms),
+        'arrays': manifest_arrays
+    }
+    manifest.update(metadata or {})
+    atomic_write_json(os.path.join(directory, MANIFEST_NAME), manifest)
+    return manifest
+
+
+def read_manifest(directory):
+    path = os.path.join(directory, MANIFEST_NAME)
+    if not os.path.exists(path):
+        raise ArtifactError(f"No artifact manifest at {path}")
+    with open(path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    if manifest.get('format_version') != ARTIFACT_FORMAT_VERSION:
+        raise ArtifactError(f"Unsupported artifact format {manifest.get('format_version')!r}")
+    return manifest
+
+
+def load_artifact(directory, verify=True):
+    """Return (manifest, {name: read-only memory-mapped array}).
+
+    With verify=True every array file is checked against its manifest
+    checksum before it is mapped.
+    """
+    manifest = read_manifest(directory)
+    n_classes = len(manifest['classes'])
+    expected_shapes = {
+        'feature_log_prob_t': [len(manifest['symptoms']), n_classes],
+        'class_log_prior': [n_classes],
+        'feature_count': [n_classes, len(manifest['symptoms'])],
+        'class_count': [n_classes]
+    }
+
+    arrays = {}
+    for name in ARRAY_NAMES + OPTIONAL_ARRAY_NAMES:
+        spec = manifest['arrays'].get(name)
+        if not spec:
+            if name in OPTIONAL_ARRAY_NAMES:
+                continue
+            raise ArtifactError(f"Manifest does not list array '{name}'")
+        path = os.path.join(directory, os.path.basename(spec['file']))
+        if verify and file_sha256(path) != spec['sha256']:
+            raise ArtifactError(f"Checksum mismatch for {path}")
+        array = np.load(path, mmap_mode='r', allow_pickle=False)
+        if list(array.shape) != expected_shapes[name] or array.dtype != np.float64:
+            raise ArtifactError(f"{path} has shape {array.shape} / {array.dtype}, expected {expected_shapes[name]}")
+        arrays[name] = array
+    return manifest, arrays
@@ -0,0 +1,171 @@
+"""Versioned model artifacts with an atomically switched active pointer.
+
+    model_artifacts/registry/
+        v0001/          one artifact directory per version (see model_artifact.py)
+        v0002/
+        CURRENT.json    {"version": "v0002", "activated_at": ...}
+
+Published versions are never modified; activating one only rewrites
+CURRENT.json, which every worker polls to pick up the change.
+
+    python model_registry.py list
+    python model_registry.py publish model_artifacts/symptom_model [--activate]
+    python model_registry.py activate v0002
+"""
+import argparse
+import json
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from file_locks import lock_manager, atomic_write_json
+from model_artifact import read_manifest
+
+# Share of each disease's training rows used for validation when there is no holdout CSV
+HOLDOUT_FRACTION = 0.2
+
+DEFAULT_REGISTRY_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), 'model_artifacts', 'registry'
+)
+POINTER_NAME = 'CURRENT.json'
+VERSION_PATTERN = re.compile(r'^v(\d+)$')
+
+
+class ModelRegistry:
+    def __init__(self, root=DEFAULT_REGISTRY_DIR):
+        self.root = root
+
+    def path(self, version):
+        if not VERSION_PATTERN.match(str(version)):
+            raise ValueError(f"Invalid model version {version!r}")
+        return os.path.join(self.root, version)
+
+    def versions(self):
+        if not os.path.isdir(self.root):
+            return []
+        found = [name for name in os.listdir(self.root)
+                 if VERSION_PATTERN.match(name) and os.path.isdir(os.path.join(self.root, name))]
+        return sorted(found, key=lambda name: int(VERSION_PATTERN.match(name).group(1)))
+
+    def current(self):
+        """The active pointer ({'version', 'activated_at'}), or None."""
+        try:
+            with open(os.path.join(self.root, POINTER_NAME), 'r', encoding='utf-8') as f:
+                pointer = json.load(f)
+            return pointer if pointer.get('version') in self.versions() else None
+        except (OSError, ValueError):
+            return None
+
+    def current_version(self):
+        pointer = self.current()
+        return pointer['version'] if pointer else None
+
+    def lock(self, name):
+        """Cross-process lock for registry-wide steps (e.g. numbering new versions)."""
+        os.makedirs(self.root, exist_ok=True)
+        return lock_manager.lock(os.path.join(self.root, name)).acquire()
+
+    def publish(self, artifact_dir):
+        """Copy a valid artifact directory in as the next version; returns its name."""
+        read_manifest(artifact_dir)
+        os.makedirs(self.root, exist_ok=True)
+        staging = tempfile.mkdtemp(dir=self.root, prefix='.publish-')
+        try:
+            for name in os.listdir(artifact_dir):
+                source = os.path.join(artifact_dir, name)
+                if os.path.isfile(source) and not name.startswith('.'):
+                    shutil.copy2(source, os.path.join(staging, name))
+            with self.lock('versions'):
+                existing = self.versions()
+                number = int(VERSION_PATTERN.match(existing[-1]).group(1)) + 1 if existing else 1
+                version = f"v{number:04d}"
+                os.rename(staging, os.path.join(self.root, version))
+            return version
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+    def activate(self, version):
+        if version not in self.versions():
+            raise ValueError(f"Unknown model version {version!r}")
+        atomic_write_json(os.path.join(self.root, POINTER_NAME), {
+            'version': version,
+            'activated_at': int(time.time())
+        })
+
+
+def load_holdout(holdout_path, training_path, fraction=HOLDOUT_FRACTION, seed=0):
+    """Labelled rows in Training.csv layout to validate models on, and where they came from.
+
+    Uses the holdout CSV when it exists. Otherwise a stratified `fraction` of
+    the training CSV: the model has seen those rows, so accuracy reads high,
+    but a broken or mislabelled artifact still fails. Raises ValueError when
+    neither file exists.
+    """
+    if holdout_path and os.path.exists(holdout_path):
+        return read_labelled_csv(holdout_path), os.path.basename(holdout_path)
+    if training_path and os.path.exists(training_path):
+        df = read_labelled_csv(training_path)
+        sample = df.groupby('prognosis', group_keys=False).sample(frac=fraction, random_state=seed)
+        return sample, f"{os.path.basename(training_path)} (stratified {fraction:.0%} split)"
+    raise ValueError(f"No holdout set: neither {holdout_path} nor {training_path} exists")
+
+
+def read_labelled_csv(path):
+    df = pd.read_csv(path)
+    return df.loc[:, ~df.columns.str.contains('^Unnamed')]
+
+
+def evaluate_holdout(engine, symptoms, df):
+    """Top-1 accuracy of an engine on labelled rows (see load_holdout)."""
+    missing = [s for s in symptoms if s not in df.columns]
+    if missing or 'prognosis' not in df.columns:
+        raise ValueError(f"Holdout set lacks columns: {', '.join(missing[:5]) or 'prognosis'}")
+
+    matrix = sparse.csr_matrix(df[symptoms].to_numpy(dtype=np.float64))
+    probas = engine.predict_proba_matrix(matrix)
+    predicted = engine.classes[np.argmax(probas, axis=1)]
+    labels = df['prognosis'].astype(str).str.strip().to_numpy()
+    return {'rows': int(len(df)), 'accuracy': round(float(np.mean(predicted == labels)), 4)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Manage versioned model artifacts')
+    parser.add_argument('--root', default=DEFAULT_REGISTRY_DIR)
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('list')
+    publish = commands.add_parser('publish')
+    publish.add_argument('artifact_dir')
+    publish.add_argument('--activate', action='store_true')
+    activate = commands.add_parser('activate')
+    activate.add_argument('version')
+    args = parser.parse_args(argv)
+
+    registry = ModelRegistry(args.root)
+    if args.command == 'list':
+        active = registry.current_version()
+        for version in registry.versions():
+            manifest = read_manifest(registry.path(version))
+            marker = '*' if version == active else ' '
+            print(f"{marker} {version}  classes={len(manifest['classes'])}  created_at={manifest.get('created_at')}")
+    elif args.command == 'publish':
+        version = registry.publish(args.artifact_dir)
+        print(f"Published {version}")
+        if args.activate:
+            registry.activate(version)
+            print(f"Activated {version}")
+    else:
+        registry.activate(args.version)
+        print(f"Activated {args.version}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,246 @@
+"""Canary and shadow routing between interchangeable symptom models.
+
+Any object with the attributes the request path uses can serve traffic:
+
+    name, version, generation        identity (generation keys the prediction cache)
+    all_symptoms, symptom_index, symptom_set
+    engine.classes, engine.predict_proba(indices), engine.predict_proba_matrix(matrix)
+
+app.SymptomPredictor (MultinomialNB) satisfies it directly; ForestModel adapts
+the calibrated RandomForest from symptom_predictor.py, either freshly trained
+or loaded from a directory written by `train_models.py forest`:
+
+    forest.joblib    the fitted CalibratedClassifierCV
+    manifest.json    symptoms, classes, source info and the pickle's sha256
+"""
+import itertools
+import json
+import os
+import random
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+import joblib
+import numpy as np
+
+from file_locks import atomic_write_json
+from http_client import LatencyHistogram
+from training_data import file_sha256
+
+FOREST_FILE = 'forest.joblib'
+FOREST_MANIFEST = 'manifest.json'
+
+# Scoring latency spans ~10us (NB) to tens of ms (calibrated forest)
+SCORING_BUCKETS_MS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 1000)
+
+
+class ForestEngine:
+    """Engine interface over a fitted sklearn classifier with predict_proba."""
+
+    def __init__(self, model, n_features):
+        self.model = model
+        self.classes = np.asarray(model.classes_)
+        self.n_features = n_features
+
+    def predict_proba(self, indices):
+        row = np.zeros((1, self.n_features))
+        row[0, list(indices)] = 1.0
+        return self.model.predict_proba(row)[0]
+
+    def predict_proba_matrix(self, matrix):
+        dense = matrix.toarray() if hasattr(matrix, 'toarray') else np.asarray(matrix)
+        return self.model.predict_proba(dense)
+
+
+class ForestModel:
+    """symptom_predictor.SymptomPredictor (calibrated RandomForest) as a routable model."""
+
+    _generations = itertools.count(1)
+
+    def __init__(self, model, symptoms, version='forest'):
+        self.name = 'random_forest'
+        self.version = version
+        self.generation = f"{self.name}:{next(self._generations)}"
+        self.all_symptoms = list(symptoms)
+        self.symptom_index = {symptom: idx for idx, symptom in enumerate(self.all_symptoms)}
+        self.symptom_set = set(self.all_symptoms)
+        self.engine = ForestEngine(model, len(self.all_symptoms))
+
+    @classmethod
+    def from_predictor(cls, forest_predictor, version='forest'):
+        return cls(forest_predictor.model, forest_predictor.all_symptoms, version=version)
+
+    @classmethod
+    def load(cls, directory):
+        """Load a saved forest; the pickle is checked against its manifest before unpickling."""
+        with open(os.path.join(directory, FOREST_MANIFEST), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        path = os.path.join(directory, FOREST_FILE)
+        if file_sha256(path) != manifest['sha256']:
+            raise ValueError(f"Checksum mismatch for {path}")
+        model = joblib.load(path)
+        return cls(model, manifest['symptoms'], version=manifest.get('version') or os.path.basename(directory))
+
+
+def save_forest(directory, forest_predictor, metadata=None):
+    """Write a fitted symptom_predictor.SymptomPredictor so ForestModel.load can serve it."""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, FOREST_FILE)
+    joblib.dump(forest_predictor.model, path)
+    manifest = {
+        'version': os.path.basename(os.path.normpath(directory)),
+        'symptoms': list(forest_predictor.all_symptoms),
+        'classes': [str(c) for c in forest_predictor.model.classes_],
+        'sha256': file_sha256(path)
+    }
+    manifest.update(metadata or {})
+    # Written last, so a directory with a manifest always has the matching pickle
+    atomic_write_json(os.path.join(directory, FOREST_MANIFEST), manifest)
+    return manifest
+
+
+class ModelStats:
+    def __init__(self):
+        self.latency = LatencyHistogram(SCORING_BUCKETS_MS)
+        self.served = 0
+        self.cache_hits = 0
+        self.compared = 0
+        self.agreed = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def serve(self):
+        with self._lock:
+            self.served += 1
+
+    def cache_hit(self):
+        with self._lock:
+            self.cache_hits += 1
+
+    def compare(self, agreed):
+        with self._lock:
+            self.compared += 1
+            if agreed:
+                self.agreed += 1
+
+    def error(self):
+        with self._lock:
+            self.errors += 1
+
+    def snapshot(self):
+        with self._lock:
+            counters = {
+                'served': self.served,
+                'cache_hits': self.cache_hits,
+                'compared': self.compared,
+                'agreement_rate': round(self.agreed / self.compared, 4) if self.compared else None,
+                'errors': self.errors
+            }
+        counters['latency_ms'] = self.latency.snapshot()
+        counters['latency_p50_ms'] = self.latency.quantile(0.5)
+        counters['latency_p99_ms'] = self.latency.quantile(0.99)
+        return counters
+
+
+def top_class(model, indices):
+    probas = model.engine.predict_proba(indices)
+    return model.engine.classes[int(np.argmax(probas))]
+
+
+class ModelRouter:
+    """Sends a share of requests to a canary and mirrors traffic to a shadow model.
+
+    Canary assignment hashes the routing key (the patient id) so a patient
+    keeps seeing the same model; anonymous requests are assigned at random.
+    Shadow scoring runs on a small pool off the request path and is dropped,
+    not queued, once `shadow_backlog` jobs are pending. Agreement is top-1
+    agreement with the primary model.
+    """
+
+    def __init__(self, canary=None, canary_percent=0.0, shadow=None, shadow_percent=100.0,
+                 shadow_workers=1, shadow_backlog=100):
+        self.canary = canary
+        self.canary_percent = max(0.0, min(float(canary_percent), 100.0))
+        self.shadow = shadow
+        self.shadow_percent = max(0.0, min(float(shadow_percent), 100.0))
+        self.shadow_backlog = shadow_backlog
+        self.shadow_dropped = 0
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=shadow_workers, thread_name_prefix='shadow') if shadow else None
+        self.stats = {}
+
+    def _stats(self, name):
+        stats = self.stats.get(name)
+        if stats is None:
+            with self._lock:
+                stats = self.stats.setdefault(name, ModelStats())
+        return stats
+
+    def choose(self, primary, routing_key=None):
+        """The model that should serve this request."""
+        if self.canary is None or self.canary_percent <= 0:
+            return primary
+        if routing_key and routing_key != 'anonymous':
+            bucket = zlib.crc32(routing_key.encode('utf-8')) % 10000 / 100.0
+        else:
+            bucket = random.uniform(0, 100)
+        return self.canary if bucket < self.canary_percent else primary
+
+    def record_latency(self, model, elapsed_ms):
+        """Time a served model spent scoring a prediction-cache miss."""
+        self._stats(model.name).latency.observe(elapsed_ms)
+
+    def record_cache_hit(self, model):
+        self._stats(model.name).cache_hit()
+
+    def record_served(self, model):
+        self._stats(model.name).serve()
+
+    def compare_with_primary(self, primary, served, symptoms, served_disease):
+        """After a canary answered, check whether the primary would have agreed."""
+        if served is primary:
+            return
+        try:
+            indices = [primary.symptom_index[s] for s in symptoms]
+            self._stats(served.name).compare(top_class(primary, indices) == served_disease)
+        except Exception:
+            self._stats(served.name).error()
+
+    def mirror(self, symptoms, primary_disease):
+        """Score the shadow model asynchronously and compare it with the primary answer."""
+        if self._pool is None or random.uniform(0, 100) >= self.shadow_percent:
+            return
+        with self._lock:
+            if self._pending >= self.shadow_backlog:
+                self.shadow_dropped += 1
+                return
+            self._pending += 1
+        self._pool.submit(self._run_shadow, list(symptoms), primary_disease)
+
+    def _run_shadow(self, symptoms, primary_disease):
+        shadow = self.shadow
+        stats = self._stats(shadow.name)
+        try:
+            started = time.perf_counter()
+            indices = [shadow.symptom_index[s] for s in symptoms if s in shadow.symptom_index]
+            disease = top_class(shadow, indices)
+            stats.latency.observe((time.perf_counter() - started) * 1000.0)
+            stats.compare(disease == primary_disease)
+        except Exception:
+            stats.error()
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def snapshot(self):
+        return {
+            'canary': self.canary.name if self.canary else None,
+            'canary_percent': self.canary_percent,
+            'shadow': self.shadow.name if self.shadow else None,
+            'shadow_percent': self.shadow_percent,
+            'shadow_dropped': self.shadow_dropped,
+            'models': {name: stats.snapshot() for name, stats in list(self.stats.items())}
+        }
@@ -0,0 +1,167 @@
+"""Opt-in sampling profiler for production requests, written as flamegraph input.
+
+A sampled request registers its thread with a per-process sampler thread,
+which reads the thread's Python stack from sys._current_frames() every
+`interval_ms` while it runs. Stacks are aggregated per route and written to
+<directory>/<METHOD>_<route>.<pid>.collapsed in the collapsed format
+("frame;frame;frame count") that flamegraph.pl and speedscope read:
+
+    cat profiles/POST_api_predict.*.collapsed | flamegraph.pl > predict.svg
+
+Stack sampling is used instead of cProfile because cProfile cannot run for
+more than one thread at a time and records callers, not whole stacks.
+Unsampled requests only pay for one attribute check and one dict lookup.
+"""
+import atexit
+import hmac
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+
+
+def frame_label(frame):
+    code = frame.f_code
+    module = frame.f_globals.get('__name__', os.path.basename(code.co_filename))
+    return f"{module}:{getattr(code, 'co_qualname', code.co_name)}".replace(';', ',')
+
+
+def route_slug(method, rule):
+    return f"{method}_{re.sub(r'[^A-Za-z0-9]+', '_', rule).strip('_') or 'index'}"
+
+
+class SamplingProfiler:
+    def __init__(self, directory, interval_ms=1.0, flush_interval=10.0):
+        self.directory = directory
+        self.interval = interval_ms / 1000.0
+        self.flush_interval = flush_interval
+        self.stacks = {}        # route slug -> Counter of collapsed stacks
+        self.requests = Counter()
+        self._active = {}       # thread id -> (route slug, base frame)
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._sampler_pid = None
+        self._dirty = False
+
+    def begin(self, slug, base_frame):
+        self._start_sampler()
+        with self._lock:
+            self._active[threading.get_ident()] = (slug, base_frame)
+            self.requests[slug] += 1
+        self._wakeup.set()
+
+    def end(self):
+        with self._lock:
+            self._active.pop(threading.get_ident(), None)
+
+    def _start_sampler(self):
+        # Threads do not survive fork, so each worker starts its own sampler
+        if self._sampler_pid == os.getpid():
+            return
+        with self._lock:
+            if self._sampler_pid == os.getpid():
+                return
+            self._sampler_pid = os.getpid()
+        threading.Thread(target=self._run_sampler, name='profile-sampler', daemon=True).start()
+        atexit.register(self.flush)
+
+    def _run_sampler(self):
+        last_flush = time.monotonic()
+        while True:
+            if not self._active:
+                self._wakeup.wait(self.flush_interval)
+                self._wakeup.clear()
+            else:
+                self.sample()
+                time.sleep(self.interval)
+            if time.monotonic() - last_flush >= self.flush_interval:
+                self.flush()
+                last_flush = time.monotonic()
+
+    def sample(self):
+        with self._lock:
+            active = dict(self._active)
+        if not active:
+            return
+        frames = sys._current_frames()
+        for thread_id, (slug, base_frame) in active.items():
+            frame = frames.get(thread_id)
+            labels = []
+            # Walk from the leaf up to the middleware frame; the server's own frames are noise
+            while frame is not None and frame is not base_frame:
+                labels.append(frame_label(frame))
+                frame = frame.f_back
+            if frame is None or not labels:
+                continue
+            stack = ';'.join(reversed(labels))
+            with self._lock:
+                self.stacks.setdefault(slug, Counter())[stack] += 1
+                self._dirty = True
+
+    def flush(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            snapshot = {slug: dict(counter) for slug, counter in self.stacks.items()}
+            self._dirty = False
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            for slug, stacks in snapshot.items():
+                path = os.path.join(self.directory, f"{slug}.{os.getpid()}.collapsed")
+                tmp_path = f"{path}.tmp"
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    for stack, count in sorted(stacks.items(), key=lambda item: -item[1]):
+                        f.write(f"{stack} {count}\n")
+                os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Profile write warning: {e}")
+
+    def stats(self):
+        with self._lock:
+            return {
+                'profiled_requests': dict(self.requests),
+                'samples': {slug: sum(counter.values()) for slug, counter in self.stacks.items()},
+                'active': len(self._active)
+            }
+
+
+class ProfilingMiddleware:
+    """WSGI wrapper that profiles a random `sample_rate` share of requests.
+
+    A request carrying `X-Profile: 1` together with a valid X-Admin-Token is
+    always profiled, so a single slow call can be captured on demand.
+    """
+
+    def __init__(self, wsgi_app, url_map, profiler, sample_rate=0.0, admin_token=''):
+        self.wsgi_app = wsgi_app
+        self.url_map = url_map
+        self.profiler = profiler
+        self.sample_rate = sample_rate
+        self.admin_token = admin_token
+
+    def __call__(self, environ, start_response):
+        if not (self.sample_rate and random.random() < self.sample_rate) and not self._forced(environ):
+            return self.wsgi_app(environ, start_response)
+
+        self.profiler.begin(self._route(environ), sys._getframe())
+        try:
+            # Flask builds the whole body inside this call, so the profile covers the handler
+            return self.wsgi_app(environ, start_response)
+        finally:
+            self.profiler.end()
+
+    def _forced(self, environ):
+        if environ.get('HTTP_X_PROFILE') != '1' or not self.admin_token:
+            return False
+        return hmac.compare_digest(environ.get('HTTP_X_ADMIN_TOKEN', ''), self.admin_token)
+
+    def _route(self, environ):
+        try:
+            rule, _ = self.url_map.bind_to_environ(environ).match(return_rule=True)
+            rule = rule.rule
+        except Exception:
+            rule = 'unmatched'
+        return route_slug(environ.get('REQUEST_METHOD', 'GET'), rule)
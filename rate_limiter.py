@@ -0,0 +1,188 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+def slide(state, now, window, limit):
+    """One sliding-window-counter step: (new_state, allowed).
+
+    state is (window_index, current_count, previous_count). The request rate
+    is estimated as the previous fixed window's count, weighted by how much
+    of it still overlaps the sliding window, plus the current count, so a
+    check is O(1) and needs no per-request timestamps.
+    """
+    index = int(now // window)
+    last_index, current, previous = state or (index, 0, 0)
+    if last_index != index:
+        previous = current if last_index == index - 1 else 0
+        current = 0
+    overlap = 1.0 - (now % window) / window
+    if previous * overlap + current >= limit:
+        return (index, current, previous), False
+    return (index, current + 1, previous), True
+
+
+class MemoryBackend:
+    """Per-process counters; keys idle for two windows are evicted in LRU order."""
+
+    name = 'memory'
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self.evictions = 0
+        self._states = OrderedDict()  # key -> (state, last_seen), least recently seen first
+        self._lock = threading.Lock()
+
+    def hit(self, key, now, window, limit):
+        with self._lock:
+            entry = self._states.pop(key, None)
+            state, allowed = slide(entry[0] if entry else None, now, window, limit)
+            self._states[key] = (state, now)
+            self._evict(now - 2 * window)
+            return allowed
+
+    def _evict(self, idle_before):
+        # Oldest entries sit at the front, so this stops at the first active key
+        while self._states:
+            key, (_, last_seen) = next(iter(self._states.items()))
+            if last_seen >= idle_before and len(self._states) <= self.max_keys:
+                break
+            del self._states[key]
+            self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            return {'backend': self.name, 'keys': len(self._states), 'evictions': self.evictions}
+
+
+class SQLiteBackend:
+    """Counters in one SQLite file so every worker process enforces the same limit.
+
+    Each check is a single short IMMEDIATE transaction on an indexed row; idle
+    rows are deleted every `sweep_every` checks. Connections are opened lazily
+    per thread and process, so a gunicorn master that preloads the app never
+    holds one across fork.
+    """
+
+    name = 'sqlite'
+
+    def __init__(self, path, sweep_every=1000, busy_timeout_ms=2000):
+        self.path = path
+        self.sweep_every = sweep_every
+        self.busy_timeout_ms = busy_timeout_ms
+        self.evictions = 0
+        self._checks = 0
+        self._local = threading.local()
+        self._inherited = []
+
+    def probe(self):
+        """Create the table now (raising sqlite3.Error if the file is unusable) without keeping a connection."""
+        self._open().close()
+
+    def _open(self):
+        conn = sqlite3.connect(self.path, timeout=self.busy_timeout_ms / 1000.0, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS rate_limits ('
+            'key TEXT PRIMARY KEY, window_index INTEGER, current INTEGER, previous INTEGER, last_seen REAL)'
+        )
+        conn.execute('CREATE INDEX IF NOT EXISTS rate_limits_last_seen ON rate_limits (last_seen)')
+        return conn
+
+    def _connect(self):
+        # Connections must not cross a fork or be shared between threads
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+        if conn is not None:
+            # Closing a handle inherited across fork would drop the parent's file locks; never close it
+            self._inherited.append(conn)
+        conn = self._open()
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def hit(self, key, now, window, limit):
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute(
+                'SELECT window_index, current, previous FROM rate_limits WHERE key = ?', (key,)
+            ).fetchone()
+            state, allowed = slide(row, now, window, limit)
+            conn.execute(
+                'INSERT OR REPLACE INTO rate_limits (key, window_index, current, previous, last_seen) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (key, state[0], state[1], state[2], now)
+            )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+        self._checks += 1
+        if self._checks % self.sweep_every == 0:
+            self._sweep(conn, now - 2 * window)
+        return allowed
+
+    def _sweep(self, conn, idle_before):
+        try:
+            cursor = conn.execute('DELETE FROM rate_limits WHERE last_seen < ?', (idle_before,))
+            self.evictions += cursor.rowcount
+        except sqlite3.Error as e:
+            print(f"Rate limit sweep warning: {e}")
+
+    def stats(self):
+        try:
+            keys = self._connect().execute('SELECT COUNT(*) FROM rate_limits').fetchone()[0]
+        except sqlite3.Error:
+            keys = None
+        return {'backend': self.name, 'path': self.path, 'keys': keys, 'evictions': self.evictions}
+
+
+class RateLimiter:
+    """Sliding-window limit of `limit` requests per `window` seconds per key."""
+
+    def __init__(self, limit, window=60.0, backend=None):
+        self.limit = limit
+        self.window = float(window)
+        self.backend = backend or MemoryBackend()
+        self.rejected = 0
+        self.backend_errors = 0
+
+    def allow(self, key):
+        try:
+            allowed = self.backend.hit(str(key), time.time(), self.window, self.limit)
+        except Exception as e:
+            # Fail open: a locked or broken store must not take the API down
+            self.backend_errors += 1
+            print(f"Rate limiter backend error: {e}")
+            return True
+        if not allowed:
+            self.rejected += 1
+        return allowed
+
+    def stats(self):
+        stats = self.backend.stats()
+        stats.update({
+            'limit': self.limit,
+            'window_s': self.window,
+            'rejected': self.rejected,
+            'backend_errors': self.backend_errors
+        })
+        return stats
+
+
+def build_backend(kind, path):
+    """'sqlite' (shared across workers) or 'memory'; falls back to memory if SQLite is unusable."""
+    if kind == 'sqlite':
+        try:
+            backend = SQLiteBackend(path)
+            backend.probe()
+            return backend
+        except sqlite3.Error as e:
+            print(f"Rate limit store {path} unavailable, using per-process limits: {e}")
+    return MemoryBackend()
@@ -0,0 +1,222 @@
+import json
+import os
+import threading
+from collections import OrderedDict, deque
+
+from file_locks import lock_manager
+
+
+class PatientLogStore:
+    """Append-only JSONL log of per-patient records with an in-memory offset index.
+
+    Every record is one line ``{"pid": <hashed id>, "record": {...}}``. Writes
+    append a single line (O(1)); reads seek straight to the offsets recorded
+    for that patient. Other processes may append to the same file, so before a
+    read the index catches up by scanning only the bytes added since the last
+    scan.
+
+    Rolling summaries are built on first request from the patient's newest
+    records and then kept up to date, for at most `max_summaries` patients
+    (least recently used first out).
+    """
+
+    def __init__(self, path, legacy_path=None, windows=None, max_summaries=10000):
+        self.path = path
+        self.legacy_path = legacy_path
+        # name -> (size, numeric fields) for the per-patient rolling summaries
+        self.windows = dict(windows or {})
+        self.max_summaries = max_summaries
+        self._index = {}
+        self._summaries = OrderedDict()
+        self._indexed_size = 0
+        self._lock = threading.Lock()
+        self._ready = False
+
+    def _ensure_ready(self):
+        if self._ready:
+            return
+        with self._lock:
+            if not self._ready:
+                self._migrate_legacy()
+                self._ready = True
+
+    def _migrate_legacy(self):
+        """Import a legacy ``{pid: [records]}`` JSON file once, if present."""
+        if not self.legacy_path or os.path.exists(self.path) or not os.path.exists(self.legacy_path):
+            return
+        try:
+            with lock_manager.lock(self.path).acquire():
+                # Another worker may have finished the import while we waited
+                if os.path.exists(self.path):
+                    return
+                with open(self.legacy_path, 'r', encoding='utf-8') as f:
+                    legacy = json.load(f)
+                tmp_path = f"{self.path}.{os.getpid()}.migrate"
+                with open(tmp_path, 'wb') as f:
+                    for pid, records in legacy.items():
+                        for record in records:
+                            f.write(_encode_line(pid, record))
+                os.replace(tmp_path, self.path)
+                print(f"Migrated {self.legacy_path} to {self.path}")
+        except Exception as e:
+            print(f"Legacy import warning for {self.legacy_path}: {e}")
+
+    def _catch_up(self):
+        """Index records appended since the last scan (by any process)."""
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return
+        if size < self._indexed_size:
+            # File was replaced or truncated; rebuild from scratch
+            self._index = {}
+            self._summaries = OrderedDict()
+            self._indexed_size = 0
+        if size == self._indexed_size:
+            return
+
+        with open(self.path, 'rb') as f:
+            f.seek(self._indexed_size)
+            offset = self._indexed_size
+            for line in f:
+                if not line.endswith(b'\n'):
+                    # Partial line from an in-progress append; pick it up next time
+                    break
+                try:
+                    entry = json.loads(line)
+                    pid = entry['pid']
+                    self._index.setdefault(pid, []).append(offset)
+                    summary = self._summaries.get(pid)
+                    if summary is not None:
+                        summary.push(entry.get('record') or {})
+                except (ValueError, KeyError, TypeError):
+                    pass
+                offset += len(line)
+            self._indexed_size = offset
+
+    def _read_records(self, offsets):
+        records = []
+        if not offsets:
+            return records
+        with open(self.path, 'rb') as f:
+            for offset in offsets:
+                f.seek(offset)
+                try:
+                    records.append(json.loads(f.readline())['record'])
+                except (ValueError, KeyError):
+                    continue
+        return records
+
+    def _summary_for(self, pid):
+        """Cached summary for a patient, rebuilt from its newest records on a miss."""
+        summary = self._summaries.get(pid)
+        if summary is not None:
+            self._summaries.move_to_end(pid)
+            return summary
+
+        summary = PatientSummary(self.windows)
+        offsets = self._index.get(pid, [])
+        widest = max((size for size, _ in self.windows.values()), default=0)
+        tail = offsets[-widest:] if widest else []
+        for record in self._read_records(tail):
+            summary.push(record)
+        summary.count = len(offsets)
+        if offsets:
+            self._summaries[pid] = summary
+            while len(self._summaries) > self.max_summaries:
+                self._summaries.popitem(last=False)
+        return summary
+
+    def append(self, pid, record):
+        """Append one record for a patient."""
+        self._ensure_ready()
+        line = _encode_line(pid, record)
+        # The exclusive lock keeps lines from different workers from interleaving
+        with lock_manager.lock(self.path).acquire():
+            with open(self.path, 'ab') as f:
+                f.write(line)
+        # Fold the new line (and any from other workers) into cached summaries now
+        with self._lock:
+            self._catch_up()
+
+    def get(self, pid):
+        """All records for a patient in insertion order."""
+        self._ensure_ready()
+        with self._lock:
+            self._catch_up()
+            offsets = list(self._index.get(pid, []))
+        if not offsets:
+            return []
+        return self._read_records(offsets)
+
+    def count(self, pid):
+        self._ensure_ready()
+        with self._lock:
+            self._catch_up()
+            return len(self._index.get(pid, []))
+
+    def summary(self, pid):
+        """Snapshot of the rolling summaries for a patient, without reading the log."""
+        self._ensure_ready()
+        with self._lock:
+            self._catch_up()
+            return self._summary_for(pid).snapshot()
+
+
+class RollingWindow:
+    """Last `size` records plus running sums of numeric fields, updated in O(1)."""
+
+    def __init__(self, size, fields=()):
+        self.size = size
+        self.fields = tuple(fields)
+        self.records = deque()
+        self.sums = dict.fromkeys(self.fields, 0.0)
+
+    def push(self, record):
+        if len(self.records) == self.size:
+            evicted = self.records.popleft()
+            for field in self.fields:
+                self.sums[field] -= _as_number(evicted.get(field))
+        self.records.append(record)
+        for field in self.fields:
+            self.sums[field] += _as_number(record.get(field))
+
+    def snapshot(self):
+        count = len(self.records)
+        return {
+            'count': count,
+            'totals': dict(self.sums),
+            'means': {field: (self.sums[field] / count if count else 0.0) for field in self.fields},
+            # Newest first; the window is small so this sort is cheap
+            'recent': sorted(self.records, key=lambda x: x.get('timestamp', 0), reverse=True)
+        }
+
+
+class PatientSummary:
+    """Total record count plus named rolling windows for one patient."""
+
+    def __init__(self, windows):
+        self.count = 0
+        self.windows = {name: RollingWindow(size, fields) for name, (size, fields) in windows.items()}
+
+    def push(self, record):
+        self.count += 1
+        for window in self.windows.values():
+            window.push(record)
+
+    def snapshot(self):
+        return {
+            'count': self.count,
+            'windows': {name: window.snapshot() for name, window in self.windows.items()}
+        }
+
+
+def _as_number(value):
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _encode_line(pid, record):
+    return (json.dumps({'pid': pid, 'record': record}, ensure_ascii=False) + '\n').encode('utf-8')
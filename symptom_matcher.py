@@ -0,0 +1,123 @@
+import re
+from collections import deque
+
+# Tokens keep in-word apostrophes so "don't" stays a single negation cue
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:'[a-z]+)?|[.,;:!?]")
+CLAUSE_BREAK_TOKENS = {'.', ',', ';', ':', '!', '?', 'but', 'however', 'although', 'though', 'except'}
+NEGATION_CUES = {
+    'no', 'not', 'without', 'denies', 'deny', 'denied', 'never', 'negative', 'nor', 'none',
+    "don't", 'dont', "doesn't", 'doesnt', "didn't", 'didnt', "haven't", 'havent',
+    "hasn't", 'hasnt', "isn't", 'isnt', "aren't", "wasn't", "weren't"
+}
+# How many tokens after a cue stay negated ("no fever, cough or chills" is cut by the comma)
+NEGATION_WINDOW = 5
+
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall(str(text or '').lower())
+
+
+class SymptomMatcher:
+    """Single-pass multi-phrase symptom matcher (word-level Aho-Corasick).
+
+    Phrases are compiled into one automaton over word tokens, so matching is
+    linear in the number of tokens whatever the vocabulary size, and a phrase
+    can only match on whole words. Overlapping hits resolve to the longest
+    phrase ("high fever" beats "fever"). A hit counts as negated when it falls
+    within NEGATION_WINDOW tokens after a negation cue in the same clause.
+    """
+
+    def __init__(self, phrases):
+        # phrases: {phrase text: canonical symptom}
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]
+        self._patterns = []
+        # Phrases that tokenize identically collapse to one entry (last one wins)
+        compiled = {}
+        for phrase, canonical in phrases.items():
+            tokens = tuple(t for t in tokenize(phrase.replace('_', ' ')) if t not in CLAUSE_BREAK_TOKENS)
+            if tokens:
+                compiled[tokens] = canonical
+        for tokens, canonical in compiled.items():
+            self._add(tokens, canonical)
+        self._build_failure_links()
+
+    def __len__(self):
+        return len(self._patterns)
+
+    def _add(self, tokens, canonical):
+        node = 0
+        for token in tokens:
+            nxt = self._goto[node].get(token)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][token] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            node = nxt
+        self._output[node].append(len(self._patterns))
+        self._patterns.append((len(tokens), canonical))
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for token, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and token not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(token, 0)
+                self._fail[child] = target if target != child else 0
+                # Inherit matches ending at the suffix state
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def find(self, text):
+        """All non-overlapping matches as dicts, in text order."""
+        tokens = tokenize(text)
+        hits = []
+        node = 0
+        negated_until = -1
+        negated_from = []  # per token: whether it lies in a negation scope
+        for pos, token in enumerate(tokens):
+            if token in CLAUSE_BREAK_TOKENS:
+                negated_until = -1
+            elif token in NEGATION_CUES:
+                negated_until = pos + NEGATION_WINDOW
+            negated_from.append(pos <= negated_until and token not in NEGATION_CUES)
+
+            while node and token not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(token, 0)
+            for pattern_id in self._output[node]:
+                length, canonical = self._patterns[pattern_id]
+                hits.append((pos - length + 1, pos + 1, canonical))
+
+        # Leftmost-longest selection of non-overlapping hits
+        hits.sort(key=lambda h: (h[0], -(h[1] - h[0])))
+        matches = []
+        last_end = 0
+        for start, end, canonical in hits:
+            if start < last_end:
+                continue
+            matches.append({
+                'symptom': canonical,
+                'phrase': ' '.join(tokens[start:end]),
+                'negated': negated_from[start]
+            })
+            last_end = end
+        return matches
+
+    def extract(self, text):
+        """Distinct non-negated symptoms in order of first mention."""
+        seen = set()
+        extracted = []
+        for match in self.find(text):
+            symptom = match['symptom']
+            if match['negated'] or symptom in seen:
+                continue
+            seen.add(symptom)
+            extracted.append(symptom)
+        return extracted
@@ -5,6 +5,10 @@ from sklearn.calibration import CalibratedClassifierCV
 from sklearn.metrics import accuracy_score
 import json
 import os
+import time
+from inference import rank_top_k
+from symptom_resolver import SymptomResolver, load_symptom_alias_map, normalize_symptom
+from training_data import load_training_data
 
 # O(1) symptom lookup using dictionary for optimized performance
 class SymptomLookup:
@@ -20,41 +24,71 @@ class SymptomLookup:
         """O(1) lookup for symptom by index"""
         return self.index_to_symptom.get(index, None)
 
+def split_jobs(n_jobs, folds):
+    """(fold workers, tree workers per fold) for a total core budget."""
+    if n_jobs is None or n_jobs < 1:
+        n_jobs = os.cpu_count() or 1
+    fold_jobs = max(1, min(n_jobs, folds))
+    return fold_jobs, max(1, n_jobs // fold_jobs)
+
 class SymptomPredictor:
-    def __init__(self, dataset_path):
+    def __init__(self, dataset_path=None, n_jobs=1, folds=5, n_estimators=150, report_accuracy=False):
         self.model = None
         self.all_symptoms = []
         self.diseases = []
         self.symptom_lookup = None  # O(1) lookup structure
-        self.load_and_train(dataset_path)
+        self.symptom_resolver = None  # trigram + edit-distance lookup for near misses
+        self.alias_map = {}  # symptoms_list.csv alias -> canonical symptom, as in app.py
+        # n_jobs=-1 uses every core: CV folds run in parallel processes, trees inside each fold
+        self.n_jobs = n_jobs
+        self.folds = folds
+        self.n_estimators = n_estimators
+        # Scoring the whole training set again is an extra full pass; off unless asked for
+        self.report_accuracy = report_accuracy
+        self.fit_seconds = None
+        if dataset_path:
+            self.load_and_train(dataset_path)
     
     def load_and_train(self, dataset_path):
         """Load dataset and train the model"""
         try:
-            train_df = pd.read_csv(dataset_path).iloc[:, :-1]
-            self.all_symptoms = train_df.columns[:-1].tolist()
-            self.diseases = train_df['prognosis'].unique().tolist()
-            
-            # Initialize O(1) symptom lookup
-            self.symptom_lookup = SymptomLookup(self.all_symptoms)
-            
-            X = train_df.iloc[:, :-1]
-            y = train_df["prognosis"]
-            
-            # Train with calibration for probability estimates
-            base_model = RandomForestClassifier(n_estimators=150, 
-                                             random_state=42,
-                                             class_weight='balanced')
-            self.model = CalibratedClassifierCV(base_model, cv=5)
-            self.model.fit(X, y)
-            
+            # uint8 one-hot matrix instead of int64 DataFrame columns
+            data = load_training_data(dataset_path)
+            self.fit(data.X, data.y, data.symptoms)
+        except Exception as e:
+            raise RuntimeError(f"Error during model training: {str(e)}")
+    
+    def fit(self, X, y, symptoms):
+        """Train on a one-hot symptom matrix (columns in `symptoms` order)"""
+        self.all_symptoms = list(symptoms)
+        self.diseases = pd.unique(np.asarray(y)).tolist()
+        
+        # Initialize O(1) symptom lookup
+        self.symptom_lookup = SymptomLookup(self.all_symptoms)
+        self.alias_map = {
+            alias: canonical for alias, canonical in load_symptom_alias_map().items()
+            if self.symptom_lookup.get_index(canonical) != -1
+        }
+        self.symptom_resolver = SymptomResolver({**{s: s for s in self.all_symptoms}, **self.alias_map})
+        
+        # Train with calibration for probability estimates
+        fold_jobs, tree_jobs = split_jobs(self.n_jobs, self.folds)
+        base_model = RandomForestClassifier(n_estimators=self.n_estimators, 
+                                         random_state=42,
+                                         class_weight='balanced',
+                                         n_jobs=tree_jobs)
+        self.model = CalibratedClassifierCV(base_model, cv=self.folds, n_jobs=fold_jobs)
+        started = time.perf_counter()
+        self.model.fit(X, y)
+        self.fit_seconds = time.perf_counter() - started
+        
+        if self.report_accuracy:
             # Verify model quality
             y_pred = self.model.predict(X)
             accuracy = accuracy_score(y, y_pred)
             print(f"Model trained successfully. Training accuracy: {accuracy:.2f}")
-            
-        except Exception as e:
-            raise RuntimeError(f"Error during model training: {str(e)}")
+        else:
+            print(f"Model trained successfully in {self.fit_seconds:.1f}s")
     
     def validate_symptoms(self, user_symptoms):
         """Validate and normalize symptoms"""
@@ -64,29 +98,29 @@ class SymptomPredictor:
         for symptom in user_symptoms:
             # Case-insensitive matching and strip whitespace
             cleaned = symptom.strip().lower()
-            matched = False
             
-            # Check for exact match first
-            for official_symptom in self.all_symptoms:
-                if cleaned == official_symptom.lower():
-                    valid_symptoms.append(official_symptom)
-                    matched = True
-                    break
+            # Exact O(1) lookup first
+            idx = self.symptom_lookup.get_index(cleaned)
+            if idx != -1:
+                valid_symptoms.append(self.all_symptoms[idx])
+                continue
             
-            # If no exact match, check for partial matches
-            if not matched:
-                for official_symptom in self.all_symptoms:
-                    if cleaned in official_symptom.lower():
-                        valid_symptoms.append(official_symptom)
-                        matched = True
-                        break
-            
-            if not matched:
+            # Then the symptoms_list.csv aliases, exactly
+            alias = self.alias_map.get(normalize_symptom(cleaned))
+            if alias:
+                valid_symptoms.append(alias)
+                continue
+
+            # Then close typos from the resolution index; weaker matches are rejected
+            resolved = self.symptom_resolver.resolve(cleaned)
+            if resolved:
+                valid_symptoms.append(resolved)
+            else:
                 invalid_symptoms.append(symptom)
         
         return valid_symptoms, invalid_symptoms
     
-    def predict_disease(self, user_symptoms):
+    def predict_disease(self, user_symptoms, top_k=3):
         """
         Predict disease with confidence scores and alternatives
         
@@ -116,13 +150,13 @@ class SymptomPredictor:
         
         # Prepare input data
         input_data = np.zeros(len(self.all_symptoms))
-        symptom_indices = [self.all_symptoms.index(s) for s in valid_symptoms]
+        symptom_indices = [self.symptom_lookup.get_index(s) for s in valid_symptoms]
         input_data[symptom_indices] = 1
         input_data = input_data.reshape(1, -1)
         
         # Get predictions with probabilities
         disease_prob = self.model.predict_proba(input_data)[0]
-        top_indices = np.argsort(-disease_prob)[:3]  # Top 3 predictions
+        top_indices = rank_top_k(disease_prob, top_k)  # Top-k without a full sort
         
         # Prepare results
         primary_disease = self.model.classes_[top_indices[0]]
@@ -0,0 +1,169 @@
+import os
+from collections import defaultdict
+
+import pandas as pd
+
+SYMPTOM_LIST_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'symptoms_list.csv')
+
+# Silent rewrites need a close, non-trivial match; weaker matches are only suggestions
+AUTOCORRECT_MIN_SCORE = 0.85
+AUTOCORRECT_MIN_LENGTH = 5
+
+
+def _normalize(text):
+    return ' '.join(str(text or '').strip().lower().replace('_', ' ').split())
+
+
+def normalize_symptom(value):
+    """Normalize symptom text to the dataset format."""
+    if value is None:
+        return ""
+    return str(value).strip().lower().replace(" ", "_")
+
+
+def load_symptom_alias_map(data_path=SYMPTOM_LIST_PATH):
+    """Load alias->canonical symptom mappings from symptoms_list.csv."""
+    alias_map = {}
+    if not os.path.exists(data_path):
+        return alias_map
+
+    try:
+        df = pd.read_csv(data_path)
+        if 'Symptom' not in df.columns:
+            return alias_map
+
+        for _, row in df.iterrows():
+            canonical = normalize_symptom(row.get('Symptom', ''))
+            if not canonical:
+                continue
+            alias_map[canonical] = canonical
+
+            aliases = str(row.get('Aliases', '')).strip()
+            if aliases:
+                for alias in aliases.split(','):
+                    key = normalize_symptom(alias)
+                    if key:
+                        alias_map[key] = canonical
+    except Exception as e:
+        print(f"Alias map load warning: {e}")
+
+    return alias_map
+
+
+def trigrams(text):
+    padded = f"${text}$"
+    return {padded[i:i + 3] for i in range(max(1, len(padded) - 2))}
+
+
+def bounded_damerau_levenshtein(a, b, max_distance):
+    """Optimal-string-alignment distance, or max_distance + 1 once it is exceeded."""
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    if a == b:
+        return 0
+
+    prev_prev = None
+    prev = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        row_min = current[0]
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            value = min(prev[j] + 1, current[j - 1] + 1, prev[j - 1] + cost)
+            if (prev_prev is not None and i > 1 and j > 1
+                    and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]):
+                value = min(value, prev_prev[j - 2] + 1)
+            current[j] = value
+            if value < row_min:
+                row_min = value
+        if row_min > max_distance:
+            return max_distance + 1
+        prev_prev, prev = prev, current
+    return prev[-1] if prev[-1] <= max_distance else max_distance + 1
+
+
+class SymptomResolver:
+    """Typo-tolerant symptom lookup over canonical names and aliases.
+
+    A trigram inverted index narrows each query to the entries sharing enough
+    trigrams; only those candidates are verified with a bounded
+    Damerau-Levenshtein distance (or, failing that, substring containment),
+    so a lookup costs O(candidates) rather than O(vocabulary).
+    """
+
+    def __init__(self, names, max_distance=2):
+        # names: {name or alias: canonical symptom}
+        self.max_distance = max_distance
+        self._exact = {}
+        self._keys = []
+        self._canonical = []
+        self._postings = defaultdict(list)
+        for name, canonical in names.items():
+            key = _normalize(name)
+            if not key or key in self._exact:
+                continue
+            self._exact[key] = canonical
+            entry_id = len(self._keys)
+            self._keys.append(key)
+            self._canonical.append(canonical)
+            for gram in trigrams(key):
+                self._postings[gram].append(entry_id)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def suggest(self, query, limit=5):
+        """Ranked [{symptom, match, score, distance, kind}] for a free-text query."""
+        key = _normalize(query)
+        if not key:
+            return []
+        if key in self._exact:
+            return [{'symptom': self._exact[key], 'match': key, 'score': 1.0, 'distance': 0, 'kind': 'exact'}]
+
+        query_grams = trigrams(key)
+        shared = defaultdict(int)
+        for gram in query_grams:
+            for entry_id in self._postings.get(gram, ()):
+                shared[entry_id] += 1
+
+        # Each edit destroys at most 3 trigrams (q-gram lemma)
+        min_shared = max(1, len(query_grams) - 3 * self.max_distance)
+        best = {}
+        for entry_id, overlap in shared.items():
+            candidate = self._keys[entry_id]
+            suggestion = None
+            if overlap >= min_shared:
+                distance = bounded_damerau_levenshtein(key, candidate, self.max_distance)
+                if distance <= self.max_distance:
+                    suggestion = {
+                        'score': round(1.0 - distance / max(len(key), len(candidate)), 4),
+                        'distance': distance,
+                        'kind': 'fuzzy'
+                    }
+            if (suggestion is None and len(key) >= 3
+                    and overlap >= len(query_grams) - 2 and key in candidate):
+                # Query is a fragment of a longer name, e.g. "pain" -> "joint pain"
+                suggestion = {
+                    'score': round(0.9 * len(key) / len(candidate), 4),
+                    'distance': None,
+                    'kind': 'partial'
+                }
+            if suggestion is None:
+                continue
+
+            canonical = self._canonical[entry_id]
+            suggestion.update({'symptom': canonical, 'match': candidate})
+            if canonical not in best or suggestion['score'] > best[canonical]['score']:
+                best[canonical] = suggestion
+
+        ranked = sorted(best.values(), key=lambda s: (-s['score'], s['match']))
+        return ranked[:limit]
+
+    def resolve(self, query, min_score=AUTOCORRECT_MIN_SCORE, min_length=AUTOCORRECT_MIN_LENGTH):
+        """Best canonical symptom for a query, or None below min_score or for short queries."""
+        if len(_normalize(query)) < min_length:
+            return None
+        suggestions = self.suggest(query, limit=1)
+        if suggestions and suggestions[0]['score'] >= min_score:
+            return suggestions[0]['symptom']
+        return None
@@ -0,0 +1,157 @@
+import atexit
+import bisect
+import heapq
+import json
+import os
+import threading
+import time
+
+from file_locks import atomic_write_json, lock_manager
+
+
+def _normalize(text):
+    return ' '.join(str(text or '').strip().lower().replace('_', ' ').split())
+
+
+class SymptomAutocomplete:
+    """Prefix index for the symptom picker over display names, aliases and categories.
+
+    Every word-start suffix of every term ("joint pain" also files "pain") is
+    kept in one sorted array, so a prefix lookup is a bisect plus a scan of
+    the matching run. Matches are ranked by how often the symptom has been
+    used in predictions, then by whether the query hit the start of the term.
+
+    With `popularity_path`, usage counts live in one JSON file shared by all
+    workers: each worker adds its own counts every `flush_interval` seconds
+    and ranks by the file's table, re-read whenever the file changes. Every
+    worker therefore ranks (and ETags) a prefix the same way.
+    """
+
+    def __init__(self, entries, popularity_path=None, flush_interval=30.0):
+        # entries: [{'symptom', 'display', 'category', 'aliases'}]
+        self.display = {}
+        self.category = {}
+        index = {}
+        for entry in entries:
+            symptom = entry['symptom']
+            self.display[symptom] = entry.get('display') or symptom.replace('_', ' ').title()
+            self.category[symptom] = entry.get('category') or ''
+            terms = [(entry.get('display'), 'display'), (symptom, 'display'), (entry.get('category'), 'category')]
+            terms += [(alias, 'alias') for alias in entry.get('aliases', ())]
+            for term, source in terms:
+                words = _normalize(term).split()
+                for start in range(len(words)):
+                    key = ' '.join(words[start:])
+                    # Whole-term hits outrank mid-term ones; categories rank last
+                    rank = (2 if source == 'category' else 0) + (1 if start else 0)
+                    previous = index.get((key, symptom))
+                    if previous is None or rank < previous[0]:
+                        index[(key, symptom)] = (rank, ' '.join(words), source)
+
+        ordered = sorted(index.items())
+        self._keys = [key for (key, _), _ in ordered]
+        self._entries = [(symptom,) + value for (_, symptom), value in ordered]
+        self.popularity_path = popularity_path
+        self.flush_interval = flush_interval
+        self._popularity = {}   # the ranking table; replaced whole, never mutated in shared mode
+        self._pending = {}      # this worker's counts not yet added to the shared file
+        self._loaded_stamp = None
+        self._flusher_pid = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.display)
+
+    def record(self, symptoms):
+        """Count symptoms used in a prediction towards their popularity."""
+        with self._lock:
+            counts = self._pending if self.popularity_path else self._popularity
+            for symptom in set(symptoms):
+                if symptom in self.display:
+                    counts[symptom] = counts.get(symptom, 0) + 1
+        if self.popularity_path and self._flusher_pid != os.getpid():
+            self._start_flusher()
+
+    def _start_flusher(self):
+        # Threads do not survive fork, so each worker starts its own flusher
+        with self._lock:
+            if self._flusher_pid == os.getpid():
+                return
+            self._flusher_pid = os.getpid()
+        threading.Thread(target=self._run_flusher, name='suggest-popularity', daemon=True).start()
+        atexit.register(self.flush)
+
+    def _run_flusher(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+    def flush(self):
+        """Add this worker's pending counts to the shared popularity file."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.popularity_path)), exist_ok=True)
+            with lock_manager.lock(self.popularity_path).acquire():
+                counts = self._read_counts()
+                for symptom, count in pending.items():
+                    counts[symptom] = counts.get(symptom, 0) + count
+                atomic_write_json(self.popularity_path, {'counts': counts, 'updated_at': time.time()})
+        except Exception as e:
+            # Keep the counts for the next attempt
+            with self._lock:
+                for symptom, count in pending.items():
+                    self._pending[symptom] = self._pending.get(symptom, 0) + count
+            print(f"Symptom popularity write warning: {e}")
+
+    def _read_counts(self):
+        try:
+            with open(self.popularity_path, 'r', encoding='utf-8') as f:
+                counts = json.load(f).get('counts', {})
+        except (OSError, ValueError, AttributeError):
+            return {}
+        return {symptom: int(count) for symptom, count in counts.items() if symptom in self.display}
+
+    def _refresh(self):
+        # One stat per lookup; the file is replaced atomically, so a new inode means new counts
+        try:
+            st = os.stat(self.popularity_path)
+        except OSError:
+            return
+        stamp = (st.st_ino, st.st_mtime_ns, st.st_size)
+        if stamp != self._loaded_stamp:
+            self._popularity = self._read_counts()
+            self._loaded_stamp = stamp
+
+    def suggest(self, prefix, limit=8):
+        """Top `limit` symptoms whose indexed terms start with `prefix`."""
+        query = _normalize(prefix)
+        if not query:
+            return []
+        if self.popularity_path:
+            self._refresh()
+
+        best = {}
+        position = bisect.bisect_left(self._keys, query)
+        while position < len(self._keys) and self._keys[position].startswith(query):
+            symptom, rank, term, source = self._entries[position]
+            current = best.get(symptom)
+            if current is None or rank < current[0]:
+                best[symptom] = (rank, term, source)
+            position += 1
+
+        popularity = self._popularity
+        top = heapq.nsmallest(
+            limit, best.items(),
+            key=lambda item: (-popularity.get(item[0], 0), item[1][0], self.display[item[0]])
+        )
+        return [{
+            'symptom': symptom,
+            'display': self.display[symptom],
+            'category': self.category[symptom],
+            'matched': term,
+            'source': source,
+            'popularity': popularity.get(symptom, 0)
+        } for symptom, (rank, term, source) in top]
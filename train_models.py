@@ -0,0 +1,250 @@
+"""Offline training for the symptom models, with a time and peak-memory report.
+
+    python train_models.py nb [--publish [--activate]]
+    python train_models.py nb-update new_rows.csv [--base DIR] [--publish [--activate]]
+    python train_models.py forest --n-jobs -1 [--output model_artifacts/random_forest]
+
+nb fits MultinomialNB from scratch and writes a model artifact (including
+the training counts). nb-update folds newly labelled rows (same CSV layout)
+into an existing artifact with partial_fit instead of retraining. forest
+trains the calibrated RandomForest across cores and saves it for the app's
+canary/shadow routing (FOREST_ARTIFACT_PATH) instead of retraining at startup.
+The CSV is parsed once into a uint8 matrix and cached (see training_data.py).
+"""
+import argparse
+import json
+import os
+import resource
+import sys
+import time
+
+import numpy as np
+from sklearn.naive_bayes import MultinomialNB
+
+from inference import NaiveBayesEngine
+from model_artifact import load_artifact, save_artifact
+from model_registry import ModelRegistry, evaluate_holdout, load_holdout
+from training_data import load_training_data, parse_csv
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DATA_PATH = os.path.join(BASE_DIR, 'data', 'Training.csv')
+DEFAULT_HOLDOUT_PATH = os.path.join(BASE_DIR, 'data', 'Testing.csv')
+DEFAULT_BASE_ARTIFACT = os.path.join(BASE_DIR, 'model_artifacts', 'symptom_model')
+CANDIDATE_DIR = os.path.join(BASE_DIR, 'model_artifacts', 'candidates')
+
+
+class Report:
+    """Wall time per stage plus peak RSS of this process and of its worker processes."""
+
+    def __init__(self, command):
+        self.values = {'command': command}
+        self.stages = {}
+        self._started = time.perf_counter()
+
+    def stage(self, name, started):
+        self.stages[name] = round(time.perf_counter() - started, 3)
+
+    def finish(self):
+        # ru_maxrss and VmHWM are in KiB on Linux
+        self.values['stages_s'] = self.stages
+        self.values['total_s'] = round(time.perf_counter() - self._started, 3)
+        self.values['peak_rss_mb'] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+        # RUSAGE_CHILDREN only covers reaped children; joblib's loky workers are still alive here
+        live_peaks = live_children_peak_rss_kb()
+        self.values['live_child_processes'] = len(live_peaks)
+        self.values['peak_worker_rss_mb'] = round(
+            max([resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss] + live_peaks) / 1024, 1
+        )
+        return self.values
+
+
+def live_children_peak_rss_kb():
+    """Peak RSS (VmHWM) of each live child process, from /proc; empty where there is no /proc."""
+    peaks = []
+    for entry in os.listdir('/proc') if os.path.isdir('/proc') else []:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", 'r') as f:
+                # The command name may contain spaces; fields after it are space-separated
+                parent_pid = int(f.read().rsplit(')', 1)[1].split()[1])
+            if parent_pid != os.getpid():
+                continue
+            with open(f"/proc/{entry}/status", 'r') as f:
+                for line in f:
+                    if line.startswith('VmHWM:'):
+                        peaks.append(int(line.split()[1]))
+        except (OSError, ValueError, IndexError):
+            continue
+    return peaks
+
+
+def source_metadata(source_path, source_sha256):
+    return {
+        'source_path': os.path.abspath(source_path),
+        'source_mtime': int(os.path.getmtime(source_path)),
+        'source_sha256': source_sha256
+    }
+
+
+def write_nb_artifact(model, symptoms, output_dir, metadata):
+    engine = NaiveBayesEngine.from_model(model)
+    save_artifact(
+        output_dir,
+        classes=engine.classes,
+        symptoms=symptoms,
+        feature_log_prob_t=engine.feature_log_prob_t,
+        class_log_prior=engine.class_log_prior,
+        feature_count=model.feature_count_,
+        class_count=model.class_count_,
+        metadata=dict(metadata, created_at=int(time.time()))
+    )
+    return engine
+
+
+def nb_from_artifact(artifact_dir):
+    """Rebuild a MultinomialNB (with its counts) so partial_fit can continue from it."""
+    manifest, arrays = load_artifact(artifact_dir)
+    if 'feature_count' not in arrays:
+        raise ValueError(f"{artifact_dir} has no training counts; run 'train_models.py nb' once first")
+    # Same hyperparameters as app.SymptomPredictor; partial_fit recomputes the log-probabilities
+    model = MultinomialNB()
+    model.classes_ = np.asarray(manifest['classes'])
+    model.class_count_ = np.array(arrays['class_count'])
+    model.feature_count_ = np.array(arrays['feature_count'])
+    model.n_features_in_ = len(manifest['symptoms'])
+    return model, manifest
+
+
+def record_holdout(report, args, engine, symptoms):
+    """Holdout accuracy, and which rows it was measured on (see model_registry.load_holdout)."""
+    holdout, source = load_holdout(args.holdout, args.data)
+    report.values.update(holdout=source, holdout_accuracy=evaluate_holdout(engine, symptoms, holdout)['accuracy'])
+
+
+def publish(args, output_dir, report):
+    if not args.publish:
+        return
+    registry = ModelRegistry()
+    version = registry.publish(output_dir)
+    if args.activate:
+        registry.activate(version)
+    report.values['registry_version'] = version
+    report.values['activated'] = bool(args.activate)
+
+
+def candidate_dir(name):
+    return os.path.join(CANDIDATE_DIR, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}")
+
+
+def train_nb(args, report):
+    started = time.perf_counter()
+    data = load_training_data(args.data, use_cache=not args.no_cache)
+    report.stage('load', started)
+
+    started = time.perf_counter()
+    model = MultinomialNB()
+    model.fit(data.X, data.y)
+    report.stage('fit', started)
+
+    output_dir = args.output or candidate_dir('nb')
+    engine = write_nb_artifact(model, data.symptoms, output_dir, source_metadata(args.data, data.source_sha256))
+    report.values.update(rows=len(data), artifact=output_dir)
+    record_holdout(report, args, engine, data.symptoms)
+    publish(args, output_dir, report)
+
+
+def update_nb(args, report):
+    base = args.base
+    if not base:
+        active = ModelRegistry().current_version()
+        base = ModelRegistry().path(active) if active else DEFAULT_BASE_ARTIFACT
+
+    started = time.perf_counter()
+    model, base_manifest = nb_from_artifact(base)
+    symptoms = base_manifest['symptoms']
+    new_rows = parse_csv(args.rows)
+    missing = [s for s in symptoms if s not in new_rows.symptoms]
+    if missing:
+        raise ValueError(f"{args.rows} lacks symptom columns: {', '.join(missing[:5])}")
+    unknown = sorted(set(new_rows.labels) - set(model.classes_))
+    if unknown:
+        # partial_fit cannot add classes; a full 'nb' run can
+        raise ValueError(f"New rows contain unseen diseases ({', '.join(unknown[:5])}); retrain with 'nb'")
+    columns = [new_rows.symptoms.index(s) for s in symptoms]
+    report.stage('load', started)
+
+    started = time.perf_counter()
+    model.partial_fit(new_rows.X[:, columns], new_rows.y)
+    report.stage('partial_fit', started)
+
+    output_dir = args.output or candidate_dir('nb-update')
+    # Still derived from the base training CSV, so keep its staleness information
+    metadata = {key: base_manifest.get(key) for key in ('source_path', 'source_mtime', 'source_sha256')}
+    metadata.update(updated_from=os.path.abspath(base), update_sha256=new_rows.source_sha256,
+                    update_rows=len(new_rows))
+    engine = write_nb_artifact(model, symptoms, output_dir, metadata)
+    report.values.update(base=base, rows_added=len(new_rows), artifact=output_dir)
+    record_holdout(report, args, engine, symptoms)
+    publish(args, output_dir, report)
+
+
+def train_forest(args, report):
+    from model_routing import save_forest
+    from symptom_predictor import SymptomPredictor, split_jobs
+
+    started = time.perf_counter()
+    data = load_training_data(args.data, use_cache=not args.no_cache)
+    report.stage('load', started)
+
+    started = time.perf_counter()
+    forest = SymptomPredictor(n_jobs=args.n_jobs, folds=args.folds, n_estimators=args.trees)
+    forest.fit(data.X, data.y, data.symptoms)
+    report.stage('fit', started)
+
+    fold_jobs, tree_jobs = split_jobs(args.n_jobs, args.folds)
+    report.values.update(rows=len(data), folds=args.folds, trees=args.trees,
+                         fold_workers=fold_jobs, tree_workers_per_fold=tree_jobs)
+    holdout, source = load_holdout(args.holdout, args.data)
+    predicted = forest.model.predict(holdout[data.symptoms].to_numpy(dtype=np.float64))
+    labels = holdout['prognosis'].astype(str).str.strip().to_numpy()
+    report.values.update(holdout=source, holdout_accuracy=round(float(np.mean(predicted == labels)), 4))
+
+    started = time.perf_counter()
+    output_dir = args.output or candidate_dir('forest')
+    save_forest(output_dir, forest, dict(source_metadata(args.data, data.source_sha256), created_at=int(time.time())))
+    report.stage('save', started)
+    report.values['artifact'] = output_dir
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Train symptom models')
+    parser.add_argument('--data', default=DEFAULT_DATA_PATH)
+    parser.add_argument('--holdout', default=DEFAULT_HOLDOUT_PATH)
+    parser.add_argument('--no-cache', action='store_true', help='Reparse the CSV instead of using the uint8 cache')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    for name in ('nb', 'nb-update'):
+        command = commands.add_parser(name)
+        if name == 'nb-update':
+            command.add_argument('rows', help='CSV of newly labelled rows')
+            command.add_argument('--base', help='Artifact to update (default: active registry version)')
+        command.add_argument('--output', help='Artifact directory to write')
+        command.add_argument('--publish', action='store_true', help='Add the artifact to the model registry')
+        command.add_argument('--activate', action='store_true', help='Make the published version active')
+
+    forest = commands.add_parser('forest')
+    forest.add_argument('--n-jobs', type=int, default=-1)
+    forest.add_argument('--folds', type=int, default=5)
+    forest.add_argument('--trees', type=int, default=150)
+    forest.add_argument('--output', help='Directory to save the fitted forest in')
+    args = parser.parse_args(argv)
+
+    report = Report(args.command)
+    {'nb': train_nb, 'nb-update': update_nb, 'forest': train_forest}[args.command](args, report)
+    print(json.dumps(report.finish(), indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
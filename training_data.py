@@ -0,0 +1,144 @@
+"""Compact loader for the one-hot training CSV (data/Training.csv layout).
+
+Symptom columns are parsed straight into uint8 (one byte per cell instead
+of pandas' default int64) and the prognosis column into integer codes over a
+sorted label list. The parsed arrays are cached in a sidecar .npz next to the
+CSV, keyed by the CSV's sha256, with the 0/1 matrix bit-packed (one bit per
+cell), so retraining does not reparse an unchanged file.
+"""
+import csv
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+
+LABEL_COLUMN = 'prognosis'
+CACHE_FORMAT_VERSION = 2
+
+
+class TrainingData:
+    def __init__(self, X, label_codes, labels, symptoms, source_sha256):
+        self.X = X                          # (n_rows, n_symptoms) uint8 0/1
+        self.label_codes = label_codes      # (n_rows,) int16 indices into labels
+        self.labels = labels                # sorted distinct prognosis values
+        self.symptoms = symptoms
+        self.source_sha256 = source_sha256
+
+    @property
+    def y(self):
+        return self.labels[self.label_codes]
+
+    def __len__(self):
+        return self.X.shape[0]
+
+    @property
+    def nbytes(self):
+        return self.X.nbytes + self.label_codes.nbytes + self.labels.nbytes
+
+    def packed(self):
+        """The symptom matrix at one bit per cell (rows padded to whole bytes)."""
+        return np.packbits(self.X, axis=1)
+
+    @classmethod
+    def from_packed(cls, packed, label_codes, labels, symptoms, source_sha256):
+        X = np.unpackbits(packed, axis=1, count=len(symptoms))
+        return cls(X, label_codes, labels, symptoms, source_sha256)
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cache_path_for(csv_path):
+    directory, name = os.path.split(os.path.abspath(csv_path))
+    return os.path.join(directory, f".{name}.cache.npz")
+
+
+def read_header(csv_path):
+    with open(csv_path, 'r', encoding='utf-8', newline='') as f:
+        return next(csv.reader(f))
+
+
+def parse_csv(csv_path, source_sha256=None):
+    """Parse the CSV without ever materializing int64 / object symptom columns."""
+    header = read_header(csv_path)
+    symptoms = [col for col in header if col and col != LABEL_COLUMN and not col.startswith('Unnamed')]
+    if LABEL_COLUMN not in header:
+        raise ValueError(f"{csv_path} has no '{LABEL_COLUMN}' column")
+
+    dtypes = {symptom: np.uint8 for symptom in symptoms}
+    dtypes[LABEL_COLUMN] = 'category'
+    df = pd.read_csv(csv_path, usecols=symptoms + [LABEL_COLUMN], dtype=dtypes)
+    X = np.ascontiguousarray(df[symptoms].to_numpy(dtype=np.uint8))
+    if X.size and X.max() > 1:
+        # Bit-packing and the models both assume presence/absence cells
+        raise ValueError(f"{csv_path} has symptom values other than 0/1")
+
+    labels = df[LABEL_COLUMN].cat.remove_unused_categories()
+    labels = labels.cat.reorder_categories(sorted(labels.cat.categories))
+    return TrainingData(
+        X=X,
+        label_codes=labels.cat.codes.to_numpy(dtype=np.int16),
+        labels=np.asarray(labels.cat.categories, dtype=str),
+        symptoms=symptoms,
+        source_sha256=source_sha256 or file_sha256(csv_path)
+    )
+
+
+def _read_cache(path, source_sha256):
+    try:
+        with np.load(path, allow_pickle=False) as cached:
+            if int(cached['format_version']) != CACHE_FORMAT_VERSION or str(cached['source_sha256']) != source_sha256:
+                return None
+            return TrainingData.from_packed(
+                packed=cached['X_packed'],
+                label_codes=cached['label_codes'],
+                labels=cached['labels'],
+                symptoms=[str(s) for s in cached['symptoms']],
+                source_sha256=source_sha256
+            )
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def _write_cache(path, data):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            np.savez(
+                f,
+                format_version=np.int32(CACHE_FORMAT_VERSION),
+                source_sha256=np.str_(data.source_sha256),
+                X_packed=data.packed(),
+                label_codes=data.label_codes,
+                labels=data.labels,
+                symptoms=np.asarray(data.symptoms, dtype=str)
+            )
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"Training data cache write warning: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def load_training_data(csv_path, use_cache=True):
+    """TrainingData for a CSV, from the sidecar cache when the CSV is unchanged."""
+    if not os.path.exists(csv_path):
+        raise FileNotFoundError(f"Training data not found at: {csv_path}")
+
+    source_sha256 = file_sha256(csv_path)
+    cache_path = cache_path_for(csv_path)
+    if use_cache:
+        cached = _read_cache(cache_path, source_sha256)
+        if cached is not None:
+            return cached
+
+    data = parse_csv(csv_path, source_sha256)
+    if use_cache:
+        _write_cache(cache_path, data)
+    return data
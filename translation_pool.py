@@ -0,0 +1,67 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+
+class TranslationExecutor:
+    """Bounded thread pool for outbound translation calls.
+
+    Identical in-flight requests (same key, e.g. ``(target_lang, text)``) share
+    one future, so concurrent predictions never translate the same string
+    twice. Callers wait against a deadline and get ``None`` for anything that
+    has not finished; the call keeps running and its result is still
+    delivered to whoever submitted it.
+    """
+
+    def __init__(self, max_workers=8):
+        self.max_workers = max_workers
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='translate')
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.coalesced = 0
+        self.deadline_misses = 0
+
+    def submit(self, key, fn, *args):
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future
+            future = self._pool.submit(fn, *args)
+            self._inflight[key] = future
+            self.submitted += 1
+        future.add_done_callback(lambda f, k=key: self._forget(k, f))
+        return future
+
+    def _forget(self, key, future):
+        with self._lock:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    def gather(self, futures, deadline):
+        """Results for futures finished by `deadline` (time.monotonic()), else None."""
+        remaining = max(0.0, deadline - time.monotonic())
+        done, pending = wait(futures, timeout=remaining)
+        if pending:
+            with self._lock:
+                self.deadline_misses += len(pending)
+
+        results = []
+        for future in futures:
+            if future in done and future.exception() is None:
+                results.append(future.result())
+            else:
+                results.append(None)
+        return results
+
+    def stats(self):
+        with self._lock:
+            inflight = len(self._inflight)
+        return {
+            'max_workers': self.max_workers,
+            'inflight': inflight,
+            'submitted': self.submitted,
+            'coalesced': self.coalesced,
+            'deadline_misses': self.deadline_misses
+        }
@@ -0,0 +1,118 @@
+"""Precomputed translations for the static clinical text shown in predictions.
+
+Build the bundle offline (needs GROQ_API_KEY or network access to Google
+Translate) and ship it next to the app:
+
+    python translation_store.py --languages hi mr
+
+At startup app.py loads the bundle, so only genuinely dynamic strings are
+translated over the network.
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BUNDLE_FORMAT_VERSION = 1
+DEFAULT_BUNDLE_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), 'translations', 'static_translations.json'
+)
+
+
+def catalogue_hash(texts):
+    """Stable fingerprint of a catalogue, used to spot stale bundles."""
+    digest = hashlib.sha256()
+    for text in sorted(set(texts)):
+        digest.update(text.encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def load_bundle(path=DEFAULT_BUNDLE_PATH, expected_hash=None):
+    """Return {lang: {source: translation}} from a bundle file, or {} if unusable."""
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            bundle = json.load(f)
+        if bundle.get('format_version') != BUNDLE_FORMAT_VERSION:
+            print(f"Translation bundle {path} has unsupported format; ignoring it")
+            return {}
+        if expected_hash and bundle.get('catalogue_hash') != expected_hash:
+            # Entries are keyed by source text, so old ones are still correct;
+            # new strings simply fall through to live translation.
+            print("Translation bundle is older than the current catalogue; rebuild recommended")
+        languages = bundle.get('languages', {})
+        print(f"Loaded translation bundle v{bundle.get('version')} for {', '.join(sorted(languages)) or 'no languages'}")
+        return languages
+    except Exception as e:
+        print(f"Translation bundle load warning: {e}")
+        return {}
+
+
+def build_bundle(texts, languages, translate_batch, translate_one, chunk_size=40, workers=8):
+    """Translate the catalogue for each language.
+
+    translate_batch(texts, lang) returns a list or None; translate_one(text, lang)
+    is the per-string fallback. Strings that come back unchanged are left out
+    so they are retried live instead of being pinned to English.
+    """
+    texts = sorted(set(t for t in texts if isinstance(t, str) and t.strip()))
+    result = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for lang in languages:
+            table = {}
+            for start in range(0, len(texts), chunk_size):
+                chunk = texts[start:start + chunk_size]
+                translated = translate_batch(chunk, lang)
+                if translated is None:
+                    translated = list(pool.map(lambda t, l=lang: translate_one(t, l), chunk))
+                for source, target in zip(chunk, translated):
+                    if target and target != source:
+                        table[source] = target
+            result[lang] = table
+            print(f"{lang}: {len(table)}/{len(texts)} strings translated")
+
+    return {
+        'format_version': BUNDLE_FORMAT_VERSION,
+        'version': int(time.time()),
+        'catalogue_hash': catalogue_hash(texts),
+        'created_at': int(time.time()),
+        'languages': result
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Pre-translate static clinical text')
+    parser.add_argument('--output', default=DEFAULT_BUNDLE_PATH)
+    parser.add_argument('--languages', nargs='*', default=None,
+                        help='Language codes (defaults to SUPPORTED_OUTPUT_LANGS)')
+    parser.add_argument('--chunk-size', type=int, default=40)
+    args = parser.parse_args(argv)
+
+    import app
+    from file_locks import atomic_write_json
+
+    languages = args.languages or sorted(app.SUPPORTED_OUTPUT_LANGS)
+    texts = app.static_translation_catalogue()
+    print(f"Catalogue has {len(texts)} strings")
+
+    bundle = build_bundle(
+        texts, languages,
+        translate_batch=app.translate_texts_with_groq,
+        translate_one=app.translate_text_with_google,
+        chunk_size=args.chunk_size
+    )
+
+    output_dir = os.path.dirname(os.path.abspath(args.output))
+    os.makedirs(output_dir, exist_ok=True)
+    atomic_write_json(args.output, bundle)
+    print(f"Wrote translation bundle to {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())